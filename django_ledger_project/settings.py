@@ -55,6 +55,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
@@ -77,6 +78,7 @@ INSTALLED_APPS = [
     'pricing',
     'investor',
     'syncqueue',
+    'search',
     'corsheaders',
     'mptt',
     'hordak',
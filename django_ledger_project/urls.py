@@ -48,6 +48,7 @@ urlpatterns = [
     path('investor/', include('investor.urls')),
     path('reports/', include('report.urls')),
     path('sync/', include('syncqueue.urls')),
+    path('search/', include('search.urls')),
 
     path('hr/', include('hr.urls')),
     path('user/', include('user.urls')),
@@ -0,0 +1,144 @@
+# ecommerce/conversion.py
+"""
+Order -> SaleInvoice conversion for one or many orders.
+
+Per call (not per line):
+  - orders locked and loaded with their items in 2 queries,
+  - their customers locked and loaded once, one shared Party per customer:
+    confirm() adds each invoice to customer.current_balance and saves it, so
+    two orders of one customer must update the same instance,
+  - the FEFO batch of every product in the warehouse picked in ONE query
+    (ROW_NUMBER() OVER (PARTITION BY product ORDER BY expiry_date, id) = 1),
+  - invoice headers and all invoice lines written with bulk_create.
+Each invoice is then confirmed with SaleInvoice.confirm() (one Hordak txn per
+invoice) inside its own savepoint, so one bad order doesn't sink the batch.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Window, prefetch_related_objects
+from django.db.models.functions import RowNumber
+
+from inventory.models import Batch, Party
+from pricing.resolver import list_prices, price_list_id_for
+from sale.models import SaleInvoice, SaleInvoiceItem
+
+Q2 = Decimal("0.01")
+
+
+def fefo_batches(product_ids, warehouse):
+    """{product_id: batch_id} — earliest-expiring batch with stock, one query."""
+    if not product_ids:
+        return {}
+    qs = (
+        Batch.objects.filter(product_id__in=product_ids, warehouse=warehouse, quantity__gt=0)
+        .annotate(rn=Window(RowNumber(), partition_by=[F("product_id")],
+                            order_by=[F("expiry_date").asc(), F("id").asc()]))
+        .filter(rn=1)
+        .values_list("product_id", "id")
+    )
+    return dict(qs)
+
+
+def _line_rate(item, custom_prices):
+    """Negotiated bid price, else the customer's price-list price, else the order price."""
+    return (Decimal(item.bid_price or 0)
+            or Decimal(custom_prices.get(item.product_id) or 0)
+            or Decimal(item.price or 0))
+
+
+@transaction.atomic
+def confirm_orders(order_ids, *, warehouse):
+    """
+    Convert & confirm many orders. Already-converted orders are returned as-is.
+    Returns [{order, order_no, status: confirmed|already|error, invoice, invoice_no, errors}]
+    in the order of `order_ids`.
+    """
+    from .models import Order
+
+    order_ids = [int(pk) for pk in order_ids]
+    orders = {o.pk: o for o in Order.objects.select_for_update().filter(pk__in=order_ids)}
+    prefetch_related_objects(list(orders.values()), "items")
+    customers = Party.objects.select_for_update().in_bulk({o.customer_id for o in orders.values()})
+    for o in orders.values():
+        o.customer = customers[o.customer_id]
+
+    results, todo = {}, []
+    taken = set(SaleInvoice.objects.filter(invoice_no__in=[o.order_no for o in orders.values()])
+                .values_list("invoice_no", flat=True))
+    for pk in order_ids:
+        o = orders.get(pk)
+        if o is None:
+            results[pk] = {"order": pk, "status": "error", "errors": ["Order not found."]}
+        elif o.sale_invoice_id:
+            results[pk] = {"order": o.pk, "order_no": o.order_no, "status": "already",
+                           "invoice": o.sale_invoice_id}
+        elif o.status == "Cancelled":
+            results[pk] = {"order": o.pk, "order_no": o.order_no, "status": "error",
+                           "errors": ["Cancelled orders can't be confirmed."]}
+        elif not o.items.all():
+            results[pk] = {"order": o.pk, "order_no": o.order_no, "status": "error",
+                           "errors": ["Order has no items."]}
+        elif not o.customer.chart_of_account_id:
+            results[pk] = {"order": o.pk, "order_no": o.order_no, "status": "error",
+                           "errors": ["Customer has no chart of account."]}
+        elif o.order_no in taken:
+            results[pk] = {"order": o.pk, "order_no": o.order_no, "status": "error",
+                           "errors": [f"Invoice number {o.order_no} already exists."]}
+        else:
+            todo.append(o)
+            taken.add(o.order_no)
+    if not todo:
+        return [results[pk] for pk in order_ids]
+
+    batches = fefo_batches({it.product_id for o in todo for it in o.items.all()}, warehouse)
+
+    headers, lines = [], []
+    for o in todo:
+        custom = list_prices(price_list_id_for(o.customer))  # cached per price list
+        inv = SaleInvoice(
+            invoice_no=o.order_no,          # same number
+            date=o.date,
+            customer=o.customer,
+            warehouse=warehouse,
+            paid_amount=o.paid_amount or 0,  # upfront paid (if any)
+        )
+        own = []
+        for it in o.items.all():
+            rate = _line_rate(it, custom)
+            own.append(SaleInvoiceItem(
+                invoice=inv,
+                product_id=it.product_id,
+                batch_id=batches.get(it.product_id),  # can be None; delivery enforces a batch
+                quantity=it.quantity,
+                bonus=0,
+                rate=rate,
+                discount1=0,
+                amount=(Decimal(it.quantity) * rate).quantize(Q2),
+            ))
+        # order and invoice total the same resolved line amounts (confirm recomputes from the lines)
+        o.total_amount = inv.total_amount = sum((li.amount for li in own), Decimal("0"))
+        headers.append(inv)
+        lines.extend(own)
+    SaleInvoice.objects.bulk_create(headers)  # the lines pick up the new invoice ids on their bulk_create
+    SaleInvoiceItem.objects.bulk_create(lines)
+    prefetch_related_objects(headers, "items")  # confirm() totals the lines from this cache
+
+    linked = []
+    for inv, o in zip(headers, todo):
+        try:
+            with transaction.atomic():
+                inv.confirm()
+        except Exception as e:  # posting errors are reported per order
+            # the savepoint undid the balance update; drop it from the shared instance too
+            o.customer.refresh_from_db(fields=["current_balance"])
+            SaleInvoice.objects.filter(pk=inv.pk).delete()
+            messages = getattr(e, "messages", None) or [str(e)]
+            results[o.pk] = {"order": o.pk, "order_no": o.order_no, "status": "error", "errors": messages}
+            continue
+        o.sale_invoice, o.status = inv, "Confirmed"
+        linked.append(o)
+        results[o.pk] = {"order": o.pk, "order_no": o.order_no, "status": "confirmed",
+                         "invoice": inv.pk, "invoice_no": inv.invoice_no}
+    Order.objects.bulk_update(linked, ["sale_invoice", "status", "total_amount"])
+    return [results[pk] for pk in order_ids]
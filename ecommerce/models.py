@@ -1,8 +1,9 @@
 from django.db import models, transaction
+from django.core.exceptions import ValidationError
 from django.db.models import F, Sum
 from django.utils import timezone
-from inventory.models import Party, Product, Batch
-from sale.models import SaleInvoice, SaleInvoiceItem
+from inventory.models import Party, Product
+from sale.models import SaleInvoice
 from hr.models import Employee
 from decimal import Decimal
 from setting.models import Warehouse
@@ -55,68 +56,23 @@ class Order(models.Model):
     @transaction.atomic
     def confirm(self, *, warehouse: Warehouse) -> SaleInvoice:
         """
-        Create & link a SaleInvoice that mirrors this Order.
+        Create, confirm & link a SaleInvoice that mirrors this Order
+        (see ecommerce.conversion.confirm_orders for the batched path).
         - Invoice number = order_no
-        - Items cloned from OrderItem
+        - Items cloned from OrderItem, FEFO batch per product
         - No payment method/terms here; payments handled on the invoice later.
         - Do NOT deliver here (supports partial delivery later from the invoice).
         Idempotent: if already linked, just returns it.
         """
+        from .conversion import confirm_orders
+
         if self.sale_invoice_id:
             return self.sale_invoice
-
-        # Ensure order total reflects items
-        self._recompute_total_from_items()
-
-        # 1) Create the SaleInvoice (start DRAFT, then confirm)
-        inv = SaleInvoice.objects.create(
-            invoice_no=self.order_no,           # same number
-            date=self.date,
-            customer=self.customer,
-            warehouse=warehouse,
-            total_amount=self.total_amount,     # SaleInvoice will compute grand_total/tax/discount internally
-            paid_amount=self.paid_amount or 0,  # upfront paid (if any)
-        )
-
-        # 2) Create invoice lines from order items
-        #    Pick a Batch for each product (FEFO if available, else any with stock, else None).
-        for item in self.items.select_related("product").all():
-            batch = (
-                Batch.objects
-                .filter(product=item.product, warehouse=warehouse, quantity__gt=0)
-                .order_by("expiry_date")  # FEFO
-                .first()
-            )
-            amount = (Decimal(item.quantity) * Decimal(item.bid_price)).quantize(Decimal("0.01"))
-
-            SaleInvoiceItem.objects.create(
-                invoice=inv,
-                product=item.product,
-                batch=batch,                 # can be None; your deliver step can enforce batch then
-                quantity=item.quantity,
-                bonus=0,
-                packing=0,
-                rate=item.bid_price,
-                discount1=0,
-                discount2=0,
-                amount=amount,        # kept for schema compatibility
-            )
-
-        # 3) Confirm the invoice (posts ledger). If your SaleInvoice has confirm(), use it.
-        if hasattr(inv, "confirm") and callable(inv.confirm):
-            inv.confirm()
-        else:
-            # Fallback: set status if your model doesn't have confirm()
-            if hasattr(inv, "status"):
-                inv.status = "CONFIRMED"
-                inv.save(update_fields=["status"])
-
-        # 4) Link & update order status
-        self.sale_invoice = inv
-        self.status = "Confirmed"
-        super().save(update_fields=["sale_invoice", "status"])
-
-        return inv
+        result = confirm_orders([self.pk], warehouse=warehouse)[0]
+        if result["status"] == "error":
+            raise ValidationError(result["errors"])
+        self.refresh_from_db(fields=["sale_invoice", "status", "total_amount"])
+        return self.sale_invoice
 
     def sync_from_invoice(self) -> None:
         """
@@ -1,8 +1,12 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from rest_framework import serializers
 
 from .models import Order, OrderItem
 from inventory.models import Product,Party
 from hr.models import Employee
+from utils.nested import sync_nested_items
+from pricing.resolver import resolve_prices
 
 
 
@@ -22,8 +26,12 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)  # lets an update address existing lines
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
-    
+    # omitted price/amount are filled from the customer's price list (OrderSerializer.validate)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+
     class Meta:
         model = OrderItem
         fields = [
@@ -65,12 +73,30 @@ class OrderSerializer(serializers.ModelSerializer):
             "salesman": {"required": False, "allow_null": True},
         }
 
+    def validate(self, data):
+        items = data.get("items") or []
+        customer = data.get("customer") or getattr(self.instance, "customer", None)
+        need = [it for it in items if it.get("price") is None]
+        if need:
+            prices = resolve_prices(customer, {it["product"].pk for it in need})
+            for it in need:
+                it["price"] = prices.get(it["product"].pk, 0)
+        for it in items:
+            if it.get("amount") is None:
+                it["amount"] = it["quantity"] * it["price"]
+        return data
+
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop("items", [])
         order = Order.objects.create(**validated_data)
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, **{k: v for k, v in row.items() if k != "id"}) for row in items_data
+        ])
+        order._recompute_total_from_items()
         return order
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         # keep existing salesman/customer if not provided
         if "salesman" not in validated_data:
@@ -83,11 +109,13 @@ class OrderSerializer(serializers.ModelSerializer):
             setattr(instance, attr, val)
         instance.save()
 
-        # update nested items only if explicitly sent
+        # update nested items only if explicitly sent; unchanged lines keep their ids
         if items_data is not None:
-            instance.items.all().delete()
-            for item_data in items_data:
-                OrderItem.objects.create(order=instance, **item_data)
+            try:
+                sync_nested_items(instance.items, items_data)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError({"items": e.messages})
+            instance._recompute_total_from_items()
 
         return instance
     def to_representation(self, instance):
@@ -0,0 +1,78 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from finance.test_utils import basic_entities
+from inventory.models import PriceList, PriceListItem
+from pricing.resolver import invalidate
+from sale.models import SaleInvoice, SaleInvoiceItem
+
+from .models import Order
+
+
+class ConfirmBulkTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("user@example.com", "pass")
+        self.client.force_authenticate(self.user)
+        e = basic_entities()
+        self.customer, self.product, self.warehouse = e["customer"], e["product"], e["warehouse"]
+
+    def _order(self, order_no, quantity=1):
+        data = {
+            "order_no": order_no,
+            "date": date.today(),
+            "customer": self.customer.id,
+            "status": "Pending",
+            "items": [
+                {"product": self.product.id, "quantity": quantity, "price": "10.00",
+                 "amount": f"{10 * quantity}.00"},
+            ],
+        }
+        resp = self.client.post("/ecommerce/orders/", data, format="json")
+        self.assertEqual(resp.status_code, 201, resp.data)
+        return resp.data["id"]
+
+    def _confirm(self, ids):
+        return self.client.post("/ecommerce/orders/confirm-bulk/",
+                                {"ids": ids, "warehouse": self.warehouse.id}, format="json")
+
+    def test_confirm_bulk_reports_each_order(self):
+        ids = [self._order("ORD-B0"), self._order("ORD-B1")]
+
+        resp = self._confirm(ids + [999999])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["summary"], {"confirmed": 2, "already": 0, "error": 1})
+        self.assertEqual(SaleInvoice.objects.count(), 2)
+        self.assertEqual(SaleInvoiceItem.objects.count(), 2)
+
+        # second run is a no-op
+        resp = self._confirm(ids)
+        self.assertEqual(resp.data["summary"]["already"], 2)
+        self.assertEqual(SaleInvoice.objects.count(), 2)
+
+    def test_two_orders_of_one_customer_both_reach_the_balance(self):
+        self.customer.current_balance = Decimal("5.00")
+        self.customer.save(update_fields=["current_balance"])
+        ids = [self._order("ORD-C0", quantity=1), self._order("ORD-C1", quantity=3)]
+
+        resp = self._confirm(ids)
+        self.assertEqual(resp.data["summary"]["confirmed"], 2)
+        self.customer.refresh_from_db()
+        outstanding = sum(inv.outstanding for inv in SaleInvoice.objects.all())
+        self.assertEqual(outstanding, Decimal("40.00"))
+        self.assertEqual(self.customer.current_balance, Decimal("45.00"))
+
+    def test_order_total_uses_the_invoiced_rate(self):
+        invalidate()
+        plist = PriceList.objects.create(name="Wholesale")
+        PriceListItem.objects.create(price_list=plist, product=self.product, custom_price=Decimal("8.00"))
+        self.customer.price_list = str(plist.pk)
+        self.customer.save(update_fields=["price_list"])
+        oid = self._order("ORD-P0", quantity=3)
+
+        self.assertEqual(self._confirm([oid]).data["summary"]["confirmed"], 1)
+        order = Order.objects.select_related("sale_invoice").get(pk=oid)
+        self.assertEqual(order.sale_invoice.total_amount, Decimal("24.00"))
+        self.assertEqual(order.total_amount, order.sale_invoice.total_amount)
@@ -0,0 +1,52 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from finance.test_utils import basic_entities
+from inventory.models import Product
+
+from .models import Order
+
+
+class OrderItemUpdateTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("user@example.com", "pass")
+        self.client.force_authenticate(self.user)
+        e = basic_entities()
+        self.customer, self.product = e["customer"], e["product"]
+
+    def test_update_items_keeps_unchanged_line_ids(self):
+        data = {
+            "order_no": "ORD-U1",
+            "date": date.today(),
+            "customer": self.customer.id,
+            "status": "Pending",
+            "items": [
+                {"product": self.product.id, "quantity": 1, "price": "10.00", "amount": "10.00"},
+            ],
+        }
+        created = self.client.post("/ecommerce/orders/", data, format="json").data
+        line_id = created["items"][0]["id"]
+
+        # whole cart re-sent: same line with a new quantity (no id), plus a new product
+        other = Product.objects.create(
+            name="P2", barcode="456", company=self.product.company, group=self.product.group,
+            distributor=self.product.distributor, trade_price=5, retail_price=5,
+            sales_tax_ratio=0, fed_tax_ratio=0, disable_sale_purchase=False,
+        )
+        data["items"] = [
+            {"product": self.product.id, "quantity": 3, "price": "10.00", "amount": "30.00"},
+            {"product": other.id, "quantity": 2, "price": "5.00", "amount": "10.00"},
+        ]
+        resp = self.client.put(f"/ecommerce/orders/{created['id']}/", data, format="json")
+        self.assertEqual(resp.status_code, 200)
+        order = Order.objects.get(pk=created["id"])
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(order.items.get(product=self.product).id, line_id)
+        self.assertEqual(order.total_amount, 40)
+
+        # dropping a line deletes it
+        data["items"] = data["items"][1:]
+        self.client.put(f"/ecommerce/orders/{created['id']}/", data, format="json")
+        self.assertFalse(order.items.filter(pk=line_id).exists())
@@ -1,12 +1,15 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status as http_status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError as DjangoValidationError
 
+from .conversion import confirm_orders
 from .models import Order
 from .serializers import OrderSerializer
 from sale.serializers import SaleInvoiceSerializer
 from setting.models import Warehouse
 from sale.models import SaleInvoice
+from search.engine import filter_queryset
 
 class OrderViewSet(viewsets.ModelViewSet):
     lookup_field = "pk"
@@ -29,10 +32,7 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         search = self.request.query_params.get("searchTerm")
         if search:
-            qs = qs.filter(
-                Q(order_no__icontains=search) |
-                Q(customer__name__icontains=search)
-            )
+            qs = filter_queryset(qs, "order", search)
 
         return qs
     @action(
@@ -74,9 +74,31 @@ class OrderViewSet(viewsets.ModelViewSet):
     def confirm(self, request, pk=None):
         order = self.get_object()
         warehouse = Warehouse.objects.get(pk=request.data.get("warehouse"))
-        invoice = order.confirm(warehouse)
+        try:
+            invoice = order.confirm(warehouse=warehouse)
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=http_status.HTTP_400_BAD_REQUEST)
         serializer = SaleInvoiceSerializer(invoice)
         return Response(serializer.data)
+
+    @action(detail=False, methods=["post"], url_path="confirm-bulk")
+    def confirm_bulk(self, request):
+        """
+        Dispatch desk: {"ids": [..], "warehouse": id}
+        Each order reports confirmed / already / error independently.
+        """
+        ids = request.data.get("ids")
+        if not isinstance(ids, list) or not ids:
+            return Response({"detail": "ids must be a non-empty list."}, status=http_status.HTTP_400_BAD_REQUEST)
+        warehouse = Warehouse.objects.filter(pk=request.data.get("warehouse")).first()
+        if warehouse is None:
+            return Response({"detail": "warehouse is required."}, status=http_status.HTTP_400_BAD_REQUEST)
+        try:
+            results = confirm_orders(ids, warehouse=warehouse)
+        except (TypeError, ValueError):
+            return Response({"detail": "ids must be integers."}, status=http_status.HTTP_400_BAD_REQUEST)
+        summary = {key: sum(1 for r in results if r["status"] == key) for key in ("confirmed", "already", "error")}
+        return Response({"summary": summary, "results": results})
     
     @action(detail=True, methods=["patch"], url_path="status")
     def set_status(self, request, pk=None):
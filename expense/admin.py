@@ -1,7 +1,8 @@
 # apps/expenses/admin.py
 from django.contrib import admin, messages
 from django.db import transaction
-from .models import Expense, ExpenseCategory
+from .models import Expense, ExpenseCategory, RecurringExpense
+from .posting import post_expenses, run_recurring
 from django import forms
 from finance.hordak_posting import ensure_category_expense_account
 from hordak.models import Account
@@ -83,26 +84,18 @@ class ExpenseAdmin(admin.ModelAdmin):
 
     @admin.action(description="Post expense → create Hordak transaction")
     def post_expense(self, request, queryset):
-        processed = skipped = 0
-        with transaction.atomic():
-            for exp in queryset.select_for_update():
-                try:
-                    if exp.status != "DRAFT":
-                        skipped += 1
-                        continue
-                    exp.post_to_ledger()
-                    processed += 1
-                except Exception as e:
-                    skipped += 1
-                    self.message_user(
-                        request,
-                        f"Expense #{exp.pk}: could not post ({e})",
-                        level=messages.WARNING,
-                    )
-        if processed:
-            self.message_user(request, f"Posted {processed} expense(s).", level=messages.SUCCESS)
-        if skipped:
-            self.message_user(request, f"Skipped {skipped} expense(s).", level=messages.INFO)
+        report = post_expenses(queryset)
+        for row in report.errors:
+            self.message_user(
+                request,
+                f"Expense #{row['expense']}: could not post ({row['detail']})",
+                level=messages.WARNING,
+            )
+        if report.posted:
+            self.message_user(request, f"Posted {len(report.posted)} expense(s).", level=messages.SUCCESS)
+        if report.skipped or report.errors:
+            self.message_user(request, f"Skipped {len(report.skipped) + len(report.errors)} expense(s).",
+                              level=messages.INFO)
 
     @admin.action(description="Cancel expense → reverse Hordak transaction")
     def cancel_expense(self, request, queryset):
@@ -126,3 +119,20 @@ class ExpenseAdmin(admin.ModelAdmin):
             self.message_user(request, f"Cancelled {processed} expense(s).", level=messages.SUCCESS)
         if skipped:
             self.message_user(request, f"Skipped {skipped} expense(s).", level=messages.INFO)
+
+
+@admin.register(RecurringExpense)
+class RecurringExpenseAdmin(admin.ModelAdmin):
+    list_display = ("name", "category", "amount", "currency", "frequency", "interval", "next_run", "auto_post", "active")
+    list_filter = ("active", "frequency", "auto_post", "category")
+    search_fields = ("name", "description")
+    readonly_fields = ("last_run_at",)
+    actions = ("run_due",)
+
+    @admin.action(description="Create due expenses now")
+    def run_due(self, request, queryset):
+        run = run_recurring()
+        msg = f"Created {run.created} expense(s) from {run.definitions} definition(s)."
+        if run.posting:
+            msg += f" Posted {len(run.posting.posted)}."
+        self.message_user(request, msg, level=messages.SUCCESS)
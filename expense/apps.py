@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ExpenseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'expense'
+
+    def ready(self):
+        # connects the category-account cache invalidation signals
+        from . import posting  # noqa
@@ -0,0 +1,25 @@
+# management/commands/run_recurring_expenses.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from expense.posting import run_recurring
+
+
+class Command(BaseCommand):
+    help = "Create the due expenses from active recurring definitions and post the auto_post ones (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="YYYY-MM-DD to run as of (default: today)")
+        parser.add_argument("--no-post", action="store_true", help="create DRAFT expenses only")
+
+    def handle(self, *args, **opts):
+        try:
+            today = date.fromisoformat(opts["date"]) if opts["date"] else None
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+        run = run_recurring(today, post=not opts["no_post"])
+        msg = f"Created {run.created} expense(s) from {run.definitions} due definition(s)"
+        if run.posting:
+            msg += f"; posted {len(run.posting.posted)}, {len(run.posting.errors)} error(s)"
+        self.stdout.write(self.style.SUCCESS(msg))
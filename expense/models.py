@@ -26,13 +26,13 @@ class ExpenseCategory(models.Model):
     @transaction.atomic
     def save(self, *args, **kwargs):
         """
-        On create (or when missing), auto-provision a Hordak expense account
+        When missing, auto-provision a Hordak expense account
         named exactly as this category and link it into `default_expense_account`.
         """
-        creating = self._state.adding
         super().save(*args, **kwargs)  # save first to get PK
 
-        if creating or not self.default_expense_account_id:
+        # only provision when missing: ensure_category_expense_account walks the chart
+        if not self.default_expense_account_id:
             acct = ensure_category_expense_account(self.name)
             if self.default_expense_account_id != acct.id:
                 self.default_expense_account = acct
@@ -93,9 +93,25 @@ class Expense(models.Model):
     )
 
     status = models.CharField(max_length=12, choices=STATUS, default="DRAFT")
+    recurring = models.ForeignKey(
+        "RecurringExpense",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="occurrences",
+        help_text="Definition this expense was generated from.",
+    )
 
     class Meta:
         ordering = ("-date", "-id")
+        constraints = [
+            # the scheduler materializes each (definition, date) once
+            models.UniqueConstraint(
+                fields=["recurring", "date"],
+                condition=models.Q(recurring__isnull=False),
+                name="expense_unique_recurring_date",
+            ),
+        ]
 
     def __str__(self):
         return f"Expense #{self.pk or '—'} - {self.amount} {self.currency}"
@@ -151,4 +167,58 @@ class Expense(models.Model):
     # # auto-fill from category if empty
     #     if not self.expense_account_id and self.category and self.category.default_expense_account_id:
     #         self.expense_account_id = self.category.default_expense_account_id
-    #     super().save(*args, **kwargs)
\ No newline at end of file
+    #     super().save(*args, **kwargs)
+
+
+class RecurringExpense(models.Model):
+    """
+    Definition of an expense that repeats (rent, utilities, salaries of
+    contractors...). `run_recurring_expenses` creates the due Expense rows and
+    posts them in bulk (expense/posting.py).
+    """
+    FREQUENCY = (
+        ("DAILY", "Daily"),
+        ("WEEKLY", "Weekly"),
+        ("MONTHLY", "Monthly"),
+        ("QUARTERLY", "Quarterly"),
+        ("YEARLY", "Yearly"),
+    )
+
+    name = models.CharField(max_length=100)
+    category = models.ForeignKey(ExpenseCategory, on_delete=models.PROTECT, related_name="recurring_expenses")
+    description = models.TextField(blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=3, default="PKR")
+    payment_account = models.ForeignKey(
+        Account,
+        on_delete=models.PROTECT,
+        help_text="Hordak cash/bank account to CR.",
+        related_name="recurring_expenses_cr",
+    )
+
+    frequency = models.CharField(max_length=10, choices=FREQUENCY, default="MONTHLY")
+    interval = models.PositiveSmallIntegerField(default=1, help_text="Every N periods.")
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_run = models.DateField(blank=True, help_text="Date of the next occurrence to create (defaults to start date).")
+    auto_post = models.BooleanField(default=True, help_text="Post generated expenses to the ledger.")
+    active = models.BooleanField(default=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("next_run", "id")
+        indexes = [models.Index(fields=["active", "next_run"])]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_frequency_display()}, {self.amount} {self.currency})"
+
+    def clean(self):
+        if Decimal(self.amount or 0) <= 0:
+            raise ValidationError("Amount must be > 0.")
+        if self.end_date and self.end_date < self.start_date:
+            raise ValidationError("End date must be on or after the start date.")
+
+    def save(self, *args, **kwargs):
+        if not self.next_run:
+            self.next_run = self.start_date
+        super().save(*args, **kwargs)
@@ -0,0 +1,191 @@
+# expense/posting.py
+"""
+Bulk expense posting and the recurring-expense scheduler.
+
+post_expenses(expenses):
+  1) locks the DRAFT expenses once (select_related category / payment account),
+  2) resolves each category's expense account from an in-process cache
+     {category_id: Account} (signals + TTL keep it fresh), filled with ONE
+     query for the categories not cached yet; ensure_category_expense_account
+     only runs for a category that has no default account,
+  3) writes one Transaction per expense (DR expense / CR cash-bank) with one
+     bulk INSERT for the transactions and one for all legs
+     (finance.hordak_posting.post_txns_bulk),
+  4) saves status + posted_txn with one bulk_update.
+Each expense keeps its own transaction, so Expense.cancel() still reverses one.
+
+run_recurring(today): locks the due RecurringExpense rows (SKIP LOCKED),
+builds every occurrence up to `today` (catching up missed runs), drops the
+ones that already exist (also guarded by the (recurring, date) constraint),
+inserts the rest with one bulk_create,
+advances next_run with one bulk_update and posts the auto_post ones in bulk.
+"""
+import calendar
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from moneyed import Money
+
+from finance.hordak_posting import ensure_category_expense_account, post_txns_bulk
+
+from .models import Expense, ExpenseCategory, RecurringExpense
+
+MAX_CATCH_UP = 366  # occurrences per definition per run
+ACCOUNT_TTL = 300  # seconds; other processes' category edits show up after this
+
+_lock = threading.Lock()
+_category_accounts = {}  # category_id -> (loaded_at, hordak Account)
+
+
+def category_accounts(category_ids):
+    """{category_id: expense Account}; cached per process, dropped by ExpenseCategory signals or after ACCOUNT_TTL."""
+    now = time.monotonic()
+    wanted = set(category_ids) - {None}
+    hits = {cid: hit[1] for cid in wanted
+            if (hit := _category_accounts.get(cid)) and now - hit[0] < ACCOUNT_TTL}
+    missing = wanted - hits.keys()
+    if missing:
+        for cat in ExpenseCategory.objects.filter(pk__in=missing).select_related("default_expense_account"):
+            acct = cat.default_expense_account
+            if acct is None:
+                acct = ensure_category_expense_account(cat.name)
+                ExpenseCategory.objects.filter(pk=cat.pk).update(default_expense_account=acct)
+            hits[cat.pk] = acct
+        with _lock:
+            _category_accounts.update({cid: (now, hits[cid]) for cid in missing if cid in hits})
+    return hits
+
+
+def _forget_category(sender, instance, **kwargs):
+    with _lock:
+        _category_accounts.pop(instance.pk, None)
+
+
+post_save.connect(_forget_category, sender=ExpenseCategory, dispatch_uid="expense-category-account-save")
+post_delete.connect(_forget_category, sender=ExpenseCategory, dispatch_uid="expense-category-account-delete")
+
+
+@dataclass
+class ExpensePosting:
+    posted: list = field(default_factory=list)     # {"expense", "status", "txn"}
+    skipped: list = field(default_factory=list)    # {"expense", "status", "detail"}
+    errors: list = field(default_factory=list)     # {"expense", "status", "detail"}
+
+    def as_dict(self):
+        return {
+            "posted": len(self.posted), "skipped": len(self.skipped), "errors": len(self.errors),
+            "results": self.posted + self.skipped + self.errors,
+        }
+
+
+@transaction.atomic
+def post_expenses(expenses):
+    """Post DRAFT expenses (queryset, instances or ids). Returns an ExpensePosting."""
+    ids = expenses.values("pk") if isinstance(expenses, QuerySet) else [getattr(e, "pk", e) for e in expenses]
+    rows = list(Expense.objects.select_for_update(of=("self",)).filter(pk__in=ids)
+                .select_related("category", "payment_account").order_by("date", "id"))
+    report = ExpensePosting()
+    accounts = category_accounts({e.category_id for e in rows if e.status == "DRAFT"})
+
+    todo = []
+    for e in rows:
+        acct = accounts.get(e.category_id)
+        if e.status != "DRAFT" or e.posted_txn_id:
+            report.skipped.append({"expense": e.pk, "status": "skipped", "detail": f"Status is {e.status}."})
+        elif Decimal(e.amount or 0) <= 0:
+            report.errors.append({"expense": e.pk, "status": "error", "detail": "Amount must be > 0 to post."})
+        elif acct is None:
+            report.errors.append({"expense": e.pk, "status": "error",
+                                  "detail": "No expense account available (category default missing)."})
+        else:
+            todo.append((e, acct))
+    if not todo:
+        return report
+
+    txns = post_txns_bulk(
+        (e.date, e.description or f"Expense #{e.pk}",
+         [(acct, Money(e.amount, e.currency), None, ""), (e.payment_account, None, Money(e.amount, e.currency), "")])
+        for e, acct in todo
+    )
+    for (e, _), txn in zip(todo, txns):
+        e.posted_txn, e.status = txn, "POSTED"
+        report.posted.append({"expense": e.pk, "status": "posted", "txn": txn.pk})
+    Expense.objects.bulk_update([e for e, _ in todo], ["posted_txn", "status"], batch_size=500)
+    return report
+
+
+# ---------- recurring ----------
+
+def _add_months(d, months, anchor_day):
+    m = d.month - 1 + months
+    year, month = d.year + m // 12, m % 12 + 1
+    return d.replace(year=year, month=month, day=min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def next_date(d, frequency, interval, anchor_day):
+    interval = max(interval or 1, 1)
+    if frequency == "DAILY":
+        return d + timedelta(days=interval)
+    if frequency == "WEEKLY":
+        return d + timedelta(weeks=interval)
+    months = {"MONTHLY": 1, "QUARTERLY": 3, "YEARLY": 12}[frequency] * interval
+    return _add_months(d, months, anchor_day)
+
+
+@dataclass
+class RecurringRun:
+    definitions: int = 0
+    created: int = 0
+    posting: ExpensePosting = None
+
+    def as_dict(self):
+        return {
+            "definitions": self.definitions, "created": self.created,
+            "posting": self.posting.as_dict() if self.posting else None,
+        }
+
+
+@transaction.atomic
+def run_recurring(today=None, *, post=True):
+    """Materialize every due occurrence up to `today` and post the auto_post ones."""
+    today = today or timezone.localdate()
+    due = list(RecurringExpense.objects.select_for_update(skip_locked=True)
+               .filter(active=True, next_run__lte=today).order_by("id"))
+    run = RecurringRun(definitions=len(due))
+    if not due:
+        return run
+
+    planned = []
+    for rec in due:
+        d, n = rec.next_run, 0
+        while d <= today and (rec.end_date is None or d <= rec.end_date) and n < MAX_CATCH_UP:
+            planned.append((rec, d))
+            d, n = next_date(d, rec.frequency, rec.interval, rec.start_date.day), n + 1
+        rec.next_run = d
+        rec.active = rec.end_date is None or d <= rec.end_date
+        rec.last_run_at = timezone.now()
+
+    dates = {d for _, d in planned}
+    existing = set(Expense.objects.filter(recurring__in=due, date__in=dates).values_list("recurring_id", "date"))
+    new = [
+        Expense(date=d, category_id=rec.category_id, amount=rec.amount, currency=rec.currency,
+                payment_account_id=rec.payment_account_id, recurring=rec,
+                description=rec.description or f"{rec.name} - {d:%d %b %Y}")
+        for rec, d in planned if (rec.pk, d) not in existing
+    ]
+    Expense.objects.bulk_create(new, batch_size=500)
+    RecurringExpense.objects.bulk_update(due, ["next_run", "active", "last_run_at"])
+    run.created = len(new)
+
+    auto = {rec.pk for rec in due if rec.auto_post}
+    to_post = [e for e in new if e.recurring_id in auto]
+    if post and to_post:
+        run.posting = post_expenses(to_post)
+    return run
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import ExpenseCategory, Expense
+from .models import ExpenseCategory, Expense, RecurringExpense
 
 
 class ExpenseCategorySerializer(serializers.ModelSerializer):
@@ -16,3 +16,19 @@ class ExpenseSerializer(serializers.ModelSerializer):
 
         fields = "__all__"
 
+
+class RecurringExpenseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecurringExpense
+        fields = "__all__"
+        read_only_fields = ["last_run_at"]
+
+    def validate(self, data):
+        amount = data.get("amount", getattr(self.instance, "amount", None))
+        start = data.get("start_date", getattr(self.instance, "start_date", None))
+        end = data.get("end_date", getattr(self.instance, "end_date", None))
+        if amount is not None and amount <= 0:
+            raise serializers.ValidationError({"amount": "Amount must be > 0."})
+        if start and end and end < start:
+            raise serializers.ValidationError({"end_date": "End date must be on or after the start date."})
+        return data
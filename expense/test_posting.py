@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.test import TestCase
+
+from finance.test_utils import assert_ledger_entries, hordak_chart
+
+from .models import Expense, ExpenseCategory, RecurringExpense
+from .posting import next_date, post_expenses, run_recurring
+
+
+class RecurringScheduleTests(TestCase):
+    def test_next_date_clamps_to_month_end_and_keeps_anchor(self):
+        d = next_date(date(2024, 1, 31), "MONTHLY", 1, 31)
+        self.assertEqual(d, date(2024, 2, 29))
+        self.assertEqual(next_date(d, "MONTHLY", 1, 31), date(2024, 3, 31))
+        self.assertEqual(next_date(date(2024, 1, 15), "QUARTERLY", 1, 15), date(2024, 4, 15))
+        self.assertEqual(next_date(date(2024, 1, 1), "WEEKLY", 2, 1), date(2024, 1, 15))
+
+
+class ExpensePostingTests(TestCase):
+    def setUp(self):
+        self.chart = hordak_chart()
+        self.rent = ExpenseCategory.objects.create(name="Rent", default_expense_account=self.chart["salaries"])
+
+    def test_catch_up_creates_each_occurrence_once_and_posts_it(self):
+        RecurringExpense.objects.create(name="Shop rent", category=self.rent, amount=500,
+                                        payment_account=self.chart["cash"], start_date=date(2024, 1, 31))
+        run = run_recurring(date(2024, 3, 31))
+        self.assertEqual((run.definitions, run.created, len(run.posting.posted)), (1, 3, 3))
+        self.assertEqual(list(Expense.objects.order_by("date").values_list("date", flat=True)),
+                         [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)])
+        for e in Expense.objects.all():
+            self.assertEqual(e.status, "POSTED")
+            assert_ledger_entries(self, e.posted_txn, [(self.chart["salaries"], 500, 0), (self.chart["cash"], 0, 500)])
+
+        self.assertEqual(run_recurring(date(2024, 3, 31)).created, 0)
+
+    def test_bulk_post_reports_each_expense(self):
+        ok = Expense.objects.create(date=date(2024, 5, 1), category=self.rent, amount=100,
+                                    payment_account=self.chart["cash"])
+        zero = Expense.objects.create(date=date(2024, 5, 1), category=self.rent, amount=0,
+                                      payment_account=self.chart["cash"])
+        report = post_expenses([ok, zero])
+        self.assertEqual(report.as_dict()["posted"], 1)
+        self.assertEqual(report.errors[0]["expense"], zero.pk)
+        self.assertEqual(post_expenses([ok]).as_dict()["skipped"], 1)
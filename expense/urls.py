@@ -1,8 +1,9 @@
 from rest_framework.routers import DefaultRouter
-from .views import ExpenseCategoryViewSet, ExpenseViewSet
+from .views import ExpenseCategoryViewSet, ExpenseViewSet, RecurringExpenseViewSet
 
 router = DefaultRouter()
 router.register(r'categories', ExpenseCategoryViewSet)
 router.register(r'expenses', ExpenseViewSet)
+router.register(r'recurring', RecurringExpenseViewSet)
 
 urlpatterns = router.urls
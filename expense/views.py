@@ -1,7 +1,9 @@
-from rest_framework import viewsets
-from rest_framework import viewsets
-from .models import ExpenseCategory, Expense
-from .serializers import ExpenseCategorySerializer, ExpenseSerializer
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .models import ExpenseCategory, Expense, RecurringExpense
+from .posting import post_expenses, run_recurring
+from .serializers import ExpenseCategorySerializer, ExpenseSerializer, RecurringExpenseSerializer
 
 
 class ExpenseCategoryViewSet(viewsets.ModelViewSet):
@@ -12,3 +14,22 @@ class ExpenseCategoryViewSet(viewsets.ModelViewSet):
 class ExpenseViewSet(viewsets.ModelViewSet):
     queryset = Expense.objects.all()
     serializer_class = ExpenseSerializer
+
+    @action(detail=False, methods=["post"], url_path="post-bulk")
+    def post_bulk(self, request):
+        """{"ids": [..]} -> post the DRAFT ones to the ledger in one batch."""
+        ids = request.data.get("ids") or []
+        if not ids:
+            return Response({"detail": "ids is required."}, status=400)
+        return Response(post_expenses(ids).as_dict())
+
+
+class RecurringExpenseViewSet(viewsets.ModelViewSet):
+    queryset = RecurringExpense.objects.select_related("category", "payment_account")
+    serializer_class = RecurringExpenseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @action(detail=False, methods=["post"], url_path="run-due")
+    def run_due(self, request):
+        """Create (and post) every occurrence due up to today, like `run_recurring_expenses`."""
+        return Response(run_recurring().as_dict())
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from .models import FinancialYear, PaymentTerm, PaymentSchedule
 from .models_receipts import CustomerReceipt, CustomerReceiptAllocation
+from .models_payments import SupplierPayment, SupplierPaymentAllocation
+from .models_bank import BankStatement, BankStatementLine
 from django.shortcuts import redirect
 from django.urls import path, reverse
 
@@ -37,6 +39,13 @@ class CustomerReceiptAdmin(admin.ModelAdmin):
     search_fields = ("number", "customer__name")
     inlines = [CustomerReceiptAllocationInline]
     readonly_fields = ("hordak_txn", "unallocated_amount")
+    actions = ["auto_allocate_fifo"]
+
+    @admin.action(description="Auto-allocate (oldest invoices first)")
+    def auto_allocate_fifo(self, request, queryset):
+        for rcpt in queryset.filter(hordak_txn__isnull=False, unallocated_amount__gt=0):
+            plan = rcpt.auto_allocate()
+            self.message_user(request, f"{rcpt.number}: allocated to {len(plan)} invoice(s).")
 
     def save_model(self, request, obj, form, change):
         if not obj.number:
@@ -46,6 +55,69 @@ class CustomerReceiptAdmin(admin.ModelAdmin):
         obj.post()
 
 
+class SupplierPaymentAllocationInline(admin.TabularInline):
+    model = SupplierPaymentAllocation
+    extra = 0
+    readonly_fields = ("invoice", "amount", "created_at")
+
+@admin.register(SupplierPayment)
+class SupplierPaymentAdmin(admin.ModelAdmin):
+    list_display = ("number", "date", "supplier", "warehouse", "amount", "unallocated_amount", "status")
+    list_filter  = ("status", "date", "warehouse")
+    search_fields = ("number", "supplier__name")
+    inlines = [SupplierPaymentAllocationInline]
+    readonly_fields = ("hordak_txn", "reversal_txn", "unallocated_amount", "status")
+    actions = ["auto_allocate_fifo", "cancel_payments"]
+
+    def save_model(self, request, obj, form, change):
+        if not obj.number:
+            obj.number = obj._next_number()
+        super().save_model(request, obj, form, change)
+        obj.post()
+
+    @admin.action(description="Auto-allocate (oldest invoices first)")
+    def auto_allocate_fifo(self, request, queryset):
+        for pay in queryset.filter(status="POSTED"):
+            plan = pay.auto_allocate()
+            self.message_user(request, f"{pay.number}: allocated to {len(plan)} invoice(s).")
+
+    @admin.action(description="Cancel (reverse) selected payments")
+    def cancel_payments(self, request, queryset):
+        for pay in queryset.exclude(status="CANCELLED"):
+            pay.cancel(reason="admin action")
+        self.message_user(request, "Selected payments cancelled.")
+
+
+class BankStatementLineInline(admin.TabularInline):
+    model = BankStatementLine
+    extra = 0
+    fields = ("line_no", "date", "amount", "reference", "description", "status", "matched_leg", "match_rule")
+    readonly_fields = fields
+    can_delete = False
+    show_change_link = True
+
+@admin.register(BankStatement)
+class BankStatementAdmin(admin.ModelAdmin):
+    list_display = ("id", "filename", "source", "account", "warehouse", "period_start", "period_end", "created_at")
+    list_filter  = ("source", "warehouse")
+    inlines = [BankStatementLineInline]
+    actions = ["rerun_reconcile"]
+
+    @admin.action(description="Re-run reconciliation")
+    def rerun_reconcile(self, request, queryset):
+        from .bank_reconcile import reconcile
+        for stmt in queryset:
+            r = reconcile(stmt)
+            self.message_user(request, f"{stmt}: {r.cleared} cleared, {r.candidates} to review, {r.unmatched} unmatched.")
+
+@admin.register(BankStatementLine)
+class BankStatementLineAdmin(admin.ModelAdmin):
+    list_display = ("statement", "line_no", "date", "amount", "reference", "status", "matched_leg", "match_rule")
+    list_filter  = ("status", "match_rule")
+    search_fields = ("reference", "description", "fitid")
+    raw_id_fields = ("matched_leg",)
+
+
 
 
 from .models_tools import OpeningBalanceTool  # import the dummy model
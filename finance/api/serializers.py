@@ -2,7 +2,10 @@
 from rest_framework import serializers
 from decimal import Decimal
 from finance.models_receipts import CustomerReceipt, CustomerReceiptAllocation
+from finance.models_payments import SupplierPayment
+from finance.models_bank import BankStatement, BankStatementLine
 from sale.models import SaleInvoice
+from purchase.models import PurchaseInvoice
 from inventory.models import Party
 from setting.models import Warehouse
 from django.db import transaction
@@ -19,14 +22,17 @@ class ReceiptAllocationWriteSerializer(serializers.Serializer):
 
 class CustomerReceiptWriteSerializer(serializers.ModelSerializer):
     allocations = ReceiptAllocationWriteSerializer(many=True, required=False)
+    auto_allocate = serializers.BooleanField(required=False, default=False, write_only=True)
 
     class Meta:
         model = CustomerReceipt
-        fields = ("id", "number", "date", "customer", "warehouse", "amount", "description", "allocations")
+        fields = ("id", "number", "date", "customer", "warehouse", "amount", "description", "allocations",
+                  "auto_allocate")
         read_only_fields = ("number",)
 
     def create(self, validated):
         allocs = validated.pop("allocations", [])
+        auto = validated.pop("auto_allocate", False)
         rcpt = CustomerReceipt.objects.create(**validated)
         rcpt.post()  # post once
 
@@ -34,6 +40,8 @@ class CustomerReceiptWriteSerializer(serializers.ModelSerializer):
         for row in allocs:
             inv = SaleInvoice.objects.select_related("customer").get(pk=row["invoice"])
             rcpt.allocate(inv, Decimal(row["amount"]))
+        if auto:
+            rcpt.auto_allocate()  # whatever is left, oldest invoices first
         return rcpt
 
 class CustomerReceiptReadSerializer(serializers.ModelSerializer):
@@ -73,3 +81,74 @@ class CustomerReceiptCreateSerializer(serializers.Serializer):
         # immediately post to ledger and set full unallocated
         receipt.post()
         return {"receipt_id": receipt.id, "number": receipt.number, "unallocated": str(receipt.unallocated_amount)}
+
+
+class PaymentAllocationWriteSerializer(serializers.Serializer):
+    invoice = serializers.PrimaryKeyRelatedField(queryset=PurchaseInvoice.objects.all())
+    amount  = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class SupplierPaymentWriteSerializer(serializers.ModelSerializer):
+    allocations = PaymentAllocationWriteSerializer(many=True, required=False)
+    auto_allocate = serializers.BooleanField(required=False, default=False, write_only=True)
+
+    class Meta:
+        model = SupplierPayment
+        fields = ("id", "number", "date", "supplier", "warehouse", "amount", "description",
+                  "allocations", "auto_allocate")
+        read_only_fields = ("number",)
+
+    @transaction.atomic
+    def create(self, validated):
+        allocs = validated.pop("allocations", [])
+        auto = validated.pop("auto_allocate", False)
+        payment = SupplierPayment.objects.create(**validated)
+        payment.post()  # one posting for the whole amount
+
+        for row in allocs:
+            payment.allocate(row["invoice"], Decimal(row["amount"]))
+        if auto:
+            payment.auto_allocate()
+        return payment
+
+
+class SupplierPaymentReadSerializer(serializers.ModelSerializer):
+    allocations = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SupplierPayment
+        fields = ("id", "number", "date", "supplier", "warehouse", "amount", "unallocated_amount",
+                  "status", "description", "hordak_txn", "reversal_txn", "allocations")
+
+    def get_allocations(self, obj):
+        return [
+            {"invoice": a.invoice_id, "invoice_no": a.invoice.invoice_no, "amount": str(a.amount)}
+            for a in obj.allocations.select_related("invoice")
+        ]
+
+
+class BankStatementUploadSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    warehouse = serializers.PrimaryKeyRelatedField(queryset=Warehouse.objects.all(), required=False)
+    account = serializers.IntegerField(required=False, help_text="Hordak account id; defaults to the warehouse bank.")
+    window_days = serializers.IntegerField(required=False, default=3, min_value=0, max_value=15)
+
+    def validate(self, attrs):
+        if not attrs.get("account") and not attrs.get("warehouse"):
+            raise serializers.ValidationError("Give a warehouse (its default bank account) or an account.")
+        return attrs
+
+
+class BankStatementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BankStatement
+        fields = ("id", "account", "warehouse", "source", "filename", "period_start", "period_end",
+                  "window_days", "created_at")
+
+
+class BankStatementLineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BankStatementLine
+        fields = ("id", "line_no", "date", "amount", "reference", "description", "fitid", "status",
+                  "matched_leg", "match_rule", "candidates", "cleared_at")
+
@@ -6,15 +6,23 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser
+from hordak.models import Account
 
 from inventory.models import Party
 from finance.hordak_posting import post_ar_opening
 from finance.models_receipts import CustomerReceipt
+from finance.models_payments import SupplierPayment
+from finance.models_bank import BankStatement, BankStatementLine
+from finance.bank_reconcile import import_statement, reconcile, clear_line, unclear_line
+from django.core.exceptions import ValidationError as DjangoValidationError
 from sale.models import SaleInvoice
 from .serializers import (
     OpeningBalanceSerializer,
     CustomerReceiptWriteSerializer, CustomerReceiptReadSerializer,
-    ReceiptAllocationWriteSerializer,CustomerReceiptCreateSerializer
+    ReceiptAllocationWriteSerializer,CustomerReceiptCreateSerializer,
+    SupplierPaymentWriteSerializer, SupplierPaymentReadSerializer,
+    BankStatementUploadSerializer, BankStatementSerializer, BankStatementLineSerializer,
 )
 from rest_framework import generics, permissions
 
@@ -37,7 +45,149 @@ class CustomerReceiptViewSet(viewsets.ModelViewSet):
         rcpt.allocate(inv, Decimal(ser.validated_data["amount"]))
         return Response(CustomerReceiptReadSerializer(rcpt).data, status=200)
 
+    @action(detail=True, methods=["post"], url_path="auto-allocate")
+    def auto_allocate(self, request, pk=None):
+        """{"preview": true} returns the FIFO plan without writing."""
+        rcpt = self.get_object()
+        preview = str(request.data.get("preview", "")).lower() in {"1", "true", "yes"}
+        try:
+            plan = rcpt.auto_allocate(preview=preview)
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=400)
+        return Response({"preview": preview, "allocations": plan,
+                         "receipt": CustomerReceiptReadSerializer(rcpt).data})
+
+
+
+
+class SupplierPaymentViewSet(viewsets.ModelViewSet):
+    """
+    Create posts the payment once (optionally with explicit allocations or auto_allocate=true).
+    POST /{id}/allocate       {"invoice": id, "amount": "..."}
+    POST /{id}/auto-allocate  {"preview": true} -> FIFO plan without writing
+    POST /{id}/cancel         {"reason": "..."}
+    """
+    queryset = SupplierPayment.objects.all().select_related("supplier", "warehouse").prefetch_related("allocations__invoice")
+    permission_classes = [IsAuthenticated]
+    http_method_names = ["get", "post", "head", "options"]
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return SupplierPaymentWriteSerializer
+        return SupplierPaymentReadSerializer
+
+    def create(self, request, *args, **kwargs):
+        ser = self.get_serializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        try:
+            payment = ser.save()
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=400)
+        return Response(SupplierPaymentReadSerializer(payment).data, status=201)
+
+    @action(detail=True, methods=["post"])
+    def allocate(self, request, pk=None):
+        from purchase.models import PurchaseInvoice
+
+        payment = self.get_object()
+        ser = ReceiptAllocationWriteSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        inv = get_object_or_404(PurchaseInvoice, pk=ser.validated_data["invoice"])
+        try:
+            payment.allocate(inv, Decimal(ser.validated_data["amount"]))
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=400)
+        return Response(SupplierPaymentReadSerializer(payment).data)
+
+    @action(detail=True, methods=["post"], url_path="auto-allocate")
+    def auto_allocate(self, request, pk=None):
+        payment = self.get_object()
+        preview = str(request.data.get("preview", "")).lower() in {"1", "true", "yes"}
+        try:
+            plan = payment.auto_allocate(preview=preview)
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=400)
+        return Response({"preview": preview, "allocations": plan,
+                         "payment": SupplierPaymentReadSerializer(payment).data})
 
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        payment = self.get_object()
+        payment.cancel(reason=request.data.get("reason", ""))
+        return Response(SupplierPaymentReadSerializer(payment).data)
+
+
+class BankStatementViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    POST /                    multipart file=<.ofx|.qfx|.csv>, warehouse=id | account=id, window_days=3
+    GET  /{id}/lines          ?status=CANDIDATE
+    POST /{id}/reconcile      re-run matching on open lines (e.g. after posting missing entries)
+    POST /{id}/clear          {"line": id, "leg": id}
+    POST /{id}/unclear        {"line": id}
+    POST /{id}/ignore         {"line": id}
+    """
+    queryset = BankStatement.objects.all().select_related("account", "warehouse")
+    serializer_class = BankStatementSerializer
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        ser = BankStatementUploadSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = ser.validated_data
+        wh = data.get("warehouse")
+        account = (get_object_or_404(Account, pk=data["account"]) if data.get("account")
+                   else wh.default_bank_account)
+        upload = data["file"]
+        try:
+            stmt, report = import_statement(account, upload, upload.name, warehouse=wh,
+                                            window_days=data["window_days"])
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=400)
+        return Response({"statement": BankStatementSerializer(stmt).data, "report": report.as_dict()}, status=201)
+
+    def get_parsers(self):
+        if getattr(self, "action", None) == "create":
+            return [MultiPartParser(), FormParser()]
+        return super().get_parsers()
+
+    def _line(self, request):
+        return get_object_or_404(BankStatementLine, pk=request.data.get("line"), statement=self.get_object())
+
+    @action(detail=True, methods=["get"])
+    def lines(self, request, pk=None):
+        qs = self.get_object().lines.all()
+        if request.query_params.get("status"):
+            qs = qs.filter(status=request.query_params["status"].upper())
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(BankStatementLineSerializer(page, many=True).data)
+        return Response(BankStatementLineSerializer(qs, many=True).data)
+
+    @action(detail=True, methods=["post"], url_path="reconcile")
+    def rerun(self, request, pk=None):
+        return Response(reconcile(self.get_object()).as_dict())
+
+    @action(detail=True, methods=["post"])
+    def clear(self, request, pk=None):
+        line = self._line(request)
+        try:
+            line = clear_line(line, request.data.get("leg"))
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=400)
+        return Response(BankStatementLineSerializer(line).data)
+
+    @action(detail=True, methods=["post"])
+    def unclear(self, request, pk=None):
+        return Response(BankStatementLineSerializer(unclear_line(self._line(request))).data)
+
+    @action(detail=True, methods=["post"])
+    def ignore(self, request, pk=None):
+        line = self._line(request)
+        if line.status == "CLEARED":
+            return Response({"detail": ["Unclear the line first."]}, status=400)
+        line.status = "IGNORED"
+        line.save(update_fields=["status"])
+        return Response(BankStatementLineSerializer(line).data)
 
 
 class CustomerReceiptCreateView(generics.CreateAPIView):
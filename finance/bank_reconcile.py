@@ -0,0 +1,302 @@
+# finance/bank_reconcile.py
+"""
+Bank statement import (OFX via ofxtools, or CSV) and reconciliation against
+the Hordak legs of the bank account.
+
+Matching never compares every line with every leg. The candidate legs for the
+statement period (+/- window) are read ONCE and put in two hash indexes:
+  (amount_cents, date)       -> [leg]
+  (amount_cents, reference)  -> [leg]   reference tokens taken from the txn description
+Each line then probes the indexes: one lookup for its reference, and
+2*window+1 lookups for the date window, so a 10k-line statement is one pass.
+
+Rules:
+  - CLEARED   exactly one unused leg with the same amount and reference in the window,
+              or exactly one with the same amount in the window and it is on the same date.
+  - CANDIDATE other same-amount legs in the window (closest dates first), left for review.
+  - UNMATCHED nothing with that amount in the window.
+Bank side: a deposit (+) is a DR leg on the bank account, a withdrawal (-) a CR leg.
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from hordak.models import Leg
+
+from utils.tabular import iter_rows
+
+from .models_bank import BankStatement, BankStatementLine
+
+Q2 = Decimal("0.01")
+CHUNK = 1000
+MAX_CANDIDATES = 5
+
+HEADER_ALIASES = {
+    "date": {"date", "txndate", "transactiondate", "postingdate", "valuedate", "bookingdate"},
+    "amount": {"amount", "amt", "trnamt"},
+    "debit": {"debit", "withdrawal", "withdrawals", "dr", "paidout", "moneyout"},
+    "credit": {"credit", "deposit", "deposits", "cr", "paidin", "moneyin"},
+    "reference": {"reference", "ref", "refno", "chequeno", "checkno", "cheque", "instrumentno"},
+    "description": {"description", "narration", "details", "particulars", "memo", "name"},
+    "fitid": {"fitid", "transactionid", "txnid", "id"},
+}
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d-%b-%Y", "%d %b %Y", "%Y%m%d")
+REF_TOKEN = re.compile(r"[A-Z0-9][A-Z0-9\-/]{2,}")
+
+
+@dataclass
+class ReconcileReport:
+    statement: int
+    lines: int = 0
+    skipped_duplicates: int = 0
+    cleared: int = 0
+    candidates: int = 0
+    unmatched: int = 0
+    errors: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            "statement": self.statement, "lines": self.lines, "skippedDuplicates": self.skipped_duplicates,
+            "cleared": self.cleared, "candidates": self.candidates, "unmatched": self.unmatched,
+            "errors": self.errors,
+        }
+
+
+# ---------- reading ----------
+
+def _norm_ref(s):
+    return "".join(ch for ch in str(s or "").upper() if ch.isalnum())
+
+
+def _money(v):
+    s = str(v or "").replace(",", "").strip()
+    if not s:
+        return None
+    neg = s.startswith("(") and s.endswith(")")
+    try:
+        d = Decimal(s.strip("()"))
+    except InvalidOperation:
+        raise ValueError(f"amount '{v}' is not a number")
+    return (-d if neg else d).quantize(Q2)
+
+
+def _date(v):
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    s = str(v or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"date '{s}' not understood")
+
+
+def _check_header(columns):
+    if "date" not in columns or not ("amount" in columns or {"debit", "credit"} & columns):
+        raise ValidationError("CSV needs a date column and an amount (or debit/credit) column.")
+
+
+def iter_csv(fileobj):
+    """Yield (row_number, {date, amount, reference, description, fitid}) or (row_number, ValueError)."""
+    for n, rec in iter_rows(fileobj, "statement.csv", HEADER_ALIASES, check_header=_check_header):
+        try:
+            amount = _money(rec.get("amount"))
+            if amount is None:
+                amount = (_money(rec.get("credit")) or Decimal("0")) - (_money(rec.get("debit")) or Decimal("0"))
+            yield n, {
+                "date": _date(rec.get("date")),
+                "amount": amount,
+                "reference": rec.get("reference", "")[:64],
+                "description": rec.get("description", "")[:255],
+                "fitid": rec.get("fitid", "")[:64],
+            }
+        except ValueError as e:
+            yield n, e
+
+
+def iter_ofx(fileobj):
+    """Yield (n, {...}) for every STMTTRN of every statement in the OFX file."""
+    from ofxtools.Parser import OFXTree
+
+    parser = OFXTree()
+    try:
+        parser.parse(fileobj)
+        ofx = parser.convert()
+    except Exception as e:  # ofxtools raises several unrelated types for bad input
+        raise ValidationError(f"Could not read OFX file: {e}")
+    n = 0
+    for stmt in ofx.statements:
+        for tx in stmt.transactions:
+            n += 1
+            yield n, {
+                "date": _date(tx.dtposted),
+                "amount": Decimal(tx.trnamt).quantize(Q2),
+                "reference": str(tx.checknum or tx.refnum or "")[:64],
+                "description": " ".join(filter(None, [tx.name, tx.memo]))[:255],
+                "fitid": str(tx.fitid or "")[:64],
+            }
+
+
+# ---------- import ----------
+
+def import_statement(account, fileobj, filename, *, warehouse=None, window_days=3):
+    """
+    Store the statement lines (in chunks) and reconcile them.
+    Lines whose FITID was already imported for this account are skipped.
+    """
+    is_ofx = str(filename).lower().endswith((".ofx", ".qfx"))
+    rows = iter_ofx(fileobj) if is_ofx else iter_csv(fileobj)
+
+    with transaction.atomic():
+        stmt = BankStatement.objects.create(account=account, warehouse=warehouse, filename=str(filename)[:255],
+                                            source="OFX" if is_ofx else "CSV", window_days=window_days)
+        report = ReconcileReport(statement=stmt.pk)
+        lo = hi = None
+        chunk = []
+
+        def flush():
+            fitids = {ln.fitid for ln in chunk if ln.fitid}
+            seen = set(BankStatementLine.objects.filter(account=account, fitid__in=fitids)
+                       .values_list("fitid", flat=True)) if fitids else set()
+            fresh = [ln for ln in chunk if not (ln.fitid and ln.fitid in seen)]
+            report.skipped_duplicates += len(chunk) - len(fresh)
+            BankStatementLine.objects.bulk_create(fresh)
+            chunk.clear()
+
+        for n, rec in rows:
+            if isinstance(rec, Exception):
+                report.errors.append({"row": n, "errors": [str(rec)]})
+                continue
+            report.lines += 1
+            lo = min(lo, rec["date"]) if lo else rec["date"]
+            hi = max(hi, rec["date"]) if hi else rec["date"]
+            chunk.append(BankStatementLine(statement=stmt, account=account, line_no=n, **rec))
+            if len(chunk) >= CHUNK:
+                flush()
+        flush()
+
+        stmt.period_start, stmt.period_end = lo, hi
+        stmt.save(update_fields=["period_start", "period_end"])
+        reconcile(stmt, report=report)
+    return stmt, report
+
+
+# ---------- matching ----------
+
+def _leg_amount(debit, credit):
+    """Signed from the bank's point of view: DR = money in."""
+    return Decimal(getattr(debit, "amount", debit) or 0) - Decimal(getattr(credit, "amount", credit) or 0)
+
+
+def _cents(amount):
+    return int(Decimal(amount).quantize(Q2) * 100)
+
+
+def build_leg_index(account, start, end):
+    """
+    Read the unreconciled legs of `account` dated start..end ONCE and index them.
+    Returns (legs, by_date, by_ref) where legs = {id: (date, amount, description)}.
+    """
+    legs, by_date, by_ref = {}, defaultdict(list), defaultdict(list)
+    qs = (Leg.objects.filter(account=account, transaction__date__range=(start, end),
+                             bank_statement_line__isnull=True)
+          .values_list("id", "debit", "credit", "transaction__date", "transaction__description")
+          .order_by("transaction__date", "id"))
+    for leg_id, debit, credit, d, desc in qs.iterator(chunk_size=2000):
+        cents = _cents(_leg_amount(debit, credit))
+        legs[leg_id] = (d, cents, desc or "")
+        by_date[(cents, d)].append(leg_id)
+        for tok in {_norm_ref(t) for t in REF_TOKEN.findall((desc or "").upper())}:
+            if any(ch.isdigit() for ch in tok):
+                by_ref[(cents, tok)].append(leg_id)
+    return legs, by_date, by_ref
+
+
+@transaction.atomic
+def reconcile(statement, *, report=None):
+    """(Re)match the statement's UNMATCHED / CANDIDATE lines. Cleared lines are left alone."""
+    report = report or ReconcileReport(statement=statement.pk)
+    lines = list(statement.lines.select_for_update().filter(status__in=("UNMATCHED", "CANDIDATE"))
+                 .order_by("date", "line_no"))
+    if not lines:
+        return report
+    window = timedelta(days=statement.window_days)
+    start = min(ln.date for ln in lines) - window
+    end = max(ln.date for ln in lines) + window
+    legs, by_date, by_ref = build_leg_index(statement.account_id, start, end)
+    used = set()
+    now = timezone.now()
+
+    def in_window(leg_ids, ln):
+        return [i for i in leg_ids if i not in used and abs((legs[i][0] - ln.date).days) <= statement.window_days]
+
+    def clear(ln, leg_id, rule):
+        used.add(leg_id)
+        ln.status, ln.matched_leg_id, ln.match_rule, ln.candidates, ln.cleared_at = "CLEARED", leg_id, rule, [], now
+
+    # references first, so a date-only match can't take a leg that a reference points at
+    pending = []
+    for ln in lines:
+        ref = _norm_ref(ln.reference)
+        hits = in_window(by_ref.get((_cents(ln.amount), ref), ()), ln) if ref else []
+        if len(hits) == 1:
+            clear(ln, hits[0], "reference")
+        else:
+            pending.append(ln)
+
+    for ln in pending:
+        cents = _cents(ln.amount)
+        days = range(-statement.window_days, statement.window_days + 1)
+        near = in_window([i for k in days for i in by_date.get((cents, ln.date + timedelta(days=k)), ())], ln)
+        near.sort(key=lambda i: (abs((legs[i][0] - ln.date).days), i))
+        if len(near) == 1 and legs[near[0]][0] == ln.date:
+            clear(ln, near[0], "amount_date")
+        elif near:
+            ln.status, ln.matched_leg_id, ln.match_rule = "CANDIDATE", None, ""
+            ln.candidates = [{"leg": i, "date": legs[i][0].isoformat(), "description": legs[i][2][:80]}
+                             for i in near[:MAX_CANDIDATES]]
+        else:
+            ln.status, ln.matched_leg_id, ln.match_rule, ln.candidates = "UNMATCHED", None, "", []
+
+    BankStatementLine.objects.bulk_update(
+        lines, ["status", "matched_leg", "match_rule", "candidates", "cleared_at"], batch_size=CHUNK)
+    for ln in lines:
+        report.cleared += ln.status == "CLEARED"
+        report.candidates += ln.status == "CANDIDATE"
+        report.unmatched += ln.status == "UNMATCHED"
+    return report
+
+
+@transaction.atomic
+def clear_line(line, leg_id):
+    """Manually clear a line against one leg (usually one of its candidates)."""
+    line = BankStatementLine.objects.select_for_update().get(pk=line.pk)
+    if line.status == "CLEARED":
+        raise ValidationError("Line is already cleared.")
+    leg = Leg.objects.filter(pk=leg_id, account_id=line.account_id).values_list("debit", "credit").first()
+    if leg is None:
+        raise ValidationError("Leg not found on this bank account.")
+    if BankStatementLine.objects.filter(matched_leg_id=leg_id).exists():
+        raise ValidationError("Leg is already cleared against another statement line.")
+    if _leg_amount(*leg) != line.amount:
+        raise ValidationError(f"Leg amount {_leg_amount(*leg)} does not match line amount {line.amount}.")
+    line.status, line.matched_leg_id, line.match_rule = "CLEARED", leg_id, "manual"
+    line.candidates, line.cleared_at = [], timezone.now()
+    line.save(update_fields=["status", "matched_leg", "match_rule", "candidates", "cleared_at"])
+    return line
+
+
+@transaction.atomic
+def unclear_line(line):
+    line = BankStatementLine.objects.select_for_update().get(pk=line.pk)
+    line.status, line.matched_leg_id, line.match_rule, line.cleared_at = "UNMATCHED", None, "", None
+    line.save(update_fields=["status", "matched_leg", "match_rule", "cleared_at"])
+    return line
@@ -521,4 +521,55 @@ def post_payroll_payment_txn(
     with hordak_tx(description=description or "Payroll payment", posted_at=date or timezone.now()) as txn:
         Leg.objects.create(transaction=txn, account=payable_account, debit=money_debit)
         Leg.objects.create(transaction=txn, account=cash_bank_account, credit=money_credit)
-        return txn
\ No newline at end of file
+        return txn
+
+def _leg_money(value, account):
+    return value if isinstance(value, Money) else as_money(value, account)
+
+
+@transaction.atomic
+def post_txns_bulk(entries):
+    """
+    Many balanced Transactions with one INSERT for the transactions and one
+    for all their legs.
+    entries: iterable of (date, description, legs); legs as in post_journal_txn
+    (amounts may be Decimal or Money). Returns the Transactions in entry order.
+    """
+    txns, legs = [], []
+    for date, description, entry_legs in entries:
+        total_dr = total_cr = Decimal("0")
+        rows = []
+        for account, debit, credit, leg_desc in entry_legs:
+            if debit:
+                money = _leg_money(debit, account)
+                rows.append(Leg(account=account, debit=money, description=leg_desc or ""))
+                total_dr += money.amount
+            elif credit:
+                money = _leg_money(credit, account)
+                rows.append(Leg(account=account, credit=money, description=leg_desc or ""))
+                total_cr += money.amount
+        if not rows:
+            raise ValueError(f"Journal '{description}' has no legs")
+        if total_dr != total_cr:
+            raise ValueError(f"Unbalanced journal '{description}': DR {total_dr} != CR {total_cr}")
+        txns.append(Transaction(description=description, date=date or timezone.now().date()))
+        legs.append(rows)
+    Transaction.objects.bulk_create(txns, batch_size=1000)
+    for txn, rows in zip(txns, legs):
+        for leg in rows:
+            leg.transaction = txn
+    Leg.objects.bulk_create([leg for rows in legs for leg in rows], batch_size=1000)
+    return txns
+
+
+def post_journal_txn(*, date, description: str, legs) -> Transaction:
+    """
+    One Transaction with many legs, written with a single bulk INSERT.
+    legs: iterable of (account, debit, credit, leg_description); exactly one of
+    debit/credit is set per leg. Debits must equal credits (Hordak checks the
+    balance at commit).
+    """
+    legs = [leg for leg in legs if leg[1] or leg[2]]
+    if not legs:
+        return None
+    return post_txns_bulk([(date, description, legs)])[0]
@@ -0,0 +1,33 @@
+# management/commands/import_bank_statement.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from hordak.models import Account
+
+from finance.bank_reconcile import import_statement
+from setting.models import Warehouse
+
+
+class Command(BaseCommand):
+    help = "Import an OFX/CSV bank statement and reconcile it against the bank account's Hordak legs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the .ofx/.qfx or .csv statement")
+        parser.add_argument("--warehouse", type=int, help="Warehouse id (uses its default bank account)")
+        parser.add_argument("--account", type=int, help="Hordak account id (overrides --warehouse)")
+        parser.add_argument("--window", type=int, default=3, help="Date tolerance in days (default 3)")
+
+    def handle(self, *args, **opts):
+        wh = Warehouse.objects.filter(pk=opts["warehouse"]).first() if opts["warehouse"] else None
+        if opts["account"]:
+            account = Account.objects.filter(pk=opts["account"]).first()
+        else:
+            account = wh.default_bank_account if wh else None
+        if not account:
+            raise CommandError("Give --account or a valid --warehouse")
+        with open(opts["path"], "rb") as fh:
+            stmt, report = import_statement(account, fh, opts["path"], warehouse=wh, window_days=opts["window"])
+        self.stdout.write(json.dumps(report.as_dict(), indent=2, default=str))
+        self.stdout.write(self.style.SUCCESS(
+            f"Statement {stmt.pk}: {report.cleared} cleared, {report.candidates} to review, "
+            f"{report.unmatched} unmatched, {report.skipped_duplicates} duplicate(s) skipped"))
@@ -0,0 +1,58 @@
+# finance/models_bank.py
+from django.db import models
+from hordak.models import Account, Leg
+from setting.models import Warehouse
+
+
+class BankStatement(models.Model):
+    """One imported bank statement (OFX or CSV) for a Hordak bank account."""
+    SOURCES = (("OFX", "OFX"), ("CSV", "CSV"))
+
+    account = models.ForeignKey(Account, on_delete=models.PROTECT, related_name="+")
+    warehouse = models.ForeignKey(Warehouse, null=True, blank=True, on_delete=models.SET_NULL)
+    source = models.CharField(max_length=3, choices=SOURCES)
+    filename = models.CharField(max_length=255, blank=True)
+    period_start = models.DateField(null=True, blank=True)
+    period_end = models.DateField(null=True, blank=True)
+    window_days = models.PositiveSmallIntegerField(default=3, help_text="Date tolerance when matching legs.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.filename or self.source} ({self.period_start} - {self.period_end})"
+
+
+class BankStatementLine(models.Model):
+    STATUS = (
+        ("UNMATCHED", "Unmatched"),
+        ("CANDIDATE", "Needs review"),
+        ("CLEARED", "Cleared"),
+        ("IGNORED", "Ignored"),
+    )
+
+    statement = models.ForeignKey(BankStatement, related_name="lines", on_delete=models.CASCADE)
+    account = models.ForeignKey(Account, on_delete=models.PROTECT, related_name="+")
+    line_no = models.PositiveIntegerField()
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=14, decimal_places=2, help_text="Signed: + deposit, - withdrawal.")
+    reference = models.CharField(max_length=64, blank=True)
+    description = models.CharField(max_length=255, blank=True)
+    fitid = models.CharField(max_length=64, blank=True, help_text="Bank's own transaction id (OFX FITID).")
+    status = models.CharField(max_length=10, choices=STATUS, default="UNMATCHED")
+    matched_leg = models.OneToOneField(Leg, null=True, blank=True, on_delete=models.SET_NULL,
+                                       related_name="bank_statement_line")
+    match_rule = models.CharField(max_length=16, blank=True)
+    candidates = models.JSONField(default=list, blank=True)
+    cleared_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["statement", "line_no"]
+        indexes = [
+            models.Index(fields=["statement", "status"]),
+            models.Index(fields=["account", "fitid"]),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.amount} {self.reference or self.description}"
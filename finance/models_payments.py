@@ -0,0 +1,180 @@
+# finance/models_payments.py
+from decimal import Decimal
+from django.db import models, transaction
+from django.core.exceptions import ValidationError
+from hordak.models import Transaction
+from inventory.models import Party
+from setting.models import Warehouse
+from .hordak_posting import post_supplier_payment, post_supplier_payment_reverse
+
+OPEN_PI_STATUSES = ("CONFIRMED", "PARTIAL", "RECEIVED")
+
+
+class SupplierPayment(models.Model):
+    """
+    Cash/Bank paid to a supplier (mirror of CustomerReceipt).
+    post() books ONE Hordak txn (DR A/P, CR Cash/Bank) for the whole amount;
+    allocate()/auto_allocate() only link portions to purchase invoices.
+    """
+    STATUS = (("DRAFT", "Draft"), ("POSTED", "Posted"), ("CANCELLED", "Cancelled"))
+
+    number = models.CharField(max_length=50, unique=True, blank=True)
+    date   = models.DateField()
+    supplier = models.ForeignKey(Party, on_delete=models.PROTECT, limit_choices_to={"party_type": "supplier"})
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    description = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=12, choices=STATUS, default="DRAFT")
+    hordak_txn  = models.ForeignKey(Transaction, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    reversal_txn = models.ForeignKey(Transaction, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    unallocated_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["supplier", "date"])]
+
+    def __str__(self):
+        return f"{self.number or self.pk} - {self.supplier} ({self.amount})"
+
+    def _next_number(self, prefix="SPAY-"):
+        last = SupplierPayment.objects.filter(number__startswith=prefix).order_by("-id").values_list("number", flat=True).first()
+        if not last: return f"{prefix}1"
+        try: n = int(last.split("-")[-1])
+        except Exception: n = 0
+        return f"{prefix}{n+1}"
+
+    @transaction.atomic
+    def post(self):
+        """Post to Hordak once."""
+        if self.hordak_txn_id:
+            return  # already posted
+        amount = Decimal(self.amount or 0)
+        if amount <= 0:
+            raise ValidationError("Payment amount must be > 0")
+        if not self.supplier.chart_of_account:
+            raise ValidationError("Supplier has no chart of account.")
+        if not self.number:
+            self.number = self._next_number()
+        self.hordak_txn = post_supplier_payment(
+            date=self.date,
+            description=self.description or f"Supplier Payment {self.number} ({self.supplier})",
+            supplier_account=self.supplier.chart_of_account,
+            amount=amount,
+            warehouse=self.warehouse,
+        )
+        self.unallocated_amount = amount
+        self.status = "POSTED"
+        self.save(update_fields=["hordak_txn", "unallocated_amount", "number", "status"])
+
+    def _locked(self):
+        pay = SupplierPayment.objects.select_for_update().get(pk=self.pk)
+        if pay.status != "POSTED":
+            raise ValidationError("Only POSTED payments can be allocated.")
+        return pay
+
+    @staticmethod
+    def _apply_to_invoice(inv, amount):
+        inv.paid_amount = Decimal(inv.paid_amount or 0) + amount
+        inv._recalc_payment_status()
+
+    @transaction.atomic
+    def allocate(self, invoice, amount: Decimal):
+        """Non-posting allocation of part of this payment to one purchase invoice."""
+        from purchase.models import PurchaseInvoice
+
+        pay = self._locked()
+        invoice = PurchaseInvoice.objects.select_for_update().get(pk=invoice.pk)
+        amount = Decimal(amount or 0)
+        if amount <= 0:
+            raise ValidationError("Allocation must be > 0")
+        if amount > Decimal(pay.unallocated_amount or 0):
+            raise ValidationError("Allocation exceeds unallocated amount")
+        if invoice.supplier_id != pay.supplier_id:
+            raise ValidationError("Invoice belongs to a different supplier")
+        if invoice.status not in OPEN_PI_STATUSES:
+            raise ValidationError(f"Invoice {invoice.invoice_no} is not open for payment")
+        if amount > invoice.outstanding:
+            raise ValidationError(f"Allocation {amount} exceeds invoice outstanding {invoice.outstanding}")
+
+        SupplierPaymentAllocation.objects.create(payment=pay, invoice=invoice, amount=amount)
+        self._apply_to_invoice(invoice, amount)
+        invoice.save(update_fields=["paid_amount", "payment_status"])
+        pay.unallocated_amount = Decimal(pay.unallocated_amount) - amount
+        pay.save(update_fields=["unallocated_amount"])
+        self.unallocated_amount = pay.unallocated_amount
+
+    @transaction.atomic
+    def auto_allocate(self, *, preview=False):
+        """
+        FIFO: spread the unallocated amount over the supplier's open invoices,
+        oldest first, in one locked pass. Returns [{invoice, invoice_no, amount}].
+        """
+        from purchase.models import PurchaseInvoice
+
+        pay = self._locked()
+        remaining = Decimal(pay.unallocated_amount or 0)
+        invoices = (
+            PurchaseInvoice.objects.select_for_update()
+            .filter(supplier_id=pay.supplier_id, status__in=OPEN_PI_STATUSES)
+            .exclude(payment_status="PAID")
+            .order_by("date", "id")
+        )
+        allocs, touched = [], []
+        for inv in invoices:
+            if remaining <= 0:
+                break
+            amount = min(inv.outstanding, remaining)
+            if amount <= 0:
+                continue
+            allocs.append(SupplierPaymentAllocation(payment=pay, invoice=inv, amount=amount))
+            self._apply_to_invoice(inv, amount)
+            touched.append(inv)
+            remaining -= amount
+
+        plan = [{"invoice": a.invoice_id, "invoice_no": a.invoice.invoice_no, "amount": str(a.amount)} for a in allocs]
+        if preview or not allocs:
+            return plan
+        SupplierPaymentAllocation.objects.bulk_create(allocs)
+        PurchaseInvoice.objects.bulk_update(touched, ["paid_amount", "payment_status"])
+        pay.unallocated_amount = remaining
+        pay.save(update_fields=["unallocated_amount"])
+        self.unallocated_amount = remaining
+        return plan
+
+    @transaction.atomic
+    def cancel(self, *, reason: str = ""):
+        """
+        Reverse this payment only: one reversing txn (DR Cash/Bank, CR A/P),
+        remove its allocations and give the invoices their outstanding back.
+        """
+        from purchase.models import PurchaseInvoice
+
+        pay = SupplierPayment.objects.select_for_update().get(pk=self.pk)
+        if pay.status == "CANCELLED":
+            return
+        allocs = list(pay.allocations.all())
+        invoices = PurchaseInvoice.objects.select_for_update().in_bulk([a.invoice_id for a in allocs])
+        for a in allocs:
+            self._apply_to_invoice(invoices[a.invoice_id], -Decimal(a.amount))
+        PurchaseInvoice.objects.bulk_update(invoices.values(), ["paid_amount", "payment_status"])
+        pay.allocations.all().delete()
+
+        if pay.hordak_txn_id:
+            pay.reversal_txn = post_supplier_payment_reverse(
+                date=pay.date,
+                description=f"Reverse Supplier Payment {pay.number}" + (f": {reason}" if reason else ""),
+                supplier_account=pay.supplier.chart_of_account,
+                amount=Decimal(pay.amount or 0),
+                warehouse=pay.warehouse,
+            )
+        pay.status = "CANCELLED"
+        pay.unallocated_amount = Decimal("0")
+        pay.save(update_fields=["status", "unallocated_amount", "reversal_txn"])
+        self.status, self.unallocated_amount, self.reversal_txn = pay.status, pay.unallocated_amount, pay.reversal_txn
+
+
+class SupplierPaymentAllocation(models.Model):
+    payment = models.ForeignKey(SupplierPayment, related_name="allocations", on_delete=models.CASCADE)
+    invoice = models.ForeignKey("purchase.PurchaseInvoice", related_name="payment_allocations", on_delete=models.CASCADE)
+    amount  = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
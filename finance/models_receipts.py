@@ -8,6 +8,8 @@ from setting.models import Warehouse
 # from sale.models import SaleInvoice
 from .hordak_posting import post_customer_receipt
 
+OPEN_INVOICE_STATUSES = ("CONFIRMED", "DELIVERED")
+
 class CustomerReceipt(models.Model):
     number = models.CharField(max_length=50, unique=True, blank=True)
     date   = models.DateField()
@@ -94,6 +96,54 @@ class CustomerReceipt(models.Model):
             invoice.payment_status = "UNPAID"
         invoice.save(update_fields=["paid_amount", "payment_status"])
 
+    @transaction.atomic
+    def auto_allocate(self, *, preview=False):
+        """
+        FIFO: spread the unallocated amount over the customer's open invoices
+        (oldest first). One SELECT ... FOR UPDATE for the invoices, allocations
+        bulk_created, invoices bulk_updated. preview=True returns the plan and
+        writes nothing. Returns [{invoice, invoice_no, amount}].
+        """
+        from sale.models import SaleInvoice
+
+        self_locked = CustomerReceipt.objects.select_for_update().get(pk=self.pk)
+        if not self_locked.hordak_txn_id:
+            raise ValidationError("Post the receipt before allocating it")
+        remaining = Decimal(self_locked.unallocated_amount or 0)
+        invoices = (
+            SaleInvoice.objects.select_for_update()
+            .filter(customer_id=self_locked.customer_id, status__in=OPEN_INVOICE_STATUSES)
+            .exclude(payment_status="PAID")
+            .order_by("date", "id")
+        )
+        allocs, touched = [], []
+        for inv in invoices:
+            if remaining <= 0:
+                break
+            amount = min(inv.outstanding, remaining)
+            if amount <= 0:
+                continue
+            allocs.append(CustomerReceiptAllocation(receipt=self_locked, invoice=inv, amount=amount))
+            inv.paid_amount = Decimal(inv.paid_amount or 0) + amount
+            inv._recalc_payment_status()
+            touched.append(inv)
+            remaining -= amount
+
+        plan = [{"invoice": a.invoice_id, "invoice_no": a.invoice.invoice_no, "amount": str(a.amount)} for a in allocs]
+        if preview or not allocs:
+            return plan
+        CustomerReceiptAllocation.objects.bulk_create(allocs)
+        SaleInvoice.objects.bulk_update(touched, ["paid_amount", "payment_status"])
+        self_locked.unallocated_amount = remaining
+        self_locked.save(update_fields=["unallocated_amount"])
+        self.unallocated_amount = remaining
+        return plan
+
+
+def auto_allocate(receipt, *, preview=False):
+    """Functional alias of CustomerReceipt.auto_allocate."""
+    return receipt.auto_allocate(preview=preview)
+
 class CustomerReceiptAllocation(models.Model):
     receipt = models.ForeignKey(CustomerReceipt, related_name="allocations", on_delete=models.CASCADE)
     invoice = models.ForeignKey("sale.SaleInvoice", related_name="receipt_allocations", on_delete=models.CASCADE)
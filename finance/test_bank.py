@@ -0,0 +1,70 @@
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from hordak.models import Leg
+
+from .bank_reconcile import clear_line, import_statement
+from .hordak_posting import as_money, hordak_tx
+from .test_utils import hordak_chart
+
+D = date(2026, 3, 10)
+
+
+class BankReconcileTests(TestCase):
+    def setUp(self):
+        self.chart = hordak_chart()
+        self.bank = self.chart["bank"]
+
+    def bank_leg(self, day, amount, description):
+        """Post `amount` (+ deposit / - withdrawal) to the bank against equity; returns the bank leg."""
+        amount = Decimal(amount)
+        with hordak_tx(description, posted_at=day) as txn:
+            side, other = ("debit", "credit") if amount > 0 else ("credit", "debit")
+            leg = Leg.objects.create(transaction=txn, account=self.bank, **{side: as_money(abs(amount), self.bank)})
+            Leg.objects.create(transaction=txn, account=self.chart["equity"],
+                               **{other: as_money(abs(amount), self.chart["equity"])})
+        return leg
+
+    def statement(self, rows):
+        csv = "date,amount,reference,description,fitid\n" + "\n".join(",".join(map(str, r)) for r in rows)
+        return import_statement(self.bank, io.StringIO(csv), "march.csv")
+
+    def test_rules_and_duplicate_lines(self):
+        by_ref = self.bank_leg(D, 100, "Receipt RCPT-77 (Cust)")
+        same_day = self.bank_leg(D, -50, "Supplier Payment")
+        early = self.bank_leg(D - timedelta(days=1), 30, "Receipt")
+        late = self.bank_leg(D + timedelta(days=1), 30, "Receipt")
+        rows = [
+            (D + timedelta(days=2), "100.00", "RCPT-77", "deposit", "F1"),  # reference beats the date
+            (D, "-50.00", "", "cheque", "F2"),
+            (D, "30.00", "", "cash", "F3"),                                 # two legs, one day apart each
+            (D, "999.00", "", "unknown", "F4"),
+            (D.strftime("%d/%m/%Y"), "x", "", "bad amount", "F5"),
+        ]
+        stmt, report = self.statement(rows)
+        self.assertEqual((report.lines, report.cleared, report.candidates, report.unmatched), (4, 2, 1, 1))
+        self.assertEqual(report.errors[0]["row"], 6)
+
+        lines = {ln.fitid: ln for ln in stmt.lines.all()}
+        self.assertEqual((lines["F1"].matched_leg_id, lines["F1"].match_rule), (by_ref.pk, "reference"))
+        self.assertEqual((lines["F2"].matched_leg_id, lines["F2"].match_rule), (same_day.pk, "amount_date"))
+        self.assertEqual(lines["F3"].status, "CANDIDATE")
+        self.assertEqual({c["leg"] for c in lines["F3"].candidates}, {early.pk, late.pk})
+        self.assertEqual(lines["F4"].status, "UNMATCHED")
+
+        clear_line(lines["F3"], late.pk)
+        lines["F3"].refresh_from_db()
+        self.assertEqual((lines["F3"].status, lines["F3"].match_rule), ("CLEARED", "manual"))
+
+        # the same file again: every FITID is already on this account
+        _, again = self.statement(rows)
+        self.assertEqual((again.skipped_duplicates, again.cleared), (4, 0))
+
+    def test_cleared_leg_is_not_offered_twice(self):
+        leg = self.bank_leg(D, 20, "Receipt")
+        _, first = self.statement([(D, "20.00", "", "cash", "A1")])
+        _, second = self.statement([(D, "20.00", "", "cash", "A2")])
+        self.assertEqual((first.cleared, second.unmatched), (1, 1))
+        self.assertEqual(Leg.objects.get(pk=leg.pk).bank_statement_line.fitid, "A1")
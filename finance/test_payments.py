@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from hordak.models import Transaction
+from rest_framework.test import APITestCase
+
+from purchase.models import PurchaseInvoice
+
+from .models_payments import SupplierPayment
+from .test_utils import assert_ledger_entries, basic_entities
+
+
+def confirmed_invoice(e, invoice_no, total, days_ago=0):
+    inv = PurchaseInvoice.objects.create(
+        invoice_no=invoice_no, date=date.today() - timedelta(days=days_ago),
+        supplier=e["supplier"], warehouse=e["warehouse"], total_amount=total,
+    )
+    inv.confirm()
+    return inv
+
+
+class SupplierPaymentLedgerTests(TestCase):
+    def setUp(self):
+        self.e = basic_entities()
+        self.ap = self.e["supplier"].chart_of_account
+        self.cash = self.e["chart"]["cash"]
+        self.old = confirmed_invoice(self.e, "PINV-A", 100, days_ago=2)
+        self.new = confirmed_invoice(self.e, "PINV-B", 60)
+
+    def payment(self, amount):
+        pay = SupplierPayment.objects.create(date=date.today(), supplier=self.e["supplier"],
+                                             warehouse=self.e["warehouse"], amount=amount)
+        pay.post()
+        return pay
+
+    def test_post_once_and_fifo_allocation(self):
+        pay = self.payment(130)
+        assert_ledger_entries(self, pay.hordak_txn, [(self.ap, 130, 0), (self.cash, 0, 130)])
+        pay.post()  # no second posting
+        self.assertEqual(Transaction.objects.filter(pk=pay.hordak_txn_id).count(), 1)
+
+        plan = pay.auto_allocate()
+        self.assertEqual([(p["invoice_no"], p["amount"]) for p in plan], [("PINV-A", "100.00"), ("PINV-B", "30.00")])
+        self.old.refresh_from_db()
+        self.new.refresh_from_db()
+        self.assertEqual((self.old.payment_status, self.new.payment_status), ("PAID", "PARTIAL"))
+        self.assertEqual(pay.unallocated_amount, 0)
+
+    def test_invoice_cancel_leaves_the_posted_payment_as_open_credit(self):
+        pay = self.old.simple_pay(100)
+        txns = Transaction.objects.count()
+
+        self.old.cancel()
+        self.assertEqual(Transaction.objects.count(), txns + 1)  # only the purchase reversal
+        pay.refresh_from_db()
+        self.assertEqual((pay.status, pay.amount, pay.unallocated_amount), ("POSTED", 100, 100))
+        self.assertIsNone(pay.reversal_txn_id)
+        assert_ledger_entries(self, pay.hordak_txn, [(self.ap, 100, 0), (self.cash, 0, 100)])
+
+        # the freed credit settles the supplier's next invoice
+        pay.auto_allocate()
+        self.new.refresh_from_db()
+        self.assertEqual((self.new.payment_status, pay.unallocated_amount), ("PAID", 40))
+
+    def test_payment_cancel_posts_a_reversal_and_reopens_invoices(self):
+        pay = self.payment(50)
+        pay.allocate(self.old, 50)
+        pay.cancel(reason="bounced")
+        self.old.refresh_from_db()
+        self.assertEqual((self.old.paid_amount, self.old.payment_status), (0, "UNPAID"))
+        self.assertEqual(pay.status, "CANCELLED")
+        assert_ledger_entries(self, pay.reversal_txn, [(self.ap, 0, 50), (self.cash, 50, 0)])
+
+
+class SupplierPaymentAPITests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user("u@example.com", "p"))
+        self.e = basic_entities()
+
+    def test_unknown_invoice_is_a_field_error(self):
+        resp = self.client.post("/finance/supplier-payments/", {
+            "date": date.today(), "supplier": self.e["supplier"].pk, "warehouse": self.e["warehouse"].pk,
+            "amount": "10.00", "allocations": [{"invoice": 999999, "amount": "10.00"}],
+        }, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("allocations", resp.data)
+        self.assertFalse(SupplierPayment.objects.exists())
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from sale.models import SaleInvoice, SaleInvoiceItem
+
+from .models_receipts import CustomerReceipt, CustomerReceiptAllocation
+from .test_utils import assert_ledger_entries, basic_entities
+
+
+class CustomerReceiptAutoAllocateTests(TestCase):
+    def setUp(self):
+        self.e = basic_entities()
+        self.customer = self.e["customer"]
+        self.old = self.invoice("SINV-A", 10, days_ago=3)   # 100
+        self.new = self.invoice("SINV-B", 8)                # 80
+
+    def invoice(self, invoice_no, quantity, days_ago=0):
+        inv = SaleInvoice.objects.create(invoice_no=invoice_no, date=date.today() - timedelta(days=days_ago),
+                                         customer=self.customer, warehouse=self.e["warehouse"])
+        SaleInvoiceItem.objects.create(invoice=inv, product=self.e["product"], quantity=quantity, rate=10,
+                                       amount=quantity * 10)
+        inv.confirm()
+        return inv
+
+    def receipt(self, amount):
+        rcpt = CustomerReceipt.objects.create(date=date.today(), customer=self.customer,
+                                              warehouse=self.e["warehouse"], amount=amount)
+        rcpt.post()
+        return rcpt
+
+    def test_one_posting_then_oldest_invoice_first(self):
+        rcpt = self.receipt(150)
+        assert_ledger_entries(self, rcpt.hordak_txn,
+                              [(self.e["chart"]["cash"], 150, 0), (self.customer.chart_of_account, 0, 150)])
+
+        preview = rcpt.auto_allocate(preview=True)
+        self.assertEqual([(p["invoice_no"], p["amount"]) for p in preview], [("SINV-A", "100.00"), ("SINV-B", "50.00")])
+        self.assertFalse(CustomerReceiptAllocation.objects.exists())
+
+        self.assertEqual(rcpt.auto_allocate(), preview)
+        self.old.refresh_from_db()
+        self.new.refresh_from_db()
+        self.assertEqual((self.old.payment_status, self.new.payment_status), ("PAID", "PARTIAL"))
+        self.assertEqual(self.new.outstanding, 30)
+        rcpt.refresh_from_db()
+        self.assertEqual(rcpt.unallocated_amount, 0)
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.current_balance, 30)
+
+    def test_leftover_stays_unallocated(self):
+        rcpt = self.receipt(200)
+        rcpt.auto_allocate()
+        rcpt.refresh_from_db()
+        self.assertEqual(rcpt.unallocated_amount, 20)
+        self.assertEqual(rcpt.auto_allocate(), [])  # nothing open any more
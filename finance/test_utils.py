@@ -0,0 +1,106 @@
+# finance/test_utils.py
+"""
+Shared test fixtures for the Hordak chart of accounts.
+
+The posting code and the Party signals address accounts by fixed ids
+(finance.hordak_posting: CASH_CODE = 2, AR_CODE = 4, ...), so the test chart
+is created with exactly those ids under one root per account type.
+"""
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection
+from hordak.models import Account, Leg
+
+from inventory.models import Party, Product
+from setting.models import Branch, Company, Distributor, Group, Warehouse
+
+ROOTS = {"AS": 101, "LI": 102, "EQ": 103, "IN": 104, "EX": 105}
+CHART = {
+    # id: (key, name, root type)
+    2: ("cash", "Cash", "AS"),
+    3: ("bank", "Bank", "AS"),
+    4: ("ar", "Accounts Receivable", "AS"),
+    6: ("tax_receivable", "Tax Receivable", "AS"),
+    8: ("ap", "Accounts Payable", "LI"),
+    9: ("tax_payable", "Tax Payable", "LI"),
+    11: ("equity", "Opening Balances", "EQ"),
+    13: ("sales", "Sales", "IN"),
+    15: ("purchases", "Purchases", "EX"),
+    16: ("sales_returns", "Sales Returns", "EX"),
+    17: ("salaries", "Salaries", "EX"),
+    18: ("payable", "Salaries Payable", "LI"),
+}
+
+
+def _next_id(pk):
+    with connection.cursor() as cur:
+        cur.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, false)", [Account._meta.db_table, pk])
+
+
+def hordak_chart():
+    """Create (once per test) the fixed-id chart; returns {key: Account}."""
+    if not Account.objects.filter(pk=2).exists():
+        # Account.save() treats a preset pk as an update, so steer the sequence instead
+        for t, pk in ROOTS.items():
+            _next_id(pk)
+            Account.objects.create(name=t.title(), type=t, code=str(pk))
+        for pk, (_, name, t) in CHART.items():
+            _next_id(pk)
+            Account.objects.create(name=name, parent_id=ROOTS[t], code=str(pk))
+        with connection.cursor() as cur:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Account]):
+                cur.execute(sql)
+    accounts = Account.objects.in_bulk(list(CHART))
+    return {key: accounts[pk] for pk, (key, _, _) in CHART.items()}
+
+
+def make_company(name="Comp"):
+    """Company with the payroll accounts its NOT NULL FKs require."""
+    chart = hordak_chart()
+    return Company.objects.create(
+        name=name, payroll_expense_account=chart["salaries"], payroll_payment_account=chart["cash"],
+    )
+
+
+def make_warehouse(name="W1", branch=None):
+    """Warehouse wired to the chart's sales / purchase / cash / bank accounts."""
+    chart = hordak_chart()
+    return Warehouse.objects.create(
+        name=name, branch=branch or Branch.objects.create(name="Main", address="Addr"),
+        default_sales_account=chart["sales"], default_purchase_account=chart["purchases"],
+        default_cash_account=chart["cash"], default_bank_account=chart["bank"],
+    )
+
+
+def basic_entities():
+    """chart + warehouse + product + customer + supplier, the setup most trade tests start from."""
+    chart = hordak_chart()
+    product = Product.objects.create(
+        name="P1", barcode="123", company=make_company("C1"), group=Group.objects.create(name="G1"),
+        distributor=Distributor.objects.create(name="D1"), trade_price=10, retail_price=12,
+        sales_tax_ratio=0, fed_tax_ratio=0, disable_sale_purchase=False,
+    )
+    # Party signals give each party its own account under A/R or A/P
+    customer = Party.objects.create(name="Cust", address="addr", phone="123", party_type="customer")
+    supplier = Party.objects.create(name="Supp", address="addr", phone="456", party_type="supplier")
+    for party in (customer, supplier):
+        party.refresh_from_db(fields=["chart_of_account"])  # set by the signal with a queryset update
+    return {"chart": chart, "warehouse": make_warehouse(), "product": product,
+            "customer": customer, "supplier": supplier}
+
+
+def ledger_entries(txn):
+    """[(account_id, debit, credit)] of a Hordak transaction, sorted, amounts as Decimal."""
+    rows = []
+    for leg in Leg.objects.filter(transaction=txn):
+        debit = leg.debit.amount if leg.debit is not None else Decimal("0")
+        credit = leg.credit.amount if leg.credit is not None else Decimal("0")
+        rows.append((leg.account_id, debit, credit))
+    return sorted(rows)
+
+
+def assert_ledger_entries(testcase, txn, expected):
+    """`expected` is [(account, debit, credit)]; compares as a multiset."""
+    want = sorted((getattr(a, "pk", a), Decimal(str(d)), Decimal(str(c))) for a, d, c in expected)
+    testcase.assertEqual(ledger_entries(txn), want)
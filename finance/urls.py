@@ -1,7 +1,9 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 from .views import FinancialYearViewSet, PaymentScheduleViewSet
-from finance.api.views import CustomerReceiptViewSet, opening_balance_view
+from finance.api.views import (
+    CustomerReceiptViewSet, SupplierPaymentViewSet, BankStatementViewSet, opening_balance_view,
+)
 from finance.admin_opening_balance import opening_balance_view_admin
 from .api.views import CustomerReceiptCreateView
 
@@ -10,6 +12,8 @@ router = DefaultRouter()
 router.register(r'schedules', PaymentScheduleViewSet)
 router.register(r'financial-years', FinancialYearViewSet)
 router.register(r"receipts", CustomerReceiptViewSet, basename="customer-receipt")
+router.register(r"supplier-payments", SupplierPaymentViewSet, basename="supplier-payment")
+router.register(r"bank-statements", BankStatementViewSet, basename="bank-statement")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -0,0 +1,113 @@
+# hr/achievements.py
+"""
+Per (booking man, month) sales achievement counters.
+
+Incremental deltas come from the sales rollup hooks (report/rollup.py) on
+invoice confirm/cancel and sale-return stock-in/cancel. `recompute()` rebuilds
+months from the invoices themselves (nightly safety net).
+Achievement = net sales (total - discount, before tax) less returned value.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Count, DecimalField, Exists, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value, Window,
+)
+from django.db.models.functions import Coalesce, NullIf, Rank, TruncMonth
+from django.utils import timezone
+
+from .models import Employee, SalesAchievement, SalesTarget
+
+ZERO = Decimal("0")
+COUNTED_STATUSES = ("CONFIRMED", "DELIVERED")
+
+
+def month_start(d):
+    return d.replace(day=1)
+
+
+def apply_deltas(deltas):
+    """deltas = {(employee_id, month_start): (amount, invoice_count)}"""
+    now = timezone.now()
+    for (employee_id, month), (amount, count) in deltas.items():
+        if employee_id is None or not (amount or count):
+            continue
+        incr = dict(achieved_amount=F("achieved_amount") + amount,
+                    invoice_count=F("invoice_count") + count, updated_at=now)
+        rows = SalesAchievement.objects.filter(employee_id=employee_id, month=month)
+        if rows.update(**incr):
+            continue
+        try:
+            with transaction.atomic():
+                SalesAchievement.objects.create(employee_id=employee_id, month=month,
+                                                achieved_amount=amount, invoice_count=count)
+        except IntegrityError:
+            rows.update(**incr)
+
+
+@transaction.atomic
+def recompute(months=None):
+    """
+    Rebuild SalesAchievement from invoices and returns.
+    months: iterable of month-start dates; None = full history.
+    """
+    from sale.models import SaleInvoice, SaleReturnItem
+
+    months = sorted({month_start(m) for m in months}) if months else None
+    invoices = SaleInvoice.objects.filter(status__in=COUNTED_STATUSES, booking_man_id__isnull=False)
+    returns = (SaleReturnItem.objects
+               .filter(returned_qty__gt=0, return_invoice__invoice__booking_man_id__isnull=False)
+               .exclude(return_invoice__status="CANCELLED"))
+    stale = SalesAchievement.objects.all()
+    if months:
+        invoices = invoices.annotate(m=TruncMonth("date")).filter(m__in=months)
+        returns = returns.annotate(m=TruncMonth("return_invoice__date")).filter(m__in=months)
+        stale = stale.filter(month__in=months)
+    else:
+        invoices = invoices.annotate(m=TruncMonth("date"))
+        returns = returns.annotate(m=TruncMonth("return_invoice__date"))
+
+    acc = defaultdict(lambda: [ZERO, 0])
+    money = DecimalField(max_digits=14, decimal_places=2)
+    for r in invoices.values("booking_man_id", "m").annotate(
+            amount=Sum(F("total_amount") - F("discount"), output_field=money), n=Count("id")):
+        acc[(r["booking_man_id"], r["m"])][0] += r["amount"] or ZERO
+        acc[(r["booking_man_id"], r["m"])][1] += r["n"]
+    for r in returns.values("return_invoice__invoice__booking_man_id", "m").annotate(
+            amount=Sum(F("returned_qty") * F("rate"), output_field=money)):
+        acc[(r["return_invoice__invoice__booking_man_id"], r["m"])][0] -= r["amount"] or ZERO
+
+    stale.delete()
+    SalesAchievement.objects.bulk_create([
+        SalesAchievement(employee_id=emp, month=m, achieved_amount=amount, invoice_count=n)
+        for (emp, m), (amount, n) in acc.items()
+    ], batch_size=1000)
+    return len(acc)
+
+
+def leaderboard(month, *, by="amount", limit=None):
+    """
+    Ranked in SQL: everyone with a target or an achievement in `month`.
+    by="amount" ranks on achieved_amount, by="percent" on achieved / target.
+    """
+    month = month_start(month)
+    money = DecimalField(max_digits=14, decimal_places=2)
+    achieved = SalesAchievement.objects.filter(employee_id=OuterRef("pk"), month=month)
+    target = SalesTarget.objects.filter(employee_id=OuterRef("pk"), month=month)
+
+    qs = (
+        Employee.objects
+        .filter(Exists(achieved) | Exists(target))
+        .annotate(
+            achieved=Coalesce(Subquery(achieved.values("achieved_amount")[:1]), Value(ZERO), output_field=money),
+            invoices=Coalesce(Subquery(achieved.values("invoice_count")[:1]), Value(0)),
+            target=Subquery(target.values("target_amount")[:1], output_field=money),
+        )
+        .annotate(percent=ExpressionWrapper(F("achieved") * 100 / NullIf(F("target"), Value(ZERO)),
+                                            output_field=money))
+    )
+    order = F("percent").desc(nulls_last=True) if by == "percent" else F("achieved").desc()
+    qs = qs.annotate(rank=Window(Rank(), order_by=order)).order_by("rank", "name")
+    qs = qs.values("id", "name", "achieved", "invoices", "target", "percent", "rank")
+    return list(qs[:limit] if limit else qs)
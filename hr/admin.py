@@ -1,17 +1,14 @@
 from django.contrib import admin
 from .models import (
-    Employee, EmployeeContract, LeaveRequest, SalesTarget,
-    Attendance, LeaveBalance, PayrollSlip, DeliveryAssignment
+    Employee, EmployeeContract, LeaveRequest, SalesTarget, SalesAchievement,
+    Attendance, AttendanceMonth, LeaveBalance, PayrollSlip, DeliveryAssignment
 )
+from .payroll import confirm_slips, generate_payroll, pay_slips
 from django.utils.html import format_html
 from django.utils.timezone import now
-from datetime import timedelta
 from django.db.models import Sum
 from django.contrib import messages
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from xhtml2pdf import pisa
-from django.db import transaction
+from utils.invoice_pdf import render_invoice_pdf, render_invoices_batch, pdf_response
 from hordak.models import Account
 from django import forms
 
@@ -45,11 +42,22 @@ class SalesTargetAdmin(admin.ModelAdmin):
     list_display = ('employee', 'month', 'target_amount')
     list_filter = ('month',)
 
+@admin.register(SalesAchievement)
+class SalesAchievementAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'month', 'achieved_amount', 'invoice_count', 'updated_at')
+    list_filter = ('month',)
+
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
     list_display = ('employee', 'date', 'check_in', 'check_out', 'is_absent')
     list_filter = ('date', 'is_absent')
 
+@admin.register(AttendanceMonth)
+class AttendanceMonthAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'month', 'present_days', 'absent_days', 'late_days', 'leave_days', 'updated_at')
+    list_filter = ('month',)
+    search_fields = ('employee__name',)
+
 @admin.register(LeaveBalance)
 class LeaveBalanceAdmin(admin.ModelAdmin):
     list_display = ('employee', 'annual', 'sick', 'casual')
@@ -57,25 +65,15 @@ class LeaveBalanceAdmin(admin.ModelAdmin):
 # --- PDF Helper ---
 
 def generate_pdf_invoice(invoice):
-    context = {
-        'invoice': invoice,
-        'items': [],
-        'invoice_type': invoice.__class__.__name__,
-    }
-    html = render_to_string("invoices/pdf_invoice.html", context)
-    response = HttpResponse(content_type='application/pdf')
-    pisa.CreatePDF(html, dest=response)
-    return response
+    return pdf_response(render_invoice_pdf(invoice, items=[]), filename=f"payroll-{invoice.pk}.pdf")
 
 # --- Admin Actions ---
 
-# Optional: Your existing single-row PDF print stub
 def print_invoice_pdf(modeladmin, request, queryset):
     if queryset.count() == 1:
-        obj = queryset.first()
-        # Implement and return an HttpResponse/PDF
-        return HttpResponse(f"PDF for {obj}")  # stub
-    return HttpResponse("Please select only one invoice to print.")
+        return generate_pdf_invoice(queryset.first())
+    qs = queryset.select_related("employee").order_by("employee__name")
+    return pdf_response(render_invoices_batch(qs, renderer="fast"), filename="payroll.pdf")
 print_invoice_pdf.short_description = "Print Payroll PDF"
 
 # ---------- Lightweight Account field (no balance lookup) ----------
@@ -142,75 +140,30 @@ class PayrollSlipAdmin(admin.ModelAdmin):
 
     @admin.action(description="Generate Payroll for Current Month")
     def generate_payroll(self, request, queryset):
-        """
-        Your original generator, kept intact but without voucher logic.
-        """
-        today = now().date()
-        month_start = today.replace(day=1)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-
-        employees = Employee.objects.filter(active=True)
-        created = 0
-        for emp in employees:
-            if PayrollSlip.objects.filter(employee=emp, month=month_start).exists():
-                continue
-
-            total_attendance = Attendance.objects.filter(employee=emp, date__range=[month_start, month_end])
-            present = total_attendance.exclude(is_absent=True).count()
-            absent = total_attendance.filter(is_absent=True).count()
-
-            try:
-                contract = EmployeeContract.objects.filter(employee=emp).latest('start_date')
-            except EmployeeContract.DoesNotExist:
-                continue
-
-            daily_salary = contract.salary / 30
-            deduction = daily_salary * absent
-            net = contract.salary - deduction
-
-            PayrollSlip.objects.create(
-                employee=emp,
-                month=month_start,
-                base_salary=contract.salary,
-                present_days=present,
-                absent_days=absent,
-                deductions=deduction,
-                net_salary=net,  # model will recompute consistently anyway
-            )
-            created += 1
-        self.message_user(request, f"{created} payroll slips generated.", level=messages.SUCCESS)
+        run = generate_payroll(now().date())
+        self.message_user(request, f"{len(run.created)} payroll slips generated.", level=messages.SUCCESS)
+        if run.no_contract:
+            self.message_user(request, f"Skipped {len(run.no_contract)} employee(s) without a current contract.",
+                              level=messages.INFO)
+
+    def _report(self, request, report, verb):
+        for row in report.results:
+            if row["status"] == "error":
+                self.message_user(request, f"{row['employee']}: {row['detail']}", level=messages.WARNING)
+        if report.count(report.action):
+            self.message_user(request, f"{verb} {report.count(report.action)} slip(s) in "
+                                       f"{len(report.transactions)} journal(s).", level=messages.SUCCESS)
+        skipped = report.count("skipped") + report.count("error")
+        if skipped:
+            self.message_user(request, f"Skipped {skipped} slip(s).", level=messages.INFO)
 
     @admin.action(description="Confirm (Accrue) selected payroll slips")
     def confirm_slips(self, request, queryset):
-        processed = skipped = 0
-        with transaction.atomic():
-            for slip in queryset.select_for_update():
-                try:
-                    slip.confirm()
-                    processed += 1
-                except Exception as e:
-                    skipped += 1
-                    self.message_user(request, f"{slip}: could not confirm ({e})", level=messages.WARNING)
-        if processed:
-            self.message_user(request, f"Confirmed {processed} slip(s).", level=messages.SUCCESS)
-        if skipped:
-            self.message_user(request, f"Skipped {skipped} slip(s).", level=messages.INFO)
+        self._report(request, confirm_slips(queryset), "Confirmed")
 
     @admin.action(description="Mark Paid (Disburse) selected payroll slips")
     def mark_slips_paid(self, request, queryset):
-        processed = skipped = 0
-        with transaction.atomic():
-            for slip in queryset.select_for_update():
-                try:
-                    slip.mark_paid()
-                    processed += 1
-                except Exception as e:
-                    skipped += 1
-                    self.message_user(request, f"{slip}: could not mark paid ({e})", level=messages.WARNING)
-        if processed:
-            self.message_user(request, f"Marked {processed} slip(s) as PAID.", level=messages.SUCCESS)
-        if skipped:
-            self.message_user(request, f"Skipped {skipped} slip(s).", level=messages.INFO)
+        self._report(request, pay_slips(queryset), "Paid")
 @admin.register(DeliveryAssignment)
 class DeliveryAssignmentAdmin(admin.ModelAdmin):
     list_display = ('employee', 'sale', 'assigned_date', 'status')
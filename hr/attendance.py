@@ -0,0 +1,275 @@
+# hr/attendance.py
+"""
+Attendance import from device exports, and the monthly AttendanceMonth rollup.
+
+Import (.xlsx / .csv):
+- Streams the file (utils.tabular: openpyxl read-only / csv reader).
+- Accepts either one row per day (date + check in / check out [+ status]) or
+  raw punches (one timestamp per row); punches fold into the day's first / last.
+- Employees are resolved by id, CNIC or name from ONE query.
+- Days are upserted in chunks with bulk_create(update_conflicts=True) on the
+  (employee, date) unique key, so re-importing the same export is safe.
+- Rows for unknown employees are reported and skipped; the rest are written.
+
+Rollup: month_rows() computes present / absent / late / leave days per
+employee for a whole month with ONE grouped COUNT over Attendance and ONE
+LeaveRequest query; refresh_months() upserts them into AttendanceMonth. The importer
+calls it for the months it touched; signals keep it current for single edits.
+Late = checked in after HR_SHIFT_START + HR_LATE_GRACE_MINUTES (settings).
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from utils.tabular import iter_rows
+
+from .models import Attendance, AttendanceMonth, Employee, LeaveRequest
+
+CHUNK = 1000
+
+HEADER_ALIASES = {
+    "employee": {"employee", "employeeid", "empid", "emp", "empno", "userid", "enrollid", "enrollno", "acno"},
+    "cnic": {"cnic", "nic", "nationalid"},
+    "name": {"name", "employeename", "empname"},
+    "date": {"date", "day", "attdate", "attendancedate"},
+    "check_in": {"checkin", "in", "timein", "intime", "clockin"},
+    "check_out": {"checkout", "out", "timeout", "outtime", "clockout"},
+    "punch": {"punch", "punchtime", "datetime", "timestamp", "logtime", "checktime"},
+    "status": {"status", "absent", "attendance"},
+    "remarks": {"remarks", "remark", "note", "notes"},
+}
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%m/%d/%Y")
+TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M:%S %p", "%I:%M%p")
+ABSENT_VALUES = {"a", "absent", "yes", "y", "true", "1"}
+
+
+@dataclass
+class AttendanceImportReport:
+    dry_run: bool
+    rows: int = 0
+    days: int = 0
+    employees: int = 0
+    months: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            "dryRun": self.dry_run, "rows": self.rows, "days": self.days, "employees": self.employees,
+            "months": [m.isoformat() for m in self.months], "errors": self.errors,
+        }
+
+
+# ---------- parsing ----------
+
+def _date(v):
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    s = str(v or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"date '{s}' not understood")
+
+
+def _time(v):
+    if v in (None, ""):
+        return None
+    if isinstance(v, datetime):
+        return v.time().replace(microsecond=0)
+    if isinstance(v, time):
+        return v.replace(microsecond=0)
+    s = str(v).strip().upper()
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).time()
+        except ValueError:
+            continue
+    raise ValueError(f"time '{v}' not understood")
+
+
+def _punch(v):
+    if isinstance(v, datetime):
+        return v.date(), v.time().replace(microsecond=0)
+    s = str(v or "").strip()
+    for sep in (" ", "T"):
+        if sep in s:
+            d, t = s.split(sep, 1)
+            return _date(d), _time(t)
+    raise ValueError(f"punch '{s}' needs a date and a time")
+
+
+def _employee_lookup():
+    by_id, by_cnic, by_name = {}, {}, {}
+    for pk, cnic, name in Employee.objects.values_list("id", "cnic", "name"):
+        by_id[str(pk)] = pk
+        if cnic:
+            by_cnic["".join(ch for ch in cnic if ch.isdigit())] = pk
+        by_name.setdefault(name.strip().upper(), pk)
+
+    def resolve(rec):
+        ref = str(rec.get("employee") or "").strip()
+        if ref.endswith(".0"):  # numeric id read from Excel
+            ref = ref[:-2]
+        if ref in by_id:
+            return by_id[ref]
+        cnic = "".join(ch for ch in str(rec.get("cnic") or "") if ch.isdigit())
+        if cnic and cnic in by_cnic:
+            return by_cnic[cnic]
+        return by_name.get(str(rec.get("name") or "").strip().upper())
+
+    return resolve
+
+
+# ---------- import ----------
+
+def import_attendance(fileobj, filename, *, dry_run=False):
+    """Upsert Attendance days from a device export. Returns an AttendanceImportReport."""
+    report = AttendanceImportReport(dry_run=dry_run)
+    resolve = _employee_lookup()
+    days = {}  # (employee_id, date) -> {"check_in", "check_out", "is_absent", "remarks"}
+    has_remarks = False
+
+    for n, rec in iter_rows(fileobj, filename, HEADER_ALIASES):
+        report.rows += 1
+        emp_id = resolve(rec)
+        if emp_id is None:
+            report.errors.append({"row": n, "errors": ["employee not found"]})
+            continue
+        try:
+            if rec.get("punch") not in (None, ""):
+                day, t = _punch(rec["punch"])
+                times = [t]
+            else:
+                day = _date(rec.get("date"))
+                times = [t for t in (_time(rec.get("check_in")), _time(rec.get("check_out"))) if t]
+        except ValueError as e:
+            report.errors.append({"row": n, "errors": [str(e)]})
+            continue
+        d = days.setdefault((emp_id, day), {"times": [], "absent": False, "remarks": ""})
+        d["times"].extend(times)
+        d["absent"] = d["absent"] or str(rec.get("status") or "").strip().lower() in ABSENT_VALUES
+        if rec.get("remarks"):
+            has_remarks = True
+            d["remarks"] = str(rec["remarks"]).strip()
+
+    objs = []
+    for (emp_id, day), d in sorted(days.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+        times = sorted(d["times"])
+        check_in = times[0] if times else None
+        check_out = times[-1] if len(times) > 1 else None
+        objs.append(Attendance(employee_id=emp_id, date=day, check_in=check_in, check_out=check_out,
+                               is_absent=d["absent"] and not times, remarks=d["remarks"]))
+
+    report.days = len(objs)
+    report.employees = len({o.employee_id for o in objs})
+    report.months = sorted({o.date.replace(day=1) for o in objs})
+    if dry_run or not objs:
+        return report
+
+    update_fields = ["check_in", "check_out", "is_absent"] + (["remarks"] if has_remarks else [])
+    with transaction.atomic():
+        for i in range(0, len(objs), CHUNK):
+            Attendance.objects.bulk_create(
+                objs[i:i + CHUNK], update_conflicts=True,
+                unique_fields=["employee", "date"], update_fields=update_fields,
+            )
+        refresh_months(report.months, {o.employee_id for o in objs})
+    return report
+
+
+# ---------- monthly rollup ----------
+
+def month_bounds(d):
+    start = d.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+
+def late_after():
+    h, m = (int(x) for x in str(getattr(settings, "HR_SHIFT_START", "09:00")).split(":")[:2])
+    grace = int(getattr(settings, "HR_LATE_GRACE_MINUTES", 15))
+    return (datetime.combine(date.min, time(h, m)) + timedelta(minutes=grace)).time()
+
+
+def leave_days(employee_ids, start, end):
+    """{employee_id: approved leave days inside [start, end]} from one query."""
+    days = {}
+    qs = LeaveRequest.objects.filter(status="APPROVED", start_date__lte=end, end_date__gte=start)
+    if employee_ids is not None:
+        qs = qs.filter(employee_id__in=employee_ids)
+    for emp_id, s, e in qs.values_list("employee_id", "start_date", "end_date"):
+        overlap = (min(e, end) - max(s, start)).days + 1
+        if overlap > 0:
+            days[emp_id] = days.get(emp_id, 0) + overlap
+    return days
+
+
+def month_rows(month, employee_ids=None):
+    """
+    Unsaved AttendanceMonth rows for `month`, for `employee_ids` (each gets a
+    row, zeros included) or everyone with attendance or leave in the month.
+    """
+    start, end = month_bounds(month.replace(day=1))
+    qs = Attendance.objects.filter(date__range=(start, end))
+    if employee_ids is not None:
+        qs = qs.filter(employee_id__in=employee_ids)
+    cutoff = late_after()
+    counts = {
+        row["employee_id"]: row
+        for row in qs.values("employee_id").annotate(
+            present=Count("id", filter=Q(is_absent=False)),
+            absent=Count("id", filter=Q(is_absent=True)),
+            late=Count("id", filter=Q(is_absent=False, check_in__gt=cutoff)),
+        )
+    }
+    leave = leave_days(employee_ids, start, end)
+    ids = set(counts) | set(leave) | set(employee_ids or ())
+    return [
+        AttendanceMonth(
+            employee_id=emp_id, month=start,
+            present_days=counts.get(emp_id, {}).get("present", 0),
+            absent_days=counts.get(emp_id, {}).get("absent", 0),
+            late_days=counts.get(emp_id, {}).get("late", 0),
+            leave_days=leave.get(emp_id, 0),
+        )
+        for emp_id in ids
+    ]
+
+
+@transaction.atomic
+def refresh_months(months, employee_ids=None):
+    """
+    Recompute AttendanceMonth for `months` (any dates in them), for
+    `employee_ids` or everyone. Returns the number of rollup rows written.
+    """
+    written = 0
+    for month in sorted({m.replace(day=1) for m in months}):
+        rows = month_rows(month, employee_ids)
+        if employee_ids is None:
+            AttendanceMonth.objects.filter(month=month).exclude(employee_id__in=[r.employee_id for r in rows]).delete()
+        written += store_rows(rows)
+    return written
+
+
+def store_rows(rows):
+    """Upsert month_rows() output on the (employee, month) key."""
+    AttendanceMonth.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=["employee", "month"],
+        update_fields=["present_days", "absent_days", "late_days", "leave_days", "updated_at"],
+        batch_size=CHUNK,
+    )
+    return len(rows)
+
+
+def months_between(start, end):
+    m = start.replace(day=1)
+    while m <= end:
+        yield m
+        m = (m + timedelta(days=32)).replace(day=1)
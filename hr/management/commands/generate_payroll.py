@@ -0,0 +1,28 @@
+# management/commands/generate_payroll.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from hr.payroll import generate_payroll
+
+
+class Command(BaseCommand):
+    help = "Create DRAFT payroll slips for a month (employees that already have one are skipped)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="YYYY-MM (default: current month)")
+        parser.add_argument("--employee", type=int, action="append", help="employee id; repeatable")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        try:
+            month = date.fromisoformat(f"{opts['month']}-01") if opts["month"] else timezone.localdate()
+        except ValueError as e:
+            raise CommandError(f"Invalid month: {e}")
+        run = generate_payroll(month, employees=opts["employee"], dry_run=opts["dry_run"])
+        summary = run.as_dict()
+        verb = "Would create" if run.dry_run else "Created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary['created']} slip(s) for {summary['month']} (net {summary['totalNet']}); "
+            f"{run.existing} already existed, {len(run.no_contract)} without a contract"))
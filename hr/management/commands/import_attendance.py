@@ -0,0 +1,37 @@
+# management/commands/import_attendance.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hr.attendance import import_attendance, refresh_months
+
+
+class Command(BaseCommand):
+    help = "Import a device attendance export (.xlsx/.csv), or rebuild the monthly attendance rollup"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="Path to the .xlsx or .csv export")
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument("--rebuild-month", action="append", metavar="YYYY-MM",
+                            help="recompute AttendanceMonth for every employee; repeatable")
+
+    def handle(self, *args, **opts):
+        if opts["rebuild_month"]:
+            try:
+                months = [date.fromisoformat(f"{m}-01") for m in opts["rebuild_month"]]
+            except ValueError as e:
+                raise CommandError(f"Invalid month: {e}")
+            n = refresh_months(months)
+            self.stdout.write(self.style.SUCCESS(f"Attendance rollup rebuilt: {n} row(s)"))
+        if not opts["path"]:
+            if not opts["rebuild_month"]:
+                raise CommandError("Give a file path or --rebuild-month")
+            return
+        with open(opts["path"], "rb") as fh:
+            report = import_attendance(fh, opts["path"], dry_run=opts["dry_run"])
+        for err in report.errors[:20]:
+            self.stdout.write(f"row {err['row']}: {'; '.join(err['errors'])}")
+        verb = "Parsed" if report.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report.days} day(s) for {report.employees} employee(s) from {report.rows} row(s); "
+            f"{len(report.errors)} row(s) skipped"))
@@ -0,0 +1,30 @@
+# management/commands/recompute_sales_achievements.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from hr.achievements import month_start, recompute
+
+
+class Command(BaseCommand):
+    help = ("Recompute SalesAchievement counters from invoices and returns. "
+            "Schedule nightly (cron) as a safety net for the incremental updates.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", action="append", help="YYYY-MM; repeatable. Default: current and previous month")
+        parser.add_argument("--all", action="store_true", help="Recompute the full history")
+
+    def handle(self, *args, **opts):
+        if opts["all"]:
+            months = None
+        elif opts["month"]:
+            try:
+                months = [date.fromisoformat(f"{m}-01") for m in opts["month"]]
+            except ValueError as e:
+                raise CommandError(f"Invalid month: {e}")
+        else:
+            this_month = month_start(timezone.localdate())
+            months = [this_month, month_start(this_month - timedelta(days=1))]
+        rows = recompute(months)
+        self.stdout.write(self.style.SUCCESS(f"Sales achievements recomputed: {rows} row(s)"))
@@ -3,14 +3,11 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from user.models import CustomUser
 from decimal import Decimal
-from datetime import date as date_cls
-from django.db import models, transaction
-from django.utils import timezone
+from django.db import models
 from django.core.exceptions import ValidationError
 from hordak.models import Transaction, Account
 from setting.models import Company
 from hordak.models import Account
-from finance.hordak_posting import post_payroll_confirm_txn,post_payroll_payment_txn
 class EmployeeRole(models.TextChoices):
     SUPER_ADMIN = "SUPER_ADMIN", "Super Admin"
     CUSTOMER = "CUSTOMER", "Customer"
@@ -42,6 +39,8 @@ class Employee(models.Model):
     cnic = models.CharField(max_length=20, blank=True)
     address = models.TextField(blank=True)
     active = models.BooleanField(default=True)
+    # recovery route: areas this officer collects from
+    recovery_areas = models.ManyToManyField("setting.Area", blank=True, related_name="recovery_officers")
   
 
     def __str__(self):
@@ -97,6 +96,26 @@ class SalesTarget(models.Model):
         return f"{self.employee.name} - {self.month.strftime('%B %Y')}"
 
 
+class SalesAchievement(models.Model):
+    """
+    Running net sales per booking man per month (hr/achievements.py).
+    Updated on invoice confirm/cancel and sale returns; recomputed nightly
+    by `manage.py recompute_sales_achievements`.
+    """
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="sales_achievements")
+    month = models.DateField(help_text="1st of the month")
+    achieved_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    invoice_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('employee', 'month')
+        indexes = [models.Index(fields=["month", "achieved_amount"])]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.month:%B %Y}: {self.achieved_amount}"
+
+
 class DeliveryAssignment(models.Model):
     employee = models.ForeignKey(Employee, limit_choices_to={'role': 'DELIVERY'}, on_delete=models.CASCADE)
     sale = models.ForeignKey('sale.SaleInvoice', on_delete=models.CASCADE)
@@ -124,6 +143,26 @@ class Attendance(models.Model):
         unique_together = ('employee', 'date')
 
 
+class AttendanceMonth(models.Model):
+    """
+    Per (employee, month) attendance rollup kept by hr/attendance.py; payroll
+    and dashboards read this instead of counting Attendance rows.
+    """
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="attendance_months")
+    month = models.DateField(help_text="1st of the month")
+    present_days = models.PositiveIntegerField(default=0)
+    absent_days = models.PositiveIntegerField(default=0)
+    late_days = models.PositiveIntegerField(default=0)
+    leave_days = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("employee", "month")
+        indexes = [models.Index(fields=["month", "employee"])]
+
+    def __str__(self):
+        return f"{self.employee} - {self.month:%B %Y}"
+
 
 
 class LeaveBalance(models.Model):
@@ -252,49 +291,21 @@ class PayrollSlip(models.Model):
         super().save(*args, **kwargs)
 
     # --- domain actions ---
-    @transaction.atomic
+    # Both go through the batch services in hr/payroll.py (one slip = a batch of one).
+    def _post_one(self, report):
+        row = report.results[0] if report.results else {"status": "error", "detail": "Slip not found."}
+        if row["status"] != report.action:
+            raise ValidationError(row.get("detail") or f"Slip could not be {report.action}.")
+        self.refresh_from_db(fields=["status", "accrual_txn", "payment_txn",
+                                     "expense_account", "payable_account", "payment_account"])
+
     def confirm(self):
-        if self.status != "DRAFT":
-            raise ValidationError("Only DRAFT slips can be confirmed.")
-        exp, pay, _cash = self._resolve_accounts()
-        if not exp or not pay:
-            raise ValidationError("Expense and Payable accounts are required to confirm payroll.")
-        if self.accrual_txn_id:
-            raise ValidationError("Accrual transaction already exists.")
-
-        desc = f"Payroll accrual for {self.employee} - {self.month.strftime('%B %Y')}"
-        txn = post_payroll_confirm_txn(
-            date=self.month if isinstance(self.month, date_cls) else timezone.now().date(),
-            description=desc,
-            amount=self.net_salary,
-            expense_account=exp,
-            payable_account=pay,
-        )
-        self.accrual_txn = txn
-        self.status = "CONFIRMED"
-        self.save(update_fields=["accrual_txn", "status"])
-
-    @transaction.atomic
+        from .payroll import confirm_slips
+        self._post_one(confirm_slips([self.pk]))
+
     def mark_paid(self, *, payment_date=None):
-        if self.status != "CONFIRMED":
-            raise ValidationError("Only CONFIRMED slips can be marked PAID.")
-        _exp, pay, cash = self._resolve_accounts()
-        if not pay or not cash:
-            raise ValidationError("Payable and Cash/Bank accounts are required to pay payroll.")
-        if self.payment_txn_id:
-            raise ValidationError("Payment transaction already exists.")
-
-        desc = f"Payroll payment for {self.employee} - {self.month.strftime('%B %Y')}"
-        txn = post_payroll_payment_txn(
-            date=payment_date or timezone.now().date(),
-            description=desc,
-            amount=self.net_salary,
-            payable_account=pay,
-            cash_bank_account=cash
-        )
-        self.payment_txn = txn
-        self.status = "PAID"
-        self.save(update_fields=["payment_txn", "status"])
+        from .payroll import pay_slips
+        self._post_one(pay_slips([self.pk], payment_date=payment_date))
 
 
 class Task(models.Model):
@@ -0,0 +1,251 @@
+# hr/payroll.py
+"""
+Monthly payroll generation, set-based.
+
+generate_payroll(month) builds DRAFT slips for every active employee that
+has no slip for the month yet, with a fixed number of queries however many
+employees there are:
+  1) the employees, locked (SELECT ... FOR UPDATE, id order) so two runs for
+     the same people take turns instead of both inserting, then the ones that
+     already have a slip (one values_list),
+  2) the contract in force during the month, latest start_date per employee
+     (ROW_NUMBER() OVER (PARTITION BY employee ORDER BY start_date DESC, id DESC) = 1),
+  3) present / absent / leave days from the AttendanceMonth rollup
+     (hr/attendance.py); employees without a rollup row get theirs computed
+     (and stored, unless dry_run),
+then computes net salary in memory (PayrollSlip._compute_net, the same rule
+save() applies) and writes everything with one bulk_create.
+
+Approved leave days become `leaves_paid`, which _compute_net offsets against
+absent days; `deductions` is left for manual adjustments.
+
+confirm_slips() / pay_slips() close a payroll in bulk. Slips are locked once,
+checked in memory, and grouped by (month, expense, payable) account for the
+accrual or (payable, cash/bank) for the payment; the account pair is the cost
+centre here. Each group becomes ONE consolidated Hordak journal (one leg per
+slip on the payable side for employee-level detail, one total leg on the other
+side) written with a bulk leg INSERT. Slip status and txn links are saved with
+one bulk_update. A PayrollPosting reports what happened to every slip.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, QuerySet, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from finance.hordak_posting import post_journal_txn
+
+from .attendance import month_bounds, month_rows, store_rows
+from .models import AttendanceMonth, Employee, EmployeeContract, PayrollSlip
+
+Q2 = Decimal("0.01")
+
+
+@dataclass
+class PayrollRun:
+    month: date
+    created: list = field(default_factory=list)        # PayrollSlip objects
+    existing: int = 0
+    no_contract: list = field(default_factory=list)    # employee ids
+    dry_run: bool = False
+
+    def as_dict(self):
+        return {
+            "month": self.month.isoformat(),
+            "dryRun": self.dry_run,
+            "created": len(self.created),
+            "existing": self.existing,
+            "noContract": self.no_contract,
+            "totalNet": str(sum((s.net_salary for s in self.created), 0)),
+            "slips": [
+                {
+                    "employee": s.employee_id, "baseSalary": str(s.base_salary),
+                    "presentDays": s.present_days, "absentDays": s.absent_days,
+                    "leavesPaid": s.leaves_paid, "netSalary": str(s.net_salary),
+                }
+                for s in self.created
+            ],
+        }
+
+
+@transaction.atomic
+def generate_payroll(month, *, employees=None, dry_run=False):
+    """
+    Create DRAFT slips for `month` (any date in it). `employees` narrows the
+    run (queryset or ids). Returns a PayrollRun.
+    """
+    start, end = month_bounds(month)
+    run = PayrollRun(month=start, dry_run=dry_run)
+
+    emps = Employee.objects.filter(active=True)
+    if employees is not None:
+        emps = emps.filter(pk__in=employees)
+    emp_ids = set(emps.select_for_update().order_by("id").values_list("id", flat=True))
+    done = set(PayrollSlip.objects.filter(month=start, employee_id__in=emp_ids).values_list("employee_id", flat=True))
+    run.existing = len(done)
+    emp_ids -= done
+    if not emp_ids:
+        return run
+
+    salaries = dict(
+        EmployeeContract.objects
+        .filter(employee_id__in=emp_ids, start_date__lte=end)
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=start))
+        .annotate(rn=Window(RowNumber(), partition_by=[F("employee_id")],
+                            order_by=[F("start_date").desc(), F("id").desc()]))
+        .filter(rn=1)
+        .values_list("employee_id", "salary")
+    )
+    run.no_contract = sorted(emp_ids - salaries.keys())
+
+    rollup = AttendanceMonth.objects.filter(month=start, employee_id__in=salaries.keys())
+    attendance = {
+        r["employee_id"]: r
+        for r in rollup.values("employee_id", "present_days", "absent_days", "leave_days")
+    }
+    missing = salaries.keys() - attendance.keys()
+    if missing:
+        rows = month_rows(start, missing)
+        if not dry_run:
+            store_rows(rows)
+        attendance.update({r.employee_id: {"present_days": r.present_days, "absent_days": r.absent_days,
+                                           "leave_days": r.leave_days} for r in rows})
+
+    for emp_id in sorted(salaries):
+        att = attendance.get(emp_id, {})
+        slip = PayrollSlip(
+            employee_id=emp_id, month=start, base_salary=salaries[emp_id],
+            present_days=att.get("present_days", 0), absent_days=att.get("absent_days", 0),
+            leaves_paid=att.get("leave_days", 0), deductions=0,
+        )
+        slip.net_salary = slip._compute_net().quantize(Q2, rounding=ROUND_HALF_UP)  # as the column stores it
+        run.created.append(slip)
+
+    if not dry_run:
+        # the employee locks above keep concurrent runs out, so every slip reported is written
+        PayrollSlip.objects.bulk_create(run.created, batch_size=500)
+    return run
+
+
+@dataclass
+class PayrollPosting:
+    action: str
+    results: list = field(default_factory=list)   # {"slip", "employee", "status", "txn"?, "detail"?}
+    transactions: list = field(default_factory=list)
+
+    def add(self, slip, status, *, txn=None, detail=None):
+        row = {"slip": slip.pk, "employee": str(slip.employee), "status": status}
+        if txn is not None:
+            row["txn"] = txn.pk
+        if detail:
+            row["detail"] = detail
+        self.results.append(row)
+
+    def count(self, status):
+        return sum(1 for r in self.results if r["status"] == status)
+
+    def as_dict(self):
+        return {
+            "action": self.action,
+            "posted": self.count(self.action),
+            "skipped": self.count("skipped"),
+            "errors": self.count("error"),
+            "transactions": [t.pk for t in self.transactions],
+            "results": self.results,
+        }
+
+
+def _lock(slips):
+    ids = slips.values("pk") if isinstance(slips, QuerySet) else [getattr(s, "pk", s) for s in slips]
+    return list(PayrollSlip.objects.select_for_update(of=("self",))
+                .filter(pk__in=ids)
+                .select_related("employee", "expense_account", "payable_account", "payment_account")
+                .order_by("month", "employee__name", "id"))
+
+
+@transaction.atomic
+def confirm_slips(slips, *, expense_account=None, payable_account=None):
+    """
+    Accrue DRAFT slips (queryset, instances or ids): per (month, expense,
+    payable) one journal DR expense total / CR payable per slip. Per-slip
+    accounts win over the defaults given here. Returns a PayrollPosting.
+    """
+    report = PayrollPosting(action="confirmed")
+    groups = defaultdict(list)
+    for slip in _lock(slips):
+        exp = slip.expense_account or expense_account
+        pay = slip.payable_account or payable_account
+        if slip.status != "DRAFT" or slip.accrual_txn_id:
+            report.add(slip, "skipped", detail=f"Status is {slip.status}; only DRAFT slips can be confirmed.")
+        elif not exp or not pay:
+            report.add(slip, "error", detail="Expense and Payable accounts are required to confirm payroll.")
+        elif slip.net_salary <= 0:
+            report.add(slip, "error", detail="Net salary must be greater than 0.")
+        else:
+            slip.expense_account, slip.payable_account = exp, pay
+            groups[(slip.month, exp.pk, pay.pk)].append(slip)
+
+    done = []
+    for (month, _, _), group in groups.items():
+        exp, pay = group[0].expense_account, group[0].payable_account
+        label = month.strftime("%B %Y")
+        total = sum(s.net_salary for s in group)
+        txn = post_journal_txn(
+            date=month,
+            description=f"Payroll accrual - {label} ({len(group)} slips)",
+            legs=[(exp, total, None, f"Salaries {label}")]
+                 + [(pay, None, s.net_salary, f"{s.employee} - {label}") for s in group],
+        )
+        report.transactions.append(txn)
+        for s in group:
+            s.accrual_txn, s.status = txn, "CONFIRMED"
+            report.add(s, "confirmed", txn=txn)
+        done.extend(group)
+    PayrollSlip.objects.bulk_update(done, ["accrual_txn", "status", "expense_account", "payable_account"],
+                                    batch_size=500)
+    return report
+
+
+@transaction.atomic
+def pay_slips(slips, *, payment_account=None, payable_account=None, payment_date=None):
+    """
+    Pay CONFIRMED slips: per (payable, cash/bank) one journal DR payable per
+    slip / CR cash total, dated `payment_date` (default today). Returns a PayrollPosting.
+    """
+    payment_date = payment_date or timezone.now().date()
+    report = PayrollPosting(action="paid")
+    groups = defaultdict(list)
+    for slip in _lock(slips):
+        pay = slip.payable_account or payable_account
+        cash = slip.payment_account or payment_account
+        if slip.status != "CONFIRMED" or slip.payment_txn_id:
+            report.add(slip, "skipped", detail=f"Status is {slip.status}; only CONFIRMED slips can be paid.")
+        elif not pay or not cash:
+            report.add(slip, "error", detail="Payable and Cash/Bank accounts are required to pay payroll.")
+        else:
+            slip.payable_account, slip.payment_account = pay, cash
+            groups[(pay.pk, cash.pk)].append(slip)
+
+    done = []
+    for group in groups.values():
+        pay, cash = group[0].payable_account, group[0].payment_account
+        months = sorted({s.month for s in group})
+        label = ", ".join(m.strftime("%B %Y") for m in months)
+        txn = post_journal_txn(
+            date=payment_date,
+            description=f"Payroll payment - {label} ({len(group)} slips)",
+            legs=[(pay, s.net_salary, None, f"{s.employee} - {s.month.strftime('%B %Y')}") for s in group]
+                 + [(cash, None, sum(s.net_salary for s in group), f"Salaries paid {label}")],
+        )
+        report.transactions.append(txn)
+        for s in group:
+            s.payment_txn, s.status = txn, "PAID"
+            report.add(s, "paid", txn=txn)
+        done.extend(group)
+    PayrollSlip.objects.bulk_update(done, ["payment_txn", "status", "payable_account", "payment_account"],
+                                    batch_size=500)
+    return report
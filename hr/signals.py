@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import Employee, LeaveBalance
+from .attendance import months_between, refresh_months
+from .models import Attendance, Employee, LeaveBalance, LeaveRequest
 
 
 @receiver(post_save, sender=Employee)
@@ -9,3 +10,43 @@ def create_leave_balance(sender, instance, created, **kwargs):
     """Create a LeaveBalance record for each new Employee."""
     if created:
         LeaveBalance.objects.create(employee=instance)
+
+
+@receiver(pre_save, sender=Attendance)
+def stash_old_attendance(sender, instance, **kwargs):
+    """Keep the previous (employee, date) so an edit that moves the row refreshes the month it left."""
+    instance._old_rollup = None
+    if instance.pk and not kwargs.get("raw"):
+        instance._old_rollup = Attendance.objects.filter(pk=instance.pk).values_list("employee_id", "date").first()
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refresh_attendance_month(sender, instance, **kwargs):
+    """Keep the employee's AttendanceMonth rollup in step with single edits (imports refresh in bulk)."""
+    if kwargs.get("raw"):
+        return
+    refresh_months([instance.date], [instance.employee_id])
+    old = getattr(instance, "_old_rollup", None)
+    if old and old != (instance.employee_id, instance.date):
+        refresh_months([old[1]], [old[0]])
+
+
+@receiver(pre_save, sender=LeaveRequest)
+def stash_old_leave(sender, instance, **kwargs):
+    """Keep the previous (employee, start, end) so a moved or shortened leave refreshes the months it left."""
+    instance._old_rollup = None
+    if instance.pk and not kwargs.get("raw"):
+        instance._old_rollup = (LeaveRequest.objects.filter(pk=instance.pk)
+                                .values_list("employee_id", "start_date", "end_date").first())
+
+
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_delete, sender=LeaveRequest)
+def refresh_leave_months(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    refresh_months(months_between(instance.start_date, instance.end_date), [instance.employee_id])
+    old = getattr(instance, "_old_rollup", None)
+    if old and old != (instance.employee_id, instance.start_date, instance.end_date):
+        refresh_months(months_between(old[1], old[2]), [old[0]])
@@ -0,0 +1,55 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.test_utils import basic_entities
+from sale.models import SaleInvoice, SaleInvoiceItem
+
+from . import achievements
+from .models import Employee, SalesAchievement, SalesTarget
+
+JUNE = date(2024, 6, 1)
+
+
+class SalesAchievementTests(TestCase):
+    def setUp(self):
+        self.e = basic_entities()
+        self.ali = Employee.objects.create(name="Ali", phone="1")
+        self.sara = Employee.objects.create(name="Sara", phone="2")
+
+    def invoice(self, no, booker, amount, discount=0, day=3):
+        inv = SaleInvoice.objects.create(invoice_no=no, date=JUNE.replace(day=day), customer=self.e["customer"],
+                                         warehouse=self.e["warehouse"], discount=discount, booking_man_id=booker)
+        SaleInvoiceItem.objects.create(invoice=inv, product=self.e["product"], quantity=1, rate=amount,
+                                       amount=amount)
+        inv.confirm()
+        return inv
+
+    def achieved(self, emp):
+        return SalesAchievement.objects.filter(employee=emp, month=JUNE).values_list(
+            "achieved_amount", "invoice_count").first()
+
+    def test_confirm_and_cancel_move_the_counters(self):
+        self.invoice("SINV-1", self.ali, 100, discount=10)
+        second = self.invoice("SINV-2", self.ali, 50, day=20)
+        self.assertEqual(self.achieved(self.ali), (Decimal("140.00"), 2))
+
+        second.cancel()
+        self.assertEqual(self.achieved(self.ali), (Decimal("90.00"), 1))
+
+        incremental = self.achieved(self.ali)
+        achievements.recompute([JUNE])
+        self.assertEqual(self.achieved(self.ali), incremental)
+
+    def test_leaderboard_ranks_by_amount_or_percent(self):
+        self.invoice("SINV-1", self.ali, 300)
+        self.invoice("SINV-2", self.sara, 200)
+        SalesTarget.objects.create(employee=self.ali, month=JUNE, target_amount=600)
+        SalesTarget.objects.create(employee=self.sara, month=JUNE, target_amount=250)
+
+        by_amount = achievements.leaderboard(JUNE)
+        self.assertEqual([(r["name"], r["rank"]) for r in by_amount], [("Ali", 1), ("Sara", 2)])
+        by_percent = achievements.leaderboard(JUNE, by="percent")
+        self.assertEqual([(r["name"], r["percent"]) for r in by_percent],
+                         [("Sara", Decimal("80")), ("Ali", Decimal("50"))])
@@ -0,0 +1,70 @@
+import io
+from datetime import date
+
+from django.test import TestCase
+
+from .attendance import import_attendance
+from .models import Attendance, AttendanceMonth, Employee, LeaveRequest
+
+
+class AttendanceImportTests(TestCase):
+    CSV = (
+        "Emp ID,Punch Time\n"
+        "{id},2024-04-01 09:02\n"
+        "{id},2024-04-01 17:30\n"
+        "{id},2024-04-02 09:40\n"
+        "999999,2024-04-02 09:00\n"
+    )
+
+    def setUp(self):
+        self.emp = Employee.objects.create(name="Ali", phone="1")
+
+    def _import(self, text):
+        return import_attendance(io.BytesIO(text.format(id=self.emp.id).encode()), "device.csv")
+
+    def test_punches_fold_into_days_and_reimport_upserts(self):
+        report = self._import(self.CSV)
+        self.assertEqual((report.days, len(report.errors)), (2, 1))
+        day = Attendance.objects.get(employee=self.emp, date=date(2024, 4, 1))
+        self.assertEqual((day.check_in.hour, day.check_out.hour), (9, 17))
+
+        self._import("Employee,Date,Time In,Time Out\n{id},2024-04-02,09:05,18:00\n")
+        self.assertEqual(Attendance.objects.filter(employee=self.emp).count(), 2)
+        roll = AttendanceMonth.objects.get(employee=self.emp, month=date(2024, 4, 1))
+        self.assertEqual((roll.present_days, roll.late_days), (2, 0))
+
+
+class AttendanceRollupSignalTests(TestCase):
+    def setUp(self):
+        self.emp = Employee.objects.create(name="Ali", phone="1")
+        self.other = Employee.objects.create(name="Bilal", phone="2")
+
+    def roll(self, emp, month):
+        return AttendanceMonth.objects.filter(employee=emp, month=month).values_list(
+            "present_days", "leave_days").first()
+
+    def test_moving_a_day_refreshes_both_months(self):
+        day = Attendance.objects.create(employee=self.emp, date=date(2024, 4, 30))
+        self.assertEqual(self.roll(self.emp, date(2024, 4, 1)), (1, 0))
+
+        day.date = date(2024, 5, 1)
+        day.save()
+        self.assertEqual(self.roll(self.emp, date(2024, 4, 1)), (0, 0))
+        self.assertEqual(self.roll(self.emp, date(2024, 5, 1)), (1, 0))
+
+        day.employee = self.other
+        day.save()
+        self.assertEqual(self.roll(self.emp, date(2024, 5, 1)), (0, 0))
+        self.assertEqual(self.roll(self.other, date(2024, 5, 1)), (1, 0))
+
+    def test_moving_a_leave_refreshes_the_months_it_left(self):
+        leave = LeaveRequest.objects.create(employee=self.emp, leave_type="SICK", status="APPROVED",
+                                            start_date=date(2024, 4, 29), end_date=date(2024, 5, 2))
+        self.assertEqual(self.roll(self.emp, date(2024, 4, 1)), (0, 2))
+        self.assertEqual(self.roll(self.emp, date(2024, 5, 1)), (0, 2))
+
+        leave.start_date, leave.end_date = date(2024, 6, 3), date(2024, 6, 4)
+        leave.save()
+        self.assertEqual(self.roll(self.emp, date(2024, 4, 1)), (0, 0))
+        self.assertEqual(self.roll(self.emp, date(2024, 5, 1)), (0, 0))
+        self.assertEqual(self.roll(self.emp, date(2024, 6, 1)), (0, 2))
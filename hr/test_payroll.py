@@ -0,0 +1,93 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from finance.test_utils import assert_ledger_entries, hordak_chart
+
+from .models import Attendance, AttendanceMonth, Employee, EmployeeContract, LeaveRequest, PayrollSlip
+from .payroll import confirm_slips, generate_payroll, pay_slips
+
+
+class GeneratePayrollTests(TestCase):
+    def setUp(self):
+        self.emp = Employee.objects.create(name="Ali", phone="1")
+        self.no_contract = Employee.objects.create(name="Sara", phone="2")
+        EmployeeContract.objects.create(employee=self.emp, start_date=date(2023, 1, 1), salary=Decimal("2000"))
+        EmployeeContract.objects.create(employee=self.emp, start_date=date(2024, 1, 1), salary=Decimal("3000"))
+        Attendance.objects.bulk_create(
+            [Attendance(employee=self.emp, date=date(2024, 2, d)) for d in range(1, 27)]
+            + [Attendance(employee=self.emp, date=date(2024, 2, d), is_absent=True) for d in range(27, 30)]
+        )
+        LeaveRequest.objects.create(employee=self.emp, leave_type="SICK", status="APPROVED",
+                                    start_date=date(2024, 1, 30), end_date=date(2024, 2, 1))
+
+    def test_one_slip_per_employee_with_latest_contract_and_paid_leave(self):
+        run = generate_payroll(date(2024, 2, 15))
+        self.assertEqual(run.no_contract, [self.no_contract.id])
+        slip = PayrollSlip.objects.get(employee=self.emp, month=date(2024, 2, 1))
+        self.assertEqual((slip.present_days, slip.absent_days, slip.leaves_paid), (26, 3, 1))
+        self.assertEqual(slip.base_salary, Decimal("3000"))
+        self.assertEqual(slip.net_salary, slip._compute_net().quantize(Decimal("0.01")))
+        self.assertEqual(generate_payroll(date(2024, 2, 1)).existing, 1)
+
+    def test_reported_slips_are_the_written_ones(self):
+        other = Employee.objects.create(name="Bilal", phone="3")
+        EmployeeContract.objects.create(employee=other, start_date=date(2024, 2, 10), salary=Decimal("1500"))
+        EmployeeContract.objects.create(employee=other, start_date=date(2024, 3, 1), salary=Decimal("9999"))
+
+        self.assertEqual(len(generate_payroll(date(2024, 2, 1), dry_run=True).created), 2)
+        self.assertFalse(PayrollSlip.objects.exists())
+
+        run = generate_payroll(date(2024, 2, 1))
+        written = {s.pk: (s.base_salary, s.net_salary) for s in PayrollSlip.objects.filter(month=date(2024, 2, 1))}
+        self.assertEqual({s.pk: (s.base_salary, s.net_salary) for s in run.created}, written)
+        self.assertEqual(sorted(b for b, _ in written.values()), [Decimal("1500"), Decimal("3000")])
+        self.assertEqual(run.as_dict()["created"], 2)
+
+    def test_dry_run_computes_missing_rollups_without_writing(self):
+        AttendanceMonth.objects.all().delete()
+        run = generate_payroll(date(2024, 2, 1), dry_run=True)
+        slip = run.created[0]
+        self.assertEqual((slip.present_days, slip.absent_days, slip.leaves_paid), (26, 3, 1))
+        self.assertFalse(AttendanceMonth.objects.exists())
+
+        generate_payroll(date(2024, 2, 1))
+        self.assertEqual(AttendanceMonth.objects.get(employee=self.emp).present_days, 26)
+
+
+class BulkPayrollPostingTests(TestCase):
+    def slip(self, emp, salary, **kw):
+        return PayrollSlip.objects.create(employee=emp, month=date(2024, 3, 1), base_salary=Decimal(salary),
+                                          present_days=30, absent_days=0, net_salary=0, **kw)
+
+    def test_report_covers_every_slip(self):
+        emp = Employee.objects.create(name="Ali", phone="1")
+        other = Employee.objects.create(name="Bilal", phone="2")
+        draft = self.slip(emp, "1000")
+        done = self.slip(other, "1000", status="CONFIRMED")
+        report = confirm_slips(PayrollSlip.objects.filter(month=date(2024, 3, 1)))
+        by_slip = {r["slip"]: r["status"] for r in report.results}
+        self.assertEqual(by_slip, {draft.pk: "error", done.pk: "skipped"})
+        self.assertEqual(report.transactions, [])
+        draft.refresh_from_db()
+        self.assertEqual(draft.status, "DRAFT")
+
+    def test_one_consolidated_journal_per_account_pair(self):
+        chart = hordak_chart()
+        a = self.slip(Employee.objects.create(name="Ali", phone="1"), "1000")
+        b = self.slip(Employee.objects.create(name="Bilal", phone="2"), "1500")
+
+        accrual = confirm_slips([a, b], expense_account=chart["salaries"], payable_account=chart["payable"])
+        self.assertEqual((accrual.count("confirmed"), len(accrual.transactions)), (2, 1))
+        assert_ledger_entries(self, accrual.transactions[0], [
+            (chart["salaries"], 2500, 0), (chart["payable"], 0, 1000), (chart["payable"], 0, 1500),
+        ])
+
+        payment = pay_slips(PayrollSlip.objects.all(), payment_account=chart["cash"], payment_date=date(2024, 4, 1))
+        self.assertEqual(len(payment.transactions), 1)
+        assert_ledger_entries(self, payment.transactions[0], [
+            (chart["payable"], 1000, 0), (chart["payable"], 1500, 0), (chart["cash"], 0, 2500),
+        ])
+        self.assertEqual(set(PayrollSlip.objects.values_list("status", flat=True)), {"PAID"})
+        self.assertEqual(pay_slips([a]).count("skipped"), 1)
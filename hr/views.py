@@ -1,9 +1,15 @@
+from datetime import date
+
+from django.utils import timezone
+from hordak.models import Account
 from rest_framework import permissions, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 
 from .models import (
     Attendance,
+    AttendanceMonth,
     DeliveryAssignment,
     Employee,
     EmployeeContract,
@@ -13,6 +19,9 @@ from .models import (
     SalesTarget,
     Task,
 )
+from .achievements import leaderboard
+from .attendance import import_attendance
+from .payroll import confirm_slips, generate_payroll, pay_slips
 from .serializers import (
     AttendanceSerializer,
     DeliveryAssignmentSerializer,
@@ -84,11 +93,62 @@ class AttendanceViewSet(BaseViewSet):
     queryset = Attendance.objects.all()
     serializer_class = AttendanceSerializer
 
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser, FormParser])
+    def import_file(self, request):
+        """
+        Multipart: file=<.xlsx|.csv> device export, dry_run=1 (parse only).
+        Days are upserted on (employee, date); unknown employees are reported and skipped.
+        """
+        upload = request.FILES.get("file")
+        if not upload:
+            return Response({"detail": "file is required."}, status=400)
+        dry_run = str(request.data.get("dry_run", "")).lower() in {"1", "true", "yes"}
+        report = import_attendance(upload, upload.name, dry_run=dry_run)
+        return Response(report.as_dict())
+
+    @action(detail=False, methods=["get"])
+    def monthly(self, request):
+        """?month=YYYY-MM (default current), ?employee=<id>: rollup rows, no raw-row counting."""
+        try:
+            month = (date.fromisoformat(f"{request.query_params['month']}-01")
+                     if request.query_params.get("month") else timezone.localdate().replace(day=1))
+        except ValueError:
+            return Response({"detail": "month must be YYYY-MM"}, status=400)
+        qs = AttendanceMonth.objects.filter(month=month).select_related("employee").order_by("employee__name")
+        if request.query_params.get("employee"):
+            qs = qs.filter(employee_id=request.query_params["employee"])
+        return Response({
+            "month": month,
+            "results": [
+                {
+                    "employee": r.employee_id, "employeeName": r.employee.name,
+                    "presentDays": r.present_days, "absentDays": r.absent_days,
+                    "lateDays": r.late_days, "leaveDays": r.leave_days,
+                }
+                for r in qs
+            ],
+        })
+
 
 class SalesTargetViewSet(BaseViewSet):
     queryset = SalesTarget.objects.all()
     serializer_class = SalesTargetSerializer
 
+    @action(detail=False, methods=["get"])
+    def leaderboard(self, request):
+        """?month=YYYY-MM (default current), ?by=amount|percent, ?limit=N"""
+        try:
+            month = (date.fromisoformat(f"{request.query_params['month']}-01")
+                     if request.query_params.get("month") else timezone.localdate())
+            limit = int(request.query_params.get("limit") or 0) or None
+        except ValueError:
+            return Response({"detail": "month must be YYYY-MM"}, status=400)
+        by = request.query_params.get("by") or "amount"
+        if by not in {"amount", "percent"}:
+            return Response({"detail": "by must be 'amount' or 'percent'"}, status=400)
+        rows = leaderboard(month, by=by, limit=limit)
+        return Response({"month": month.replace(day=1), "by": by, "results": rows})
+
 
 class TaskViewSet(BaseViewSet):
     queryset = Task.objects.all()
@@ -108,3 +168,51 @@ class LeaveBalanceViewSet(BaseViewSet):
 class PayrollSlipViewSet(BaseViewSet):
     queryset = PayrollSlip.objects.all()
     serializer_class = PayrollSlipSerializer
+
+    @action(detail=False, methods=["post"])
+    def generate(self, request):
+        """{"month": "YYYY-MM", "employees": [ids]?, "dryRun": bool} -> created DRAFT slips"""
+        try:
+            month = (date.fromisoformat(f"{request.data['month']}-01")
+                     if request.data.get("month") else timezone.localdate())
+        except ValueError:
+            return Response({"detail": "month must be YYYY-MM"}, status=400)
+        run = generate_payroll(month, employees=request.data.get("employees") or None,
+                               dry_run=bool(request.data.get("dryRun")))
+        return Response(run.as_dict(), status=200 if run.dry_run else 201)
+
+    def _slips_for(self, request):
+        """ids: [..] or month: YYYY-MM (all slips of that month)."""
+        if request.data.get("ids"):
+            return PayrollSlip.objects.filter(pk__in=request.data["ids"])
+        if request.data.get("month"):
+            return PayrollSlip.objects.filter(month=date.fromisoformat(f"{request.data['month']}-01"))
+        raise ValueError("Send ids or month (YYYY-MM).")
+
+    @staticmethod
+    def _account(request, key):
+        return Account.objects.filter(pk=request.data[key]).first() if request.data.get(key) else None
+
+    @action(detail=False, methods=["post"], url_path="confirm-bulk")
+    def confirm_bulk(self, request):
+        """{"ids": [..]} or {"month": "YYYY-MM"}; optional default expenseAccount / payableAccount ids."""
+        try:
+            slips = self._slips_for(request)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        report = confirm_slips(slips, expense_account=self._account(request, "expenseAccount"),
+                               payable_account=self._account(request, "payableAccount"))
+        return Response(report.as_dict())
+
+    @action(detail=False, methods=["post"], url_path="pay-bulk")
+    def pay_bulk(self, request):
+        """{"ids": [..]} or {"month": "YYYY-MM"}; optional paymentAccount / payableAccount ids, paymentDate."""
+        try:
+            slips = self._slips_for(request)
+            payment_date = (date.fromisoformat(request.data["paymentDate"])
+                            if request.data.get("paymentDate") else None)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        report = pay_slips(slips, payment_account=self._account(request, "paymentAccount"),
+                           payable_account=self._account(request, "payableAccount"), payment_date=payment_date)
+        return Response(report.as_dict())
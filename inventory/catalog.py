@@ -0,0 +1,150 @@
+# inventory/catalog.py
+"""
+Versioned product catalog snapshot for the customer app.
+
+Building: ONE query (products + stock Sum) -> camelCase rows -> per-row hash.
+The snapshot version is a hash over the row hashes, so rebuilding an unchanged
+catalog is a no-op. The full catalog is stored gzip-compressed in
+CatalogSnapshot and served as-is (Content-Encoding: gzip) with an ETag.
+
+Freshness: Product / Batch / PriceListItem signals mark the catalog dirty
+(cache flag); the next request rebuilds it, at most once per MIN_REBUILD_SECONDS.
+Because the cache is per process, a snapshot older than STALE_AFTER is also
+re-checked. `build_catalog_snapshot` rebuilds on demand (cron / after imports).
+
+Deltas: every snapshot keeps {product_id: row_hash}; "since version X" returns
+the rows whose hash changed plus removed ids, paged. Only the last KEEP
+snapshots are kept; an unknown X gets the full catalog.
+"""
+import gzip
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import CatalogSnapshot, Product
+
+DIRTY_KEY = "catalog:dirty"
+CURRENT_KEY = "catalog:current"
+CHECKED_KEY = "catalog:checked-at"
+MIN_REBUILD_SECONDS = 30
+STALE_AFTER = 300
+KEEP = 20
+LOW_STOCK = 10  # "low" band below this
+
+
+def mark_dirty(**kwargs):
+    """Signal receiver: something the catalog shows has changed."""
+    cache.set(DIRTY_KEY, True, None)
+
+
+def stock_band(qty):
+    if qty <= 0:
+        return "out"
+    return "low" if qty < LOW_STOCK else "in"
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+def build_rows():
+    """Catalog rows sorted by id, camelCase like product_list."""
+    qs = (
+        Product.objects.filter(disable_sale_purchase=False)
+        .annotate(total_stock=Coalesce(Sum("batch__quantity"), Value(0)))
+        .order_by("id")
+        .values("id", "name", "barcode", "packing", "trade_price", "e_rate", "retail_price",
+                "sales_tax_ratio", "fed_tax_ratio", "image_1", "image_2", "total_stock")
+    )
+    return [
+        {
+            "id": p["id"], "name": p["name"], "barcode": p["barcode"], "packing": p["packing"],
+            "tradePrice": float(p["trade_price"]), "eRate": float(p["e_rate"]),
+            "retailPrice": float(p["retail_price"]),
+            "salesTaxRatio": float(p["sales_tax_ratio"]), "fedTaxRatio": float(p["fed_tax_ratio"]),
+            "stockBand": stock_band(p["total_stock"]),
+            "image_1": _image_url(p["image_1"]), "image_2": _image_url(p["image_2"]),
+        }
+        for p in qs
+    ]
+
+
+def _row_hash(row):
+    return hashlib.sha1(json.dumps(row, sort_keys=True, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+def _cache_current(snap):
+    cache.set(CURRENT_KEY, snap, None)
+    cache.set(CHECKED_KEY, time.time(), None)
+    return snap
+
+
+def rebuild():
+    """Build the catalog; store a new snapshot only if something changed. Returns the current snapshot."""
+    cache.delete(DIRTY_KEY)
+    rows = build_rows()
+    hashes = {str(r["id"]): _row_hash(r) for r in rows}
+    version = hashlib.sha1("".join(f"{k}:{v};" for k, v in hashes.items()).encode()).hexdigest()
+
+    latest = CatalogSnapshot.objects.defer("payload", "row_hashes").first()
+    if latest and latest.version == version:
+        return _cache_current(CatalogSnapshot.objects.get(pk=latest.pk))
+
+    body = json.dumps({"version": version, "full": True, "products": rows}, separators=(",", ":"))
+    with transaction.atomic():
+        snap, _ = CatalogSnapshot.objects.get_or_create(version=version, defaults={
+            "payload": gzip.compress(body.encode(), compresslevel=6),
+            "row_hashes": hashes,
+            "product_count": len(rows),
+        })
+        old = CatalogSnapshot.objects.values_list("id", flat=True)[KEEP:]
+        CatalogSnapshot.objects.filter(id__in=list(old)).delete()
+    return _cache_current(snap)
+
+
+def current():
+    """The snapshot to serve, rebuilding first if it is dirty or unchecked for too long."""
+    snap = cache.get(CURRENT_KEY)
+    checked = cache.get(CHECKED_KEY) or 0
+    age = time.time() - checked
+    if snap is None:
+        snap = CatalogSnapshot.objects.first()
+        if snap is None:
+            return rebuild()
+        _cache_current(snap)
+        age = 0 if not cache.get(DIRTY_KEY) else STALE_AFTER
+    if (cache.get(DIRTY_KEY) and age >= MIN_REBUILD_SECONDS) or age >= STALE_AFTER:
+        snap = rebuild()
+    return snap
+
+
+def full_body(snap):
+    """Decompressed JSON body (for clients that don't accept gzip)."""
+    return gzip.decompress(bytes(snap.payload))
+
+
+def delta(snap, since_version, *, offset=0, limit=500):
+    """
+    Rows changed since `since_version` (paged by offset/limit over the changed rows).
+    Returns None when `since_version` is no longer kept (client must take the full catalog).
+    """
+    old = CatalogSnapshot.objects.filter(version=since_version).values_list("row_hashes", flat=True).first()
+    if old is None:
+        return None
+    new = snap.row_hashes
+    changed_ids = sorted(int(k) for k, h in new.items() if old.get(k) != h)
+    removed = sorted(int(k) for k in old if k not in new)
+    page_ids = set(changed_ids[offset:offset + limit])
+    products = [p for p in json.loads(full_body(snap))["products"] if p["id"] in page_ids] if page_ids else []
+    nxt = offset + limit if offset + limit < len(changed_ids) else None
+    return {
+        "version": snap.version, "since": since_version, "full": False,
+        "count": len(changed_ids), "offset": offset, "next": nxt,
+        "products": products, "removed": removed if offset == 0 else [],
+    }
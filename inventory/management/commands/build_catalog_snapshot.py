@@ -0,0 +1,13 @@
+# management/commands/build_catalog_snapshot.py
+from django.core.management.base import BaseCommand
+
+from inventory import catalog
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ecommerce catalog snapshot (new version only if something changed)"
+
+    def handle(self, *args, **opts):
+        snap = catalog.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog version {snap.version} ({snap.product_count} products, {len(snap.payload)} bytes gzipped)"))
@@ -128,6 +128,7 @@ class Party(models.Model):
         indexes = [
             models.Index(fields=["party_type"]),
             models.Index(fields=["city", "area"]),
+            models.Index(fields=["area", "name"]),
             models.Index(fields=["name"]),
             models.Index(fields=["phone"]),
             models.Index(fields=["proprietor"]),
@@ -153,3 +154,23 @@ class PriceListItem(models.Model):
 
     def __str__(self):
         return f"{self.price_list.name} - {self.product.name}"
+
+
+class CatalogSnapshot(models.Model):
+    """
+    Pre-built, gzip-compressed product catalog for ecommerce clients (inventory/catalog.py).
+    `version` is a hash of the rows, so an unchanged catalog never gets a new version;
+    `row_hashes` ({product_id: hash}) lets a client ask for the delta since any kept version.
+    """
+    version = models.CharField(max_length=40, unique=True)
+    built_at = models.DateTimeField(auto_now_add=True)
+    product_count = models.PositiveIntegerField(default=0)
+    payload = models.BinaryField()
+    row_hashes = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.version[:12]} ({self.product_count} products)"
+
@@ -0,0 +1,159 @@
+# inventory/pdf_products.py
+"""
+Supplier price-list PDF parsing (OK Distributors layout), page-parallel.
+
+This module is pure text parsing: no Django models are imported, so worker
+processes started with "spawn" only import pdfplumber and this file.
+
+parse_pdf(path, workers=N) splits the pages into contiguous ranges, and each
+worker opens the PDF once and parses its range. Results come back per page
+and are reassembled in page order, so the output is the same as a serial run.
+Every page reports its own errors (extraction failures, product-looking lines
+that did not parse) instead of aborting the import.
+"""
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+try:
+    import pdfplumber  # pip install pdfplumber
+except ImportError:
+    pdfplumber = None
+
+
+ROW_START = re.compile(r"^\s*(\d{2,5})\s+")  # serial number at line start
+NUMBER = re.compile(r"(-?\d+\.\d{2})")       # capture 12.34 style numbers
+PACKING = re.compile(r"(\b\d+(?:s|ml|gm|g|kg|KG|ML|G|L)\b)$")
+PAGES_PER_TASK = 8
+SERIAL_BELOW = 4  # pages; fewer than this are parsed in-process
+
+
+def clean_spaces(s: str) -> str:
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def parse_line(line: str):
+    """
+    Parse one product line from the PDF text.
+    Returns dict with:
+      code, name, packing (best-effort), rate, retail, d_rate
+    or None when the line is not a product row. Raises ValueError for a line
+    that starts like a product row but cannot be read.
+    We tolerate extra columns (e.g., tax %, discount %).
+    Strategy:
+      - leading integer = serial number, next token = product code
+      - name+packing = text up to first price number; we then try to split
+      - prices = all 12.34 numbers on the line; rate = prices[0], d_rate = prices[-1]
+      - retail = second price if present and it makes sense
+    """
+    m = ROW_START.match(line)
+    if not m:
+        return None
+
+    # Everything after the serial number:
+    rest = line[m.end():].rstrip()
+
+    # First price index to cut name/packing
+    first_price_match = NUMBER.search(rest)
+    if not first_price_match:
+        return None
+
+    name_pack = clean_spaces(rest[:first_price_match.start()])
+    prices = [Decimal(p) for p in NUMBER.findall(rest)]
+
+    # Heuristic price mapping:
+    rate = prices[0]
+    # Many pages show columns: Rate, (maybe tax), (maybe discount%), D.Rate as last
+    d_rate = prices[-1]
+    retail = prices[1] if len(prices) >= 2 else None
+
+    # Split name/packing (packing often at the end like "1s", "10s", "100s", "120ml", "450ml", etc.)
+    pack_m = PACKING.search(name_pack)
+    if pack_m:
+        packing = pack_m.group(1)
+        name_pack = clean_spaces(name_pack[: pack_m.start()])
+    else:
+        packing = ""
+
+    code, _, name = name_pack.partition(" ")
+    if not code or not name:
+        raise ValueError("missing product code or name")
+
+    # Final sanity: if retail > rate, keep it; else leave None
+    if retail is not None and retail <= rate:
+        # retail column sometimes not present/accurate; drop it to avoid bad data
+        retail = None
+
+    return {
+        "code": code,
+        "name": name,
+        "packing": packing,
+        "rate": rate,
+        "retail": retail,
+        "d_rate": d_rate,
+    }
+
+
+def parse_text(text):
+    """(rows, errors) for one page's text; errors are {"line", "text", "error"}."""
+    rows, errors = [], []
+    for n, raw_line in enumerate((text or "").splitlines(), start=1):
+        line = raw_line.strip()
+        try:
+            row = parse_line(line)
+        except (ValueError, ArithmeticError) as e:
+            errors.append({"line": n, "text": line, "error": str(e)})
+            continue
+        if row:
+            row["line"] = n
+            rows.append(row)
+    return rows, errors
+
+
+def parse_page_range(path, first, last):
+    """Worker: parse pages [first, last) (0-based). Returns [(page_no, rows, errors)]."""
+    out = []
+    with pdfplumber.open(str(path)) as pdf:
+        for i in range(first, last):
+            try:
+                rows, errors = parse_text(pdf.pages[i].extract_text())
+            except Exception as e:  # one unreadable page must not sink the import
+                rows, errors = [], [{"line": None, "text": "", "error": f"extract failed: {e}"}]
+            out.append((i + 1, rows, errors))
+    return out
+
+
+def page_count(path):
+    with pdfplumber.open(str(path)) as pdf:
+        return len(pdf.pages)
+
+
+def parse_pdf(path, *, workers=None):
+    """
+    Parse every page of `path`. Returns (rows, page_errors) in page order:
+    rows carry "page" and "line"; page_errors are {"page", "line", "text", "error"}.
+    """
+    if pdfplumber is None:
+        raise RuntimeError("pdfplumber is required. Install with: pip install pdfplumber")
+
+    pages = page_count(path)
+    workers = max(1, min(workers or os.cpu_count() or 1, pages))
+    step = max(1, min(PAGES_PER_TASK, -(-pages // workers)))
+    ranges = [(i, min(i + step, pages)) for i in range(0, pages, step)]
+
+    if workers == 1 or pages < SERIAL_BELOW:
+        results = [parse_page_range(path, first, last) for first, last in ranges]
+    else:
+        # spawn: never fork a process that may hold an open DB connection
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(parse_page_range, path, first, last) for first, last in ranges]
+            results = [f.result() for f in futures]
+
+    rows, page_errors = [], []
+    for chunk in results:
+        for page_no, page_rows, errors in chunk:
+            rows.extend(dict(r, page=page_no) for r in page_rows)
+            page_errors.extend(dict(e, page=page_no) for e in errors)
+    return rows, page_errors
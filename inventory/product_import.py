@@ -0,0 +1,162 @@
+# inventory/product_import.py
+"""
+Apply parsed supplier price-list rows (inventory/pdf_products.py) to Product.
+
+apply_rows(rows, company=..., group=..., distributor=...):
+  1) drops duplicate codes inside the file (the last occurrence wins),
+  2) matches every row against existing products with ONE query:
+     barcode == supplier code, else (company, upper(name)) == (company, row name),
+  3) diffs matched products in memory and only keeps those whose values
+     actually change,
+  4) writes with one bulk_create for new products and one bulk_update over the
+     changed columns, inside one transaction.
+bulk_* skip model signals, so the sync change log (syncqueue.changes.record)
+and the catalog dirty flag are updated explicitly for the touched ids.
+
+dry_run=True runs steps 1-3 and returns the same report (creates and
+field-level old -> new changes) without writing.
+"""
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+from syncqueue.changes import record as record_changes
+
+from .catalog import mark_dirty
+from .models import Product
+
+BATCH = 500
+PRICE_COLUMNS = ("rate", "retail", "d_rate")
+UPDATE_FIELDS = ("name", "barcode", "packing", "trade_price", "retail_price", "company", "group", "distributor")
+
+
+@dataclass
+class ProductImportReport:
+    dry_run: bool
+    parsed: int = 0
+    created: list = field(default_factory=list)      # {"code", "name", "tradePrice", "retailPrice", "packing"}
+    updated: list = field(default_factory=list)      # {"id", "code", "name", "changes": {field: [old, new]}}
+    unchanged: int = 0
+    skipped: list = field(default_factory=list)      # {"page", "line", "code", "reason"}
+    page_errors: list = field(default_factory=list)  # {"page", "line", "text", "error"}
+
+    def as_dict(self):
+        return {
+            "dryRun": self.dry_run,
+            "parsed": self.parsed,
+            "created": len(self.created),
+            "updated": len(self.updated),
+            "unchanged": self.unchanged,
+            "skipped": len(self.skipped),
+            "pageErrors": len(self.page_errors),
+            "creates": self.created,
+            "updates": self.updated,
+            "skips": self.skipped,
+            "errors": self.page_errors,
+        }
+
+
+def _fmt(v):
+    return None if v is None else str(v)
+
+
+def _dedupe(rows, report):
+    by_code = {}
+    for row in rows:
+        prev = by_code.get(row["code"])
+        if prev is not None:
+            report.skipped.append({
+                "page": prev.get("page"), "line": prev.get("line"), "code": prev["code"],
+                "reason": f"duplicate code, superseded by page {row.get('page')} line {row.get('line')}",
+            })
+        by_code[row["code"]] = row
+    return list(by_code.values())
+
+
+def _existing(rows, company):
+    """({barcode: Product}, {upper name: Product}) for `rows` from one query."""
+    codes = {r["code"] for r in rows}
+    names = {r["name"].upper() for r in rows}
+    qs = (Product.objects.annotate(name_key=Upper("name"))
+          .filter(Q(barcode__in=codes) | Q(company=company, name_key__in=names))
+          .only("id", *UPDATE_FIELDS).order_by("id"))
+    by_code, by_name = {}, {}
+    for p in qs:
+        if p.barcode in codes:
+            by_code.setdefault(p.barcode, p)
+        if p.company_id == company.pk:
+            by_name.setdefault(p.name_key, p)
+    return by_code, by_name
+
+
+def apply_rows(rows, *, company, group, distributor, price_column="d_rate", dry_run=False, page_errors=()):
+    """Create / update products from parsed rows. Returns a ProductImportReport."""
+    if price_column not in PRICE_COLUMNS:
+        raise ValueError(f"price_column must be one of {PRICE_COLUMNS}")
+    report = ProductImportReport(dry_run=dry_run, parsed=len(rows), page_errors=list(page_errors))
+    rows = _dedupe(rows, report)
+    by_code, by_name = _existing(rows, company)
+
+    creates, updates, changed_fields, claimed = [], [], set(), set()
+    for row in rows:
+        trade_price = row.get(price_column) or row.get("rate") or row.get("d_rate")
+        if trade_price is None:
+            report.skipped.append({"page": row.get("page"), "line": row.get("line"), "code": row["code"],
+                                   "reason": "no price"})
+            continue
+        values = {
+            "name": row["name"],
+            "packing": row.get("packing", ""),
+            "trade_price": trade_price,
+            # if retail not parsed or unrealistic, copy trade_price
+            "retail_price": row.get("retail") or trade_price,
+            "company_id": company.pk,
+            "group_id": group.pk,
+            "distributor_id": distributor.pk,
+        }
+
+        product = by_code.get(row["code"]) or by_name.get(row["name"].upper())
+        if product is None:
+            creates.append(Product(
+                barcode=row["code"], sales_tax_ratio=0, fed_tax_ratio=0, disable_sale_purchase=False, **values,
+            ))
+            report.created.append({
+                "code": row["code"], "name": row["name"], "packing": values["packing"],
+                "tradePrice": _fmt(trade_price), "retailPrice": _fmt(values["retail_price"]),
+            })
+            continue
+        if product.pk in claimed:
+            report.skipped.append({"page": row.get("page"), "line": row.get("line"), "code": row["code"],
+                                   "reason": f"product #{product.pk} already matched by another row"})
+            continue
+        claimed.add(product.pk)
+
+        if not product.barcode:
+            values["barcode"] = row["code"]
+        changes = {}
+        for attr, new in values.items():
+            old = getattr(product, attr)
+            if attr in ("packing", "barcode"):  # blank and NULL are the same value here
+                old, new = old or "", new or ""
+            if old != new:
+                changes[attr.removesuffix("_id")] = [_fmt(old), _fmt(new)]
+                setattr(product, attr, new)
+        if not changes:
+            report.unchanged += 1
+            continue
+        changed_fields.update(changes)
+        updates.append(product)
+        report.updated.append({"id": product.pk, "code": row["code"], "name": row["name"], "changes": changes})
+
+    if dry_run or not (creates or updates):
+        return report
+
+    with transaction.atomic():
+        Product.objects.bulk_create(creates, batch_size=BATCH)
+        if updates:
+            Product.objects.bulk_update(updates, sorted(changed_fields), batch_size=BATCH)
+        record_changes(Product, [p.pk for p in creates + updates])
+        transaction.on_commit(mark_dirty)
+    return report
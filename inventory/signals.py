@@ -1,11 +1,12 @@
 # inventory/signals.py
 from __future__ import annotations
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from hordak.models import Account
-from .models import Party
+from .models import Party, Product, Batch, PriceListItem
+from .catalog import mark_dirty
 
 def _get_parent_account(party_type: str) -> Account:
     """
@@ -92,3 +93,9 @@ def _auto_create_or_fix_hordak_account(sender, instance: Party, created: bool, *
             if hasattr(acct, "currency") and hasattr(parent, "currency"):
                 acct.currency = parent.currency
             acct.save(update_fields=["parent"] + (["currency"] if hasattr(acct, "currency") and hasattr(parent, "currency") else []))
+
+
+# ---------- catalog snapshot freshness ----------
+for _model in (Product, Batch, PriceListItem):
+    post_save.connect(mark_dirty, sender=_model, dispatch_uid=f"catalog-dirty-save-{_model.__name__}")
+    post_delete.connect(mark_dirty, sender=_model, dispatch_uid=f"catalog-dirty-delete-{_model.__name__}")
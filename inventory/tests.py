@@ -5,13 +5,14 @@ from django.core.exceptions import ValidationError
 
 from utils.stock import stock_in, stock_out
 
-from setting.models import Company, Group, Distributor, Branch, Warehouse
-from .models import Product, PriceList, PriceListItem, Batch
+from finance.test_utils import make_company, make_warehouse
+from setting.models import Group, Distributor
+from .models import Party, Product, PriceList, PriceListItem, Batch
 
 
 class PriceListAPITest(TestCase):
     def setUp(self):
-        company = Company.objects.create(name="Comp")
+        company = make_company("Comp")
         group = Group.objects.create(name="Grp")
         distributor = Distributor.objects.create(name="Dist")
         self.product = Product.objects.create(
@@ -30,7 +31,7 @@ class PriceListAPITest(TestCase):
         PriceListItem.objects.create(price_list=self.price_list, product=self.product, custom_price=8)
 
     def test_price_list_detail_endpoint(self):
-        url = reverse('price_list_detail', args=[self.price_list.id])
+        url = reverse('inventory:price_list_detail', args=[self.price_list.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         data = response.json()
@@ -41,11 +42,10 @@ class PriceListAPITest(TestCase):
 
 class InventoryLevelsAPITest(TestCase):
     def setUp(self):
-        company = Company.objects.create(name="Comp")
+        company = make_company("Comp")
         group = Group.objects.create(name="Grp")
         distributor = Distributor.objects.create(name="Dist")
-        branch = Branch.objects.create(name="Main", address="Addr")
-        warehouse = Warehouse.objects.create(name="W1", branch=branch)
+        warehouse = make_warehouse("W1")
 
         self.p1 = Product.objects.create(
             name="Prod1",
@@ -101,7 +101,7 @@ class InventoryLevelsAPITest(TestCase):
         )
 
     def test_inventory_levels_endpoint(self):
-        url = reverse('inventory_levels')
+        url = reverse('inventory:inventory_levels')
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         data = response.json()
@@ -112,11 +112,10 @@ class InventoryLevelsAPITest(TestCase):
 
 class StockMovementTests(TestCase):
     def setUp(self):
-        company = Company.objects.create(name="Comp")
+        company = make_company("Comp")
         group = Group.objects.create(name="Grp")
         distributor = Distributor.objects.create(name="Dist")
-        branch = Branch.objects.create(name="Main", address="Addr")
-        self.warehouse = Warehouse.objects.create(name="W1", branch=branch)
+        self.warehouse = make_warehouse("W1")
         self.product = Product.objects.create(
             name="Prod",
             barcode="999",
@@ -142,3 +141,109 @@ class StockMovementTests(TestCase):
         )
         with self.assertRaises(ValidationError):
             stock_out(self.product, 5, "shortage")
+
+
+class CatalogSnapshotTest(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+
+        cache.clear()
+        user = get_user_model().objects.create_user("cat@example.com", "pass")
+        self.client.force_login(user)
+        company = make_company("Comp")
+        group = Group.objects.create(name="Grp")
+        distributor = Distributor.objects.create(name="Dist")
+        self.common = dict(company=company, group=group, distributor=distributor, trade_price=10,
+                           retail_price=12, sales_tax_ratio=0, fed_tax_ratio=0, disable_sale_purchase=False)
+        self.p1 = Product.objects.create(name="A", barcode="1", **self.common)
+        self.p2 = Product.objects.create(name="B", barcode="2", **self.common)
+
+    def test_etag_304_and_delta(self):
+        from inventory import catalog
+
+        url = reverse("inventory:catalog_snapshot")
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        version = first["X-Catalog-Version"]
+        self.assertEqual(len(first.json()["products"]), 2)
+
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        self.p2.trade_price = 11
+        self.p2.save()
+        catalog.rebuild()
+        changed = self.client.get(url, {"since": version}).json()
+        self.assertFalse(changed["full"])
+        self.assertEqual([p["id"] for p in changed["products"]], [self.p2.id])
+
+    def test_customer_etag_follows_the_stored_prices(self):
+        from finance.test_utils import hordak_chart
+        from pricing import resolver
+
+        hordak_chart()
+        plist = PriceList.objects.create(name="Wholesale")
+        item = PriceListItem.objects.create(price_list=plist, product=self.p1, custom_price=8)
+        customer = Party.objects.create(name="Cust", address="a", phone="1", party_type="customer",
+                                        price_list=str(plist.pk))
+        url = reverse("inventory:catalog_snapshot")
+        first = self.client.get(url, {"customer": customer.pk})
+        self.assertEqual(first.status_code, 200)
+
+        # an edit made by another worker, seen by a fresh process with empty caches
+        PriceListItem.objects.filter(pk=item.pk).update(custom_price=9)
+        resolver._maps.clear()
+        resolver._digests.clear()
+        again = self.client.get(url, {"customer": customer.pk}, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 200)
+        prices = {p["id"]: p.get("customerPrice") for p in again.json()["products"]}
+        self.assertEqual(prices[self.p1.id], 9.0)
+        self.assertEqual(self.client.get(url, {"customer": customer.pk},
+                                         HTTP_IF_NONE_MATCH=again["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(url, {"customer": "abc"}).status_code, 400)
+
+
+class ProductPdfImportTest(TestCase):
+    def test_parse_and_bulk_upsert(self):
+        from .pdf_products import parse_text
+        from .product_import import apply_rows
+
+        company = make_company("Comp")
+        group = Group.objects.create(name="Grp")
+        distributor = Distributor.objects.create(name="Dist")
+        existing = Product.objects.create(
+            name="PANADOL TAB", barcode="", company=company, group=group, distributor=distributor,
+            trade_price=90, retail_price=110, sales_tax_ratio=0, fed_tax_ratio=0,
+        )
+        rows, errors = parse_text(
+            "12 A100 PANADOL TAB 10s 100.00 120.00 95.50\n"
+            "13 A200 BRUFEN SYP 120ml 80.00 90.00 76.00\n"
+            "14 X 1.00"
+        )
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(errors[0]["line"], 3)
+
+        kw = dict(company=company, group=group, distributor=distributor)
+        dry = apply_rows(rows, dry_run=True, **kw)
+        self.assertEqual((len(dry.created), len(dry.updated)), (1, 1))
+        self.assertEqual(dry.updated[0]["changes"]["trade_price"], ["90.00", "95.50"])
+        self.assertEqual(Product.objects.count(), 1)
+
+        apply_rows(rows, **kw)
+        existing.refresh_from_db()
+        self.assertEqual((existing.barcode, str(existing.trade_price)), ("A100", "95.50"))
+        self.assertTrue(Product.objects.filter(barcode="A200", packing="120ml").exists())
+        self.assertEqual(apply_rows(rows, **kw).unchanged, 2)
+
+    def test_command_requires_existing_company_group_and_distributor(self):
+        from django.core.management import CommandError, call_command
+
+        make_company("Comp")
+        Group.objects.create(name="Grp")
+        with self.assertRaisesMessage(CommandError, "Distributor 'Nope' not found"):
+            call_command("import_okd_products", __file__, company="Comp", group="Grp",
+                         distributor="Nope", dry_run=True)
+        with self.assertRaisesMessage(CommandError, "Company 'Other' not found"):
+            call_command("import_okd_products", __file__, company="Other", group="Grp", dry_run=True)
+        self.assertFalse(Distributor.objects.exists())
@@ -8,5 +8,6 @@ urlpatterns = [
     path('price-lists/<int:pk>/', views.price_list_detail, name='price_list_detail'),
     path('levels/', views.inventory_levels, name='inventory_levels'),
     path('products/', views.product_list, name='product_list'),
+    path('catalog/', views.catalog_snapshot, name='catalog_snapshot'),
     path('parties/', views.party_list, name='party_list'),
 ]
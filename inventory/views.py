@@ -1,9 +1,14 @@
+import json
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.http import require_http_methods
-from django.db.models import Sum,Q
+from django.db.models import Sum
 from .models import PriceList, Batch, Product, Party
 from .mypagination import MyCustomPagination
+from search.engine import filter_queryset
+from . import catalog
+from pricing.resolver import price_list_id_for, list_prices, fingerprint
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
@@ -53,7 +58,7 @@ def product_list(request):
     q = (request.GET.get("q") or "").strip()
     qs = (Product.objects.order_by("name").filter(disable_sale_purchase=False))
     if q:
-        qs = qs.filter(Q(name__icontains=q) | Q(barcode__icontains=q) )
+        qs = filter_queryset(qs, "product", q)
 
     paginator = MyCustomPagination()
     page = paginator.paginate_queryset(qs, request)
@@ -72,6 +77,62 @@ def product_list(request):
     return paginator.get_paginated_response(data)
 
 
+@api_view(["GET"])
+def catalog_snapshot(request):
+    """
+    Versioned catalog for the customer app.
+      GET /inventory/catalog/                         full catalog (gzip if accepted)
+      GET /inventory/catalog/?since=<version>&offset=0&limit=500
+                                                     rows changed since that version
+    Sends ETag; a matching If-None-Match gets 304 with no body.
+    An unknown/expired `since` falls back to the full catalog ("full": true).
+    ?customer=<party id> adds "customerPrice" from the customer's price list.
+    """
+    try:
+        customer_id = int(request.GET["customer"]) if request.GET.get("customer") else None
+        offset = max(int(request.GET.get("offset") or 0), 0)
+        limit = min(max(int(request.GET.get("limit") or 500), 1), 5000)
+    except ValueError:
+        return Response({"detail": "customer/offset/limit must be integers."}, status=400)
+    snap = catalog.current()
+    customer = Party.objects.filter(pk=customer_id).first() if customer_id else None
+    plid = price_list_id_for(customer) if customer else None
+    since = (request.GET.get("since") or "").strip()
+
+    body = None
+    if since and since != snap.version:
+        body = catalog.delta(snap, since, offset=offset, limit=limit)
+    if since == snap.version:
+        body = {"version": snap.version, "since": since, "full": False, "count": 0,
+                "offset": 0, "next": None, "products": [], "removed": []}
+    etag = snap.version if body is None else f"{snap.version}:{since}:{offset}:{limit}"
+    if plid:
+        etag += f":pl{plid}.{fingerprint(plid)}"
+    etag = f'"{etag}"'
+
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        resp = HttpResponse(status=304)
+    elif plid:
+        body = body or json.loads(catalog.full_body(snap))
+        custom = list_prices(plid)
+        for p in body["products"]:
+            if p["id"] in custom:
+                p["customerPrice"] = float(custom[p["id"]])
+        resp = JsonResponse(body)
+    elif body is not None:
+        resp = JsonResponse(body)
+    elif "gzip" in request.headers.get("Accept-Encoding", ""):
+        resp = HttpResponse(bytes(snap.payload), content_type="application/json")
+        resp["Content-Encoding"] = "gzip"
+    else:
+        resp = HttpResponse(catalog.full_body(snap), content_type="application/json")
+    resp["ETag"] = etag
+    resp["X-Catalog-Version"] = snap.version
+    resp["Cache-Control"] = "private, no-cache"  # always revalidate; 304 is cheap
+    patch_vary_headers(resp, ["Accept-Encoding"])
+    return resp
+
+
 @api_view(["GET"])
 def party_list(request):
     """
@@ -100,11 +161,7 @@ def party_list(request):
         qs = qs.filter(area_id=area_id)
 
     if q:
-        qs = qs.filter(
-            Q(name__icontains=q) |
-            Q(phone__icontains=q) |
-            Q(proprietor__icontains=q)
-        )
+        qs = filter_queryset(qs, "party", q)
 
     paginator = MyCustomPagination()
     page = paginator.paginate_queryset(qs, request)
@@ -126,7 +183,7 @@ def party_list(request):
             "longitude": p.longitude,
             "creditLimit": float(p.credit_limit) if p.credit_limit is not None else None,
             "currentBalance": float(p.current_balance) if p.current_balance is not None else None,
-            "priceListId": int(p.price_list) if p.price_list and str(p.price_list).isdigit() else None,
+            "priceListId": price_list_id_for(p),
         }
         for p in page
     ]
@@ -1,4 +1,19 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationCounter, NotificationEvent
 
-admin.site.register(Notification)
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "title", "read", "created_at")
+    list_filter = ("read",)
+    search_fields = ("title", "user__email")
+    raw_id_fields = ("user", "event")
+
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "title", "created_at", "processed_at")
+    list_filter = ("processed_at",)
+
+
+admin.site.register(NotificationCounter)
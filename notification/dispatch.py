@@ -0,0 +1,113 @@
+# notification/dispatch.py
+"""
+Notification fan-out and unread counters.
+
+notify() (utils/notifications.py) only inserts a NotificationEvent. A
+`dispatch_notifications` worker then, per chunk of events:
+  1) claims them FOR UPDATE SKIP LOCKED (several workers can run),
+  2) drops inactive / unknown recipients with one query,
+  3) writes every recipient's Notification with ONE bulk_create,
+  4) bumps NotificationCounter.unread with one UPDATE per distinct increment
+     (usually one), creating missing counters from a COUNT so they start right,
+  5) marks the events processed.
+mark_read() flips read in one UPDATE and lowers the counter by the rows it
+actually changed. recount() rebuilds counters from the table if they drift.
+"""
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter, NotificationEvent
+
+CHUNK = 500
+
+
+def _unread_counts(user_ids):
+    return dict(Notification.objects.filter(user_id__in=user_ids, read=False)
+                .values("user_id").annotate(n=Count("id")).values_list("user_id", "n"))
+
+
+def bump_unread(per_user):
+    """Add {user_id: n} to the unread counters."""
+    per_user = {u: n for u, n in per_user.items() if n}
+    if not per_user:
+        return
+    existing = set(NotificationCounter.objects.filter(user_id__in=per_user).values_list("user_id", flat=True))
+    missing = per_user.keys() - existing
+    if missing:
+        counts = _unread_counts(missing)  # already includes the rows just written
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=u, unread=counts.get(u, 0)) for u in missing], ignore_conflicts=True,
+        )
+    by_increment = defaultdict(list)
+    for u in existing:
+        by_increment[per_user[u]].append(u)
+    for n, users in by_increment.items():
+        NotificationCounter.objects.filter(user_id__in=users).update(unread=F("unread") + n)
+
+
+def drop_unread(user_id, n):
+    if n:
+        NotificationCounter.objects.filter(user_id=user_id).update(unread=Greatest(F("unread") - n, Value(0)))
+
+
+def dispatch_pending(chunk=CHUNK):
+    """Fan out one chunk of queued events. Returns (events, notifications)."""
+    with transaction.atomic():
+        events = list(NotificationEvent.objects.select_for_update(skip_locked=True)
+                      .filter(processed_at__isnull=True).order_by("id")[:chunk])
+        if not events:
+            return 0, 0
+        wanted = {u for e in events for u in e.recipients}
+        active = set(get_user_model().objects.filter(pk__in=wanted, is_active=True).values_list("pk", flat=True))
+        rows = [Notification(user_id=u, title=e.title, message=e.message, event=e)
+                for e in events for u in e.recipients if u in active]
+        Notification.objects.bulk_create(rows, batch_size=1000)
+        bump_unread(Counter(r.user_id for r in rows))
+        NotificationEvent.objects.filter(pk__in=[e.pk for e in events]).update(processed_at=timezone.now())
+    return len(events), len(rows)
+
+
+def dispatch_all(chunk=CHUNK):
+    events = notes = 0
+    while True:
+        e, n = dispatch_pending(chunk)
+        if not e:
+            return events, notes
+        events, notes = events + e, notes + n
+
+
+def unread_count(user):
+    counter = NotificationCounter.objects.filter(user=user).values_list("unread", flat=True).first()
+    if counter is None:
+        counter = _unread_counts([user.pk]).get(user.pk, 0)
+        NotificationCounter.objects.get_or_create(user=user, defaults={"unread": counter})
+    return counter
+
+
+@transaction.atomic
+def mark_read(user, ids=None):
+    """Mark the user's notifications (all, or `ids`) read. Returns how many changed."""
+    qs = Notification.objects.filter(user=user, read=False)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    n = qs.update(read=True)
+    drop_unread(user.pk, n)
+    return n
+
+
+def recount(user_ids=None):
+    """Rebuild counters from the Notification table (all users with notifications, or `user_ids`)."""
+    qs = Notification.objects.all()
+    if user_ids is not None:
+        qs = qs.filter(user_id__in=user_ids)
+    counts = dict(qs.values("user_id").annotate(n=Count("id", filter=Q(read=False))).values_list("user_id", "n"))
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=u, unread=n) for u, n in counts.items()],
+        update_conflicts=True, unique_fields=["user"], update_fields=["unread"], batch_size=1000,
+    )
+    return len(counts)
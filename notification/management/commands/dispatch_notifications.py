@@ -0,0 +1,28 @@
+# management/commands/dispatch_notifications.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from notification import dispatch
+
+
+class Command(BaseCommand):
+    help = "Fan queued notification events out to users (safe to run several workers in parallel)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=dispatch.CHUNK)
+        parser.add_argument("--loop", action="store_true", help="keep polling for new events")
+        parser.add_argument("--sleep", type=float, default=2.0, help="seconds between polls with --loop")
+        parser.add_argument("--recount", action="store_true", help="rebuild unread counters first")
+
+    def handle(self, *args, **opts):
+        if opts["recount"]:
+            n = dispatch.recount()
+            self.stdout.write(self.style.SUCCESS(f"Recounted unread notifications for {n} users"))
+        while True:
+            events, notes = dispatch.dispatch_all(opts["chunk"])
+            if events or not opts["loop"]:
+                self.stdout.write(self.style.SUCCESS(f"Dispatched {events} events as {notes} notifications"))
+            if not opts["loop"]:
+                return
+            time.sleep(opts["sleep"])
@@ -8,6 +8,45 @@ class Notification(models.Model):
     message = models.TextField()
     read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    event = models.ForeignKey('NotificationEvent', on_delete=models.SET_NULL, null=True, blank=True,
+                              related_name='notifications')
+
+    class Meta:
+        indexes = [
+            # per-user keyset listing, newest first (with and without ?read=)
+            models.Index(fields=['user', 'read', '-created_at', '-id'], name='notif_user_read_created_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class NotificationEvent(models.Model):
+    """
+    One queued notification for a set of users; notification/dispatch.py fans
+    it out into Notification rows.
+    """
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    recipients = models.JSONField(default=list)  # user ids
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(processed_at__isnull=True), name='notif_event_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} -> {len(self.recipients)} user(s)"
+
+
+class NotificationCounter(models.Model):
+    """Unread notifications per user, kept in step by dispatch / mark-read."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+                                related_name='notification_counter')
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
@@ -5,4 +5,15 @@ from .models import Notification
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = '__all__'
+        fields = ['id', 'user', 'title', 'message', 'read', 'created_at']
+        read_only_fields = fields
+
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if not data.get('ids') and not data['all']:
+            raise serializers.ValidationError("Send ids or all=true.")
+        return data
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from inventory.models import Party
+from utils.notifications import notify_user_and_party
+
+from .dispatch import dispatch_all, mark_read, unread_count
+from .models import Notification
+
+
+class NotificationPipelineTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.clerk = User.objects.create_user(email="clerk@example.com", password="x", role="SALES")
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="x")
+        self.party = Party(name="Cust", party_type="customer", user=self.buyer)
+
+    def test_fan_out_counts_and_mark_read(self):
+        notify_user_and_party(self.clerk, self.party, "Sale Invoice Created", "#1")
+        notify_user_and_party(self.clerk, None, "Sale Return Created", "#2")
+        self.assertFalse(Notification.objects.exists())  # queued, not written inline
+
+        self.assertEqual(dispatch_all(), (2, 3))
+        self.assertEqual(unread_count(self.clerk), 2)
+        self.assertEqual(unread_count(self.buyer), 1)
+
+        first = Notification.objects.filter(user=self.clerk).order_by("id").first()
+        self.assertEqual(mark_read(self.clerk, [first.pk]), 1)
+        self.assertEqual(mark_read(self.clerk, [first.pk]), 0)
+        self.assertEqual(unread_count(self.clerk), 1)
+        mark_read(self.clerk)
+        self.assertEqual(unread_count(self.clerk), 0)
@@ -1,8 +1,51 @@
-from rest_framework import viewsets
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from .dispatch import drop_unread, mark_read, unread_count
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import MarkReadSerializer, NotificationSerializer
+
 
+class NotificationCursorPagination(CursorPagination):
+    """Keyset paging on (created_at, id), served by the (user, read, created_at) index."""
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
 
-class NotificationViewSet(viewsets.ModelViewSet):
+
+class NotificationViewSet(mixins.DestroyModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    The current user's notifications, newest first (?read=true|false, ?cursor=).
+    Notifications are written by the dispatcher (utils.notifications.notify).
+    """
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        qs = Notification.objects.filter(user=self.request.user)
+        read = self.request.query_params.get("read")
+        if read is not None:
+            qs = qs.filter(read=read.lower() in ("1", "true", "yes"))
+        return qs
+
+    def perform_destroy(self, instance):
+        if not instance.read:
+            drop_unread(instance.user_id, 1)
+        instance.delete()
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        return Response({"unread": unread_count(request.user)})
+
+    @action(detail=False, methods=["post"], url_path="mark-read")
+    def mark_read(self, request):
+        ser = MarkReadSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        ids = None if ser.validated_data["all"] else ser.validated_data["ids"]
+        updated = mark_read(request.user, ids)
+        return Response({"updated": updated, "unread": unread_count(request.user)})
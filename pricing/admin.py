@@ -23,3 +23,19 @@ if hasattr(models, 'PriceItem'):
         list_display = (group_field, 'product', price_field)
         search_fields = (f'{group_field}__name', 'product__name')
         list_filter = (group_field,)
+
+
+@admin.register(models.PriceChange)
+class PriceChangeAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created_at', 'created_by', 'price_list', 'mode', 'value', 'rounding', 'effective_from', 'rows')
+    list_filter = ('mode', 'price_list')
+    readonly_fields = [f.name for f in models.PriceChange._meta.fields]
+
+
+@admin.register(models.PriceHistory)
+class PriceHistoryAdmin(admin.ModelAdmin):
+    list_display = ('product', 'price_list', 'field', 'price', 'effective_from', 'effective_to', 'change')
+    list_filter = ('field', 'price_list')
+    search_fields = ('product__name',)
+    raw_id_fields = ('product', 'change')
+
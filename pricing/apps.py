@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PricingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pricing'
+
+    def ready(self):
+        # connects the price-list cache invalidation signals
+        from . import resolver  # noqa
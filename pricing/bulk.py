@@ -0,0 +1,174 @@
+# pricing/bulk.py
+"""
+Bulk repricing with effective-dated history.
+
+reprice() works on a scope (company / group / distributor / product ids) of
+either the product master prices or one price list, and per price field runs:
+  1) one SELECT computing old and new price in SQL,
+  2) one UPDATE closing the open history rows (effective_to = effective_from),
+  3) one bulk_create of history rows (a baseline "since always" row for
+     products that had no history yet, plus the new price),
+  4) one UPDATE ... SET field = <expression> over the whole scope (logged
+     for the offline apps' delta sync, which the UPDATE's missing signals
+     would otherwise skip).
+New price = old * (1 + v/100) | old + v | v, then rounded to the nearest
+`rounding` step (0.01, 0.5, 1, 5, ...) and never below 0.
+
+price_on() answers "what was the price on date D" for many products in one query.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Max, Q, Value
+from django.db.models.functions import Greatest, Round
+
+from inventory.models import PriceListItem, Product
+from syncqueue.changes import record as record_changes
+
+from .models import PriceChange, PriceHistory
+
+PRODUCT_FIELDS = ("trade_price", "e_rate", "retail_price")
+LIST_FIELD = "custom_price"
+MODES = ("percent", "absolute", "set")
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _scope(price_list, *, company=None, group=None, distributor=None, product_ids=None):
+    if price_list is None:
+        qs, prefix = Product.objects.all(), ""
+    else:
+        qs, prefix = PriceListItem.objects.filter(price_list=price_list), "product__"
+    if company:
+        qs = qs.filter(**{f"{prefix}company_id": company})
+    if group:
+        qs = qs.filter(**{f"{prefix}group_id": group})
+    if distributor:
+        qs = qs.filter(**{f"{prefix}distributor_id": distributor})
+    if product_ids:
+        qs = qs.filter(**{f"{prefix}id__in": product_ids})
+    return qs
+
+
+def price_expression(field, mode, value, rounding):
+    value = Decimal(value)
+    if mode == "percent":
+        expr = F(field) * Value(1 + value / 100)
+    elif mode == "absolute":
+        expr = F(field) + Value(value)
+    else:
+        expr = Value(value)
+    step = Decimal(rounding or "0.01")
+    expr = Round(ExpressionWrapper(expr / Value(step), output_field=MONEY)) * Value(step)
+    return Greatest(ExpressionWrapper(expr, output_field=MONEY), Value(Decimal("0")), output_field=MONEY)
+
+
+@transaction.atomic
+def reprice(*, fields, mode, value, rounding=Decimal("0.01"), price_list=None, company=None, group=None,
+            distributor=None, product_ids=None, effective_from=None, user=None, note="", dry_run=False):
+    """
+    Returns {"change": id|None, "rows": n, "preview": [{product, field, old, new}, ... first 50]}.
+    """
+    effective_from = effective_from or date.today()
+    if mode not in MODES:
+        raise ValidationError(f"mode must be one of {', '.join(MODES)}")
+    allowed = (LIST_FIELD,) if price_list is not None else PRODUCT_FIELDS
+    fields = list(fields or allowed[:1])
+    bad = [f for f in fields if f not in allowed]
+    if bad:
+        raise ValidationError(f"Unknown price field(s) {bad}; allowed: {', '.join(allowed)}")
+    if effective_from > date.today():
+        raise ValidationError("Future-dated repricing is not supported; run it on the day it applies.")
+    if not (company or group or distributor or product_ids) and price_list is None:
+        raise ValidationError("Give a company, group, distributor or product ids (refusing to reprice everything).")
+    if Decimal(rounding or 0) <= 0:
+        raise ValidationError("rounding must be > 0")
+
+    scope = _scope(price_list, company=company, group=group, distributor=distributor, product_ids=product_ids)
+    pid_col = "id" if price_list is None else "product_id"
+    plid = getattr(price_list, "pk", price_list)
+
+    change = None if dry_run else PriceChange.objects.create(
+        created_by=user, price_list_id=plid, fields=fields, mode=mode, value=value, rounding=rounding,
+        effective_from=effective_from, note=note,
+        scope={"company": company, "group": group, "distributor": distributor, "products": product_ids},
+    )
+    rows, preview = 0, []
+    for field in fields:
+        expr = price_expression(field, mode, value, rounding)
+        changes = list(scope.annotate(new_price=expr).exclude(new_price=F(field))
+                       .values_list(pid_col, field, "new_price"))
+        if not changes:
+            continue
+        pids = [pid for pid, _, _ in changes]
+        open_rows = PriceHistory.objects.filter(product_id__in=pids, price_list_id=plid, field=field,
+                                                effective_to__isnull=True)
+        # closing a row that starts after effective_from would leave an inverted, overlapping interval
+        latest = open_rows.aggregate(latest=Max("effective_from"))["latest"]
+        if latest and effective_from < latest:
+            raise ValidationError(f"{field} was last repriced effective {latest}; "
+                                  f"effective_from can't be earlier than that.")
+        rows += len(changes)
+        preview.extend({"product": pid, "field": field, "old": str(old), "new": str(new)}
+                       for pid, old, new in changes[:50 - len(preview)])
+        if dry_run:
+            continue
+
+        has_history = set(open_rows.values_list("product_id", flat=True))
+        open_rows.update(effective_to=effective_from)
+        PriceHistory.objects.bulk_create(
+            [PriceHistory(product_id=pid, price_list_id=plid, field=field, price=old,
+                          effective_from=None, effective_to=effective_from)
+             for pid, old, _ in changes if pid not in has_history]
+            + [PriceHistory(product_id=pid, price_list_id=plid, field=field, price=new,
+                            effective_from=effective_from, change=change)
+               for pid, _, new in changes],
+            batch_size=1000,
+        )
+        touched = scope.filter(**{f"{pid_col}__in": pids})
+        record_changes(scope.model, touched.values_list("pk", flat=True))
+        touched.update(**{field: expr})
+
+    if change is not None:
+        change.rows = rows
+        change.save(update_fields=["rows"])
+        transaction.on_commit(lambda: _after_commit(plid))
+    return {"change": getattr(change, "pk", None), "rows": rows, "preview": preview}
+
+
+def _after_commit(price_list_id):
+    # queryset.update() bypasses the signals that keep these caches fresh
+    from inventory.catalog import mark_dirty
+    from .resolver import invalidate
+
+    mark_dirty()
+    invalidate(price_list_id)
+
+
+def price_on(product_ids, on_date, *, field=None, price_list=None):
+    """
+    {product_id: price that applied on `on_date`} in one query; products
+    without history fall back to their current price. `field` defaults to
+    trade_price (custom_price for a price list).
+    """
+    plid = getattr(price_list, "pk", price_list)
+    allowed = (LIST_FIELD,) if plid is not None else PRODUCT_FIELDS
+    field = field or allowed[0]
+    if field not in allowed:
+        raise ValidationError(f"Unknown price field {field!r}; allowed: {', '.join(allowed)}")
+    product_ids = set(product_ids)
+    hist = (PriceHistory.objects
+            .filter(product_id__in=product_ids, price_list_id=plid, field=field)
+            .filter(Q(effective_from__isnull=True) | Q(effective_from__lte=on_date))
+            .filter(Q(effective_to__isnull=True) | Q(effective_to__gt=on_date))
+            .values_list("product_id", "price"))
+    prices = dict(hist)
+    missing = product_ids - prices.keys()
+    if missing:
+        if plid is None:
+            prices.update(Product.objects.filter(id__in=missing).values_list("id", field))
+        else:
+            prices.update(PriceListItem.objects.filter(price_list_id=plid, product_id__in=missing)
+                          .values_list("product_id", LIST_FIELD))
+    return prices
@@ -0,0 +1,41 @@
+# management/commands/reprice.py
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from pricing.bulk import reprice
+
+
+class Command(BaseCommand):
+    help = "Bulk reprice products or one price list (percent / absolute / set) with price history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("mode", choices=["percent", "absolute", "set"])
+        parser.add_argument("value", type=Decimal)
+        parser.add_argument("--field", action="append", dest="fields",
+                            help="trade_price / e_rate / retail_price (repeatable); custom_price for --price-list")
+        parser.add_argument("--price-list", type=int)
+        parser.add_argument("--company", type=int)
+        parser.add_argument("--group", type=int)
+        parser.add_argument("--distributor", type=int)
+        parser.add_argument("--rounding", type=Decimal, default=Decimal("0.01"))
+        parser.add_argument("--effective-from", help="YYYY-MM-DD (default today)")
+        parser.add_argument("--note", default="")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        eff = parse_date(opts["effective_from"]) if opts["effective_from"] else None
+        try:
+            result = reprice(
+                fields=opts["fields"], mode=opts["mode"], value=opts["value"], rounding=opts["rounding"],
+                price_list=opts["price_list"], company=opts["company"], group=opts["group"],
+                distributor=opts["distributor"], effective_from=eff, note=opts["note"], dry_run=opts["dry_run"],
+            )
+        except ValidationError as e:
+            raise CommandError("; ".join(e.messages))
+        self.stdout.write(json.dumps(result["preview"], indent=2))
+        msg = "Dry run" if opts["dry_run"] else f"Change {result['change']}"
+        self.stdout.write(self.style.SUCCESS(f"{msg}: {result['rows']} price(s) changed"))
@@ -18,3 +18,57 @@
 
 #     def __str__(self):
 #         return f"{self.product.name} - {self.price}"
+
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models
+
+
+class PriceChange(models.Model):
+    """One bulk repricing run (pricing/bulk.py); its rows are in PriceHistory."""
+    MODES = (("percent", "Percent"), ("absolute", "Add amount"), ("set", "Set price"))
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    price_list = models.ForeignKey("inventory.PriceList", null=True, blank=True, on_delete=models.SET_NULL,
+                                   help_text="Empty = product master prices.")
+    fields = models.JSONField(default=list)
+    scope = models.JSONField(default=dict)
+    mode = models.CharField(max_length=10, choices=MODES)
+    value = models.DecimalField(max_digits=12, decimal_places=4)
+    rounding = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal("0.01"))
+    effective_from = models.DateField()
+    rows = models.PositiveIntegerField(default=0)
+    note = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.mode} {self.value} on {', '.join(self.fields)} ({self.rows} rows, {self.effective_from})"
+
+
+class PriceHistory(models.Model):
+    """
+    Effective-dated prices: the row with effective_from <= D < effective_to
+    (open ends = NULL) is the price that applied on date D.
+    price_list NULL = the product's own field (trade_price / e_rate / retail_price).
+    """
+    product = models.ForeignKey("inventory.Product", on_delete=models.CASCADE, related_name="price_history")
+    price_list = models.ForeignKey("inventory.PriceList", null=True, blank=True, on_delete=models.CASCADE)
+    field = models.CharField(max_length=20)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    effective_from = models.DateField(null=True, blank=True, help_text="Empty = since the beginning.")
+    effective_to = models.DateField(null=True, blank=True)
+    change = models.ForeignKey(PriceChange, null=True, blank=True, on_delete=models.SET_NULL, related_name="history")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "price_list", "field", "effective_from"]),
+            models.Index(fields=["price_list", "field", "effective_to"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.field} {self.price} [{self.effective_from} - {self.effective_to}]"
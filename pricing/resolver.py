@@ -0,0 +1,110 @@
+# pricing/resolver.py
+"""
+Customer price resolution.
+
+    resolve_prices(customer, [p1..pn]) -> {product_id: Decimal}
+
+Price = the customer's PriceListItem.custom_price, else Product.rate (trade price).
+
+Party.price_list is free text: a PriceList id ("3") or a PriceList name.
+Each price list is loaded whole, once, into an in-process map
+{product_id: custom_price}. PriceList / PriceListItem signals drop that list's
+map; maps also expire after MAP_TTL so other worker processes pick up edits.
+A lookup is then dict hits plus at most ONE query for the fallback product rates.
+"""
+import hashlib
+import threading
+import time
+from decimal import Decimal
+
+from django.db.models.signals import post_delete, post_save
+
+from inventory.models import PriceList, PriceListItem, Product
+
+MAP_TTL = 300  # seconds
+
+_lock = threading.Lock()
+_maps = {}          # price_list_id -> (loaded_at, {product_id: Decimal})
+_names = {}         # lower(name) -> price_list_id | None
+_digests = {}       # price_list_id -> (the map it was computed from, digest)
+
+
+def price_list_id_for(party):
+    """PriceList id referenced by Party.price_list (id or name), or None."""
+    ref = str(getattr(party, "price_list", None) or "").strip()
+    if not ref:
+        return None
+    if ref.isdigit():
+        return int(ref)
+    key = ref.lower()
+    if key not in _names:
+        _names[key] = PriceList.objects.filter(name__iexact=ref).values_list("id", flat=True).first()
+    return _names[key]
+
+
+def list_prices(price_list_id):
+    """{product_id: custom_price} for one price list (cached)."""
+    if not price_list_id:
+        return {}
+    hit = _maps.get(price_list_id)
+    if hit and time.monotonic() - hit[0] < MAP_TTL:
+        return hit[1]
+    prices = dict(PriceListItem.objects.filter(price_list_id=price_list_id)
+                  .values_list("product_id", "custom_price"))
+    with _lock:
+        _maps[price_list_id] = (time.monotonic(), prices)
+    return prices
+
+
+def fingerprint(price_list_id):
+    """Short digest of the list's prices (for ETags): equal across processes for equal contents."""
+    prices = list_prices(price_list_id)
+    hit = _digests.get(price_list_id)
+    if hit and hit[0] is prices:
+        return hit[1]
+    raw = ";".join(f"{pid}={price}" for pid, price in sorted(prices.items()))
+    digest = hashlib.sha1(raw.encode()).hexdigest()[:12]
+    _digests[price_list_id] = (prices, digest)
+    return digest
+
+
+def resolve_prices(customer, product_ids, *, fallback=True):
+    """
+    {product_id: price} for `customer`. With fallback=False only the products
+    that are on the customer's price list are returned.
+    """
+    product_ids = set(product_ids)
+    custom = list_prices(price_list_id_for(customer)) if customer is not None else {}
+    prices = {pid: custom[pid] for pid in product_ids if pid in custom}
+    missing = product_ids - prices.keys()
+    if fallback and missing:
+        prices.update(Product.objects.filter(id__in=missing).values_list("id", "trade_price"))
+    return prices
+
+
+def resolve_price(customer, product_id):
+    return resolve_prices(customer, [product_id]).get(product_id, Decimal("0"))
+
+
+def invalidate(price_list_id=None):
+    with _lock:
+        if price_list_id is None:
+            _maps.clear()
+            _names.clear()
+        else:
+            _maps.pop(price_list_id, None)
+
+
+def _on_item_change(sender, instance, **kwargs):
+    invalidate(instance.price_list_id)
+
+
+def _on_list_change(sender, instance, **kwargs):
+    _names.clear()  # a rename can change name -> id resolution
+    invalidate(instance.pk)
+
+
+post_save.connect(_on_item_change, sender=PriceListItem, dispatch_uid="pricing-resolver-item-save")
+post_delete.connect(_on_item_change, sender=PriceListItem, dispatch_uid="pricing-resolver-item-delete")
+post_save.connect(_on_list_change, sender=PriceList, dispatch_uid="pricing-resolver-list-save")
+post_delete.connect(_on_list_change, sender=PriceList, dispatch_uid="pricing-resolver-list-delete")
@@ -12,3 +12,19 @@ class PriceListItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = PriceListItem
         fields = '__all__'
+
+
+class RepriceSerializer(serializers.Serializer):
+    price_list = serializers.PrimaryKeyRelatedField(queryset=PriceList.objects.all(), required=False, allow_null=True)
+    fields = serializers.ListField(child=serializers.CharField(), required=False)
+    mode = serializers.ChoiceField(choices=("percent", "absolute", "set"))
+    value = serializers.DecimalField(max_digits=12, decimal_places=4)
+    rounding = serializers.DecimalField(max_digits=8, decimal_places=2, required=False, default="0.01")
+    company = serializers.IntegerField(required=False)
+    group = serializers.IntegerField(required=False)
+    distributor = serializers.IntegerField(required=False)
+    product_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    effective_from = serializers.DateField(required=False)
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+    dry_run = serializers.BooleanField(required=False, default=False)
+
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory.models import Party, PriceList, PriceListItem, Product
+from finance.test_utils import make_company
+from setting.models import Distributor, Group
+
+from .resolver import invalidate, resolve_prices
+
+
+class PriceResolverTest(TestCase):
+    def setUp(self):
+        invalidate()
+        common = dict(company=make_company("C"), group=Group.objects.create(name="G"),
+                      distributor=Distributor.objects.create(name="D"), retail_price=12,
+                      sales_tax_ratio=0, fed_tax_ratio=0)
+        self.p1 = Product.objects.create(name="P1", trade_price=10, **common)
+        self.p2 = Product.objects.create(name="P2", trade_price=20, **common)
+        self.plist = PriceList.objects.create(name="Wholesale")
+        self.item = PriceListItem.objects.create(price_list=self.plist, product=self.p1, custom_price=8)
+        self.customer = Party(name="Cust", party_type="customer", price_list=str(self.plist.pk))
+
+    def test_list_price_then_product_rate(self):
+        prices = resolve_prices(self.customer, [self.p1.id, self.p2.id])
+        self.assertEqual(prices, {self.p1.id: Decimal("8.00"), self.p2.id: Decimal("20.00")})
+
+    def test_price_list_by_name_and_invalidation(self):
+        self.customer.price_list = "wholesale"
+        self.assertEqual(resolve_prices(self.customer, [self.p1.id])[self.p1.id], Decimal("8.00"))
+        self.item.custom_price = 7
+        self.item.save()
+        self.assertEqual(resolve_prices(self.customer, [self.p1.id])[self.p1.id], Decimal("7.00"))
+
+
+class BulkRepriceTest(TestCase):
+    def setUp(self):
+        self.company = make_company("C")
+        common = dict(company=self.company, group=Group.objects.create(name="G"),
+                      distributor=Distributor.objects.create(name="D"), retail_price=12,
+                      sales_tax_ratio=0, fed_tax_ratio=0)
+        self.p1 = Product.objects.create(name="P1", trade_price=Decimal("10.00"), **common)
+        self.p2 = Product.objects.create(name="P2", trade_price=Decimal("21.00"), **common)
+
+    def test_percent_with_rounding_and_history(self):
+        from datetime import date, timedelta
+
+        from .bulk import price_on, reprice
+
+        today = date.today()
+        result = reprice(fields=["trade_price"], mode="percent", value=Decimal("10"),
+                         rounding=Decimal("1"), company=self.company.id)
+        self.assertEqual(result["rows"], 2)
+        self.p1.refresh_from_db()
+        self.p2.refresh_from_db()
+        self.assertEqual(self.p1.trade_price, Decimal("11.00"))
+        self.assertEqual(self.p2.trade_price, Decimal("23.00"))  # 23.1 -> nearest 1
+
+        before = price_on([self.p1.id, self.p2.id], today - timedelta(days=1))
+        self.assertEqual(before, {self.p1.id: Decimal("10.00"), self.p2.id: Decimal("21.00")})
+        self.assertEqual(price_on([self.p1.id], today)[self.p1.id], Decimal("11.00"))
+
+    def test_backdated_reprice_is_rejected(self):
+        from datetime import date, timedelta
+
+        from django.core.exceptions import ValidationError
+
+        from .bulk import reprice
+        from .models import PriceHistory
+
+        today = date.today()
+        reprice(fields=["trade_price"], mode="absolute", value=Decimal("1"), company=self.company.id)
+        with self.assertRaises(ValidationError):
+            reprice(fields=["trade_price"], mode="absolute", value=Decimal("1"), company=self.company.id,
+                    effective_from=today - timedelta(days=3))
+        self.assertFalse(PriceHistory.objects.filter(effective_to__lt=today).exists())
+        # same day again is fine
+        self.assertEqual(reprice(fields=["trade_price"], mode="absolute", value=Decimal("1"),
+                                 company=self.company.id)["rows"], 2)
+
+    def test_prices_on_endpoint_validates_its_query(self):
+        from django.contrib.auth import get_user_model
+
+        self.client.force_login(get_user_model().objects.create_user("pr@example.com", "pass"))
+        url = "/pricing/prices-on/"
+        query = {"products": f"{self.p1.id}", "date": "2024-01-01"}
+        resp = self.client.get(url, query)
+        self.assertEqual(resp.json()["prices"], {str(self.p1.id): "10.00"})
+        for bad in ({"field": "company__name"}, {"field": "nope"}, {"price_list": "abc"}):
+            self.assertEqual(self.client.get(url, {**query, **bad}).status_code, 400)
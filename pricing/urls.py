@@ -1,8 +1,12 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import PriceListViewSet, PriceListItemViewSet
+from .views import PriceListViewSet, PriceListItemViewSet, bulk_reprice, prices_on_date
 
 router = DefaultRouter()
 router.register(r'pricelists', PriceListViewSet)
 router.register(r'pricelist-items', PriceListItemViewSet)
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path('reprice/', bulk_reprice, name='bulk_reprice'),
+    path('prices-on/', prices_on_date, name='prices_on_date'),
+]
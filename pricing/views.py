@@ -1,9 +1,15 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from inventory.models import PriceList, PriceListItem
 
 
-from .serializers import PriceListSerializer, PriceListItemSerializer
+from .bulk import price_on, reprice
+from .serializers import PriceListSerializer, PriceListItemSerializer, RepriceSerializer
 
 
 class PriceListViewSet(viewsets.ModelViewSet):
@@ -14,3 +20,45 @@ class PriceListViewSet(viewsets.ModelViewSet):
 class PriceListItemViewSet(viewsets.ModelViewSet):
     queryset = PriceListItem.objects.all()
     serializer_class = PriceListItemSerializer
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def bulk_reprice(request):
+    """
+    {"mode": "percent"|"absolute"|"set", "value": "7.5", "rounding": "1",
+     "company": id | "group": id | "distributor": id | "product_ids": [..],
+     "price_list": id (omit for product prices), "fields": ["trade_price", "e_rate"],
+     "effective_from": "YYYY-MM-DD", "dry_run": true}
+    """
+    ser = RepriceSerializer(data=request.data)
+    ser.is_valid(raise_exception=True)
+    data = dict(ser.validated_data)
+    try:
+        result = reprice(user=request.user, **data)
+    except DjangoValidationError as e:
+        return Response({"detail": e.messages}, status=400)
+    return Response(result)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def prices_on_date(request):
+    """?products=1,2,3&date=YYYY-MM-DD&field=trade_price&price_list=id"""
+    on = parse_date(request.GET.get("date") or "")
+    try:
+        ids = [int(x) for x in (request.GET.get("products") or "").split(",") if x.strip()]
+    except ValueError:
+        return Response({"detail": "products must be a comma separated list of ids."}, status=400)
+    if not on or not ids:
+        return Response({"detail": "products and date are required."}, status=400)
+    try:
+        price_list = int(request.GET["price_list"]) if request.GET.get("price_list") else None
+    except ValueError:
+        return Response({"detail": "price_list must be an id."}, status=400)
+    try:
+        prices = price_on(ids, on, field=request.GET.get("field") or None, price_list=price_list)
+    except DjangoValidationError as e:
+        return Response({"detail": e.messages}, status=400)
+    return Response({"date": on, "prices": {str(k): str(v) for k, v in prices.items()}})
+
@@ -1,8 +1,7 @@
 from django.contrib import admin,messages
 from django import forms
-from django.http import HttpResponse,HttpResponseRedirect,HttpResponseNotAllowed
-from django.template.loader import render_to_string
-from xhtml2pdf import pisa
+from django.http import HttpResponseRedirect,HttpResponseNotAllowed
+from utils.invoice_pdf import render_invoice_pdf, render_invoices_batch, pdf_response
 from django.db import transaction
 from .models import (
     PurchaseInvoice,
@@ -43,24 +42,16 @@ class PurchaseInvoiceItemInline(admin.TabularInline):
 # --- PDF Helper ---
 
 def generate_pdf_invoice(invoice):
-    context = {
-        'invoice': invoice,
-        'items': invoice.items.all() if hasattr(invoice, 'items') else [],
-        'invoice_type': invoice.__class__.__name__,
-    }
-    html = render_to_string("invoices/pdf_invoice.html", context)
-    response = HttpResponse(content_type='application/pdf')
-    pisa.CreatePDF(html, dest=response)
-    return response
-
+    return pdf_response(render_invoice_pdf(invoice), filename=f"{invoice.invoice_no or invoice.pk}.pdf")
 
 # --- Admin Actions ---
 
 def print_invoice_pdf(modeladmin, request, queryset):
+    """One invoice -> full HTML layout; several -> fast layout merged into one PDF."""
     if queryset.count() == 1:
         return generate_pdf_invoice(queryset.first())
-    return HttpResponse("Please select only one invoice to print.")
-
+    qs = queryset.select_related("supplier", "warehouse").prefetch_related("items__product").order_by("id")
+    return pdf_response(render_invoices_batch(qs, renderer="fast"), filename="invoices.pdf")
 
 print_invoice_pdf.short_description = "Print Invoice PDF"
 @admin.action(description="Settle with payment/credit (enter amounts)…")
@@ -104,7 +95,7 @@ class PurchaseInvoiceAdmin(admin.ModelAdmin):
     autocomplete_fields = ("supplier", "warehouse")
     readonly_fields = ("total_amount", "grand_total",) 
     inlines = [PurchaseInvoiceItemInline]
-    actions = ["action_confirm", "action_receive", "action_mark_paid","print_invoice_pdf",action_settle_with_breakdown,cancel_purchase_invoices]
+    actions = ["action_confirm", "action_receive", "action_mark_paid",print_invoice_pdf,action_settle_with_breakdown,cancel_purchase_invoices]
 
     @admin.action(description="Confirm selected invoices")
     def action_confirm(self, request, queryset):
@@ -700,67 +691,12 @@ class PurchaseReturnAdmin(admin.ModelAdmin):
         except PurchaseInvoice.DoesNotExist:
             raise Http404
 
-        # --- normalize helper for batch keys ---
-        def norm_batch(b):  # None and whitespace -> ""
-            return (b or "").strip()
-
-        # --- RECEIVED per invoice item (use GRN if present; else fall back to ordered+bonus) ---
-        received_map = {}
-        try:
-            from purchase.models import GoodsReceiptItem
-            rec = (
-                GoodsReceiptItem.objects
-                .filter(invoice_item__invoice=inv, grn__status="POSTED")
-                .values("invoice_item_id")
-                .annotate(qty=Sum("quantity"))
-            )
-            received_map = {r["invoice_item_id"]: int(r["qty"] or 0) for r in rec}
-        except Exception:
-            # If GRN model not available, we'll use ordered qty below.
-            pass
-
-        # --- Build (product,batch) -> invoice_item_id map to anchor counts to the line on the invoice ---
-        by_key = {}
-        for it in inv.items.all():
-            by_key[(it.product_id, norm_batch(it.batch_number))] = it.id
-
-        # --- Already returned so far (only counting effective PRs) ---
-        COUNT_STATUSES = {"CONFIRMED", "RETURNED", "REFUNDED", "CREDITED"}
-        returned_by_item = {}
-        ret_rows = (
-            PurchaseReturnItem.objects
-            .filter(
-                return_invoice__invoice=inv,
-                return_invoice__status__in=COUNT_STATUSES,
-            )
-            
-            .values("product_id", "batch_number")
-            .annotate(qty=Sum("quantity"))
-        )
-        for r in ret_rows:
-            key = (r["product_id"], norm_batch(r["batch_number"]))
-            inv_item_id = by_key.get(key)
-            if inv_item_id:
-                returned_by_item[inv_item_id] = returned_by_item.get(inv_item_id, 0) + int(r["qty"] or 0)
-
-        # --- Build payload per invoice item ---
+        # --- per-line ledger columns (received_qty / returned_qty); no aggregates needed ---
+        returnable = inv.returnable_map()
         items_payload = []
         for it in inv.items.all():
-            ordered_plus_bonus = int((it.quantity or 0) + (getattr(it, "bonus", 0) or 0))
-
-            # If GRN exists for this invoice_item -> use posted received qty; else assume fully received
-           
-            received_qty = received_map.get(it.id, ordered_plus_bonus)
-                # If you want to allow returns against ordered even when not received yet, use:
-                # received_qty = max(received_qty, ordered_plus_bonus)
-           
-
-            already_ret = int(returned_by_item.get(it.id, 0))
-            returnable = max(received_qty - already_ret, 0)
-
-            if returnable <= 0:
+            if returnable.get(it.id, 0) <= 0:
                 continue
-
             items_payload.append({
                 "invoice_item_id": it.id,
                 "product_id": it.product_id,
@@ -769,8 +705,8 @@ class PurchaseReturnAdmin(admin.ModelAdmin):
                 "expiry_date": it.expiry_date.isoformat() if it.expiry_date else "",
                 "purchase_price": str(it.purchase_price or 0),
                 "sale_price": str(it.sale_price or 0),
-                "max_return_qty": returnable,
-                "default_qty": returnable,  # change to 0 if you prefer
+                "max_return_qty": returnable[it.id],
+                "default_qty": returnable[it.id],  # change to 0 if you prefer
             })
 
         payload = {
@@ -790,20 +726,14 @@ class PurchaseReturnAdmin(admin.ModelAdmin):
 
         # Optional debug to help you verify quantities quickly
         if request.GET.get("debug") == "1":
-            debug_rows = []
-            for it in inv.items.all():
-                ordered_plus_bonus = int((it.quantity or 0) + (getattr(it, "bonus", 0) or 0))
-                recv = received_map.get(it.id, ordered_plus_bonus if not received_map else 0)
-                ret = int(returned_by_item.get(it.id, 0))
-                debug_rows.append({
-                    "invoice_item_id": it.id,
-                    "product": str(it.product),
-                    "ordered+bonus": ordered_plus_bonus,
-                    "received": recv,
-                    "already_returned": ret,
-                    "returnable": max((recv if received_map else ordered_plus_bonus) - ret, 0),
-                })
-            payload["_debug"] = debug_rows
+            payload["_debug"] = [{
+                "invoice_item_id": it.id,
+                "product": str(it.product),
+                "ordered+bonus": it.ordered_qty,
+                "received": it.received_qty,
+                "already_returned": it.returned_qty,
+                "returnable": returnable.get(it.id, 0),
+            } for it in inv.items.all()]
 
         return JsonResponse(payload)
     def get_queryset(self, request):
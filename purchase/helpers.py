@@ -30,3 +30,53 @@ def grn_returnable_map(invoice, *, exclude_pr_id=None):
         already = int(returned_map.get(gid, 0))
         out[gid] = max(received - already, 0)
     return out
+
+
+# ---------- PurchaseInvoiceItem received_qty / returned_qty ledger ----------
+RETURN_COUNT_STATUSES = {"CONFIRMED", "RETURNED", "REFUNDED", "CREDITED"}
+
+
+def apply_return_to_invoice_lines(purchase_return, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) a purchase return's quantities from the
+    returned_qty of the invoice lines its GRN lines belong to.
+    """
+    from purchase.models import PurchaseInvoiceItem, PurchaseReturnItem
+
+    per_line = dict(
+        PurchaseReturnItem.objects
+        .filter(return_invoice=purchase_return)
+        .values_list("grn_item__invoice_item_id")
+        .annotate(qty=Sum("quantity"))
+    )
+    lines = PurchaseInvoiceItem.objects.select_for_update().in_bulk(list(per_line))
+    for iid, qty in per_line.items():
+        li = lines[iid]
+        li.returned_qty = max(int(li.returned_qty or 0) + sign * int(qty or 0), 0)
+    PurchaseInvoiceItem.objects.bulk_update(lines.values(), ["returned_qty"])
+
+
+def rebuild_line_ledger(invoice_ids=None):
+    """Recompute received_qty / returned_qty from GRNs and PRs (backfill / repair)."""
+    from django.db.models import Q
+    from django.db.models.functions import Coalesce
+    from purchase.models import PurchaseInvoiceItem
+
+    qs = PurchaseInvoiceItem.objects.all()
+    if invoice_ids is not None:
+        qs = qs.filter(invoice_id__in=invoice_ids)
+    received = dict(
+        qs.values_list("id").annotate(q=Coalesce(Sum("grn_items__quantity", filter=Q(grn_items__grn__status="POSTED")), 0))
+    )
+    returned = dict(
+        qs.values_list("id").annotate(q=Coalesce(Sum(
+            "grn_items__return_items__quantity",
+            filter=Q(grn_items__return_items__return_invoice__status__in=RETURN_COUNT_STATUSES),
+        ), 0))
+    )
+    lines = list(qs.only("id", "received_qty", "returned_qty"))
+    for li in lines:
+        li.received_qty = int(received.get(li.id, 0))
+        li.returned_qty = int(returned.get(li.id, 0))
+    PurchaseInvoiceItem.objects.bulk_update(lines, ["received_qty", "returned_qty"], batch_size=1000)
+    return len(lines)
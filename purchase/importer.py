@@ -0,0 +1,226 @@
+# purchase/importer.py
+"""
+Supplier bill importer: .xlsx / .csv -> PurchaseInvoiceItem lines of a DRAFT invoice.
+
+- Streams the file (utils.tabular: openpyxl read-only / csv reader); only parsed tuples are kept.
+- Products resolved by barcode, then by (case-insensitive) name, in ONE query.
+- Batch numbers (globally unique on PurchaseInvoiceItem) checked in ONE query.
+- Writes with bulk_create / bulk_update and recomputes invoice totals once.
+- dry_run=True returns the diff (add / update / unchanged / remove) without writing.
+Any row error aborts the write; the report lists every problem row.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+from inventory.models import Product
+from utils.tabular import iter_rows
+
+from .models import PurchaseInvoiceItem
+
+Q2 = Decimal("0.01")
+
+# canonical column -> accepted header spellings (lower-cased, spaces/dots stripped)
+HEADER_ALIASES = {
+    "barcode": {"barcode", "code", "productcode", "itemcode", "ean"},
+    "name": {"name", "product", "productname", "item", "itemname", "description"},
+    "batch_number": {"batch", "batchno", "batchnumber", "lot", "lotno"},
+    "expiry_date": {"expiry", "expirydate", "exp", "expdate"},
+    "quantity": {"qty", "quantity"},
+    "bonus": {"bonus", "bonusqty", "free", "foc"},
+    "purchase_price": {"purchaseprice", "rate", "price", "tp", "tradeprice", "cost"},
+    "sale_price": {"saleprice", "retail", "retailprice", "mrp", "rp"},
+    "discount": {"discount", "disc"},
+}
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%m/%Y", "%m-%Y", "%b-%Y", "%b %Y")
+COMPARE_FIELDS = ("product_id", "expiry_date", "quantity", "bonus", "purchase_price", "sale_price", "discount")
+UPDATE_FIELDS = ["product", "expiry_date", "quantity", "bonus", "purchase_price", "sale_price", "discount", "amount"]
+
+
+@dataclass
+class ImportReport:
+    dry_run: bool
+    rows: int = 0
+    added: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    unchanged: int = 0
+    removed: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    totals: dict = field(default_factory=dict)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def as_dict(self):
+        return {
+            "dryRun": self.dry_run, "ok": self.ok, "rows": self.rows,
+            "added": self.added, "updated": self.updated, "unchanged": self.unchanged,
+            "removed": self.removed, "errors": self.errors, "totals": self.totals,
+        }
+
+
+# ---------- parsing ----------
+
+def _int(v, name, default=None):
+    if v in (None, ""):
+        if default is None:
+            raise ValueError(f"{name} is required")
+        return default
+    try:
+        n = int(Decimal(str(v).replace(",", "")))
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+    if n < 0:
+        raise ValueError(f"{name} must be >= 0")
+    return n
+
+
+def _money(v, name, default=None):
+    if v in (None, ""):
+        if default is None:
+            raise ValueError(f"{name} is required")
+        return default
+    try:
+        return Decimal(str(v).replace(",", "")).quantize(Q2)
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+
+
+def _date(v):
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    s = str(v or "").strip()
+    if not s:
+        raise ValueError("expiry_date is required")
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"expiry_date '{s}' not understood")
+
+
+def _parse(n, rec):
+    batch = str(rec.get("batch_number") or "").strip()
+    if not batch:
+        raise ValueError("batch_number is required")
+    barcode = str(rec.get("barcode") or "").strip()
+    if barcode.endswith(".0"):  # numeric barcode read from Excel
+        barcode = barcode[:-2]
+    name = str(rec.get("name") or "").strip()
+    if not (barcode or name):
+        raise ValueError("barcode or product name is required")
+    qty = _int(rec.get("quantity"), "quantity")
+    if qty <= 0:
+        raise ValueError("quantity must be > 0")
+    return {
+        "row": n, "barcode": barcode, "name": name, "batch_number": batch,
+        "expiry_date": _date(rec.get("expiry_date")),
+        "quantity": qty, "bonus": _int(rec.get("bonus"), "bonus", 0),
+        "purchase_price": _money(rec.get("purchase_price"), "purchase_price"),
+        "sale_price": _money(rec.get("sale_price"), "sale_price", Decimal("0.00")),
+        "discount": _money(rec.get("discount"), "discount", Decimal("0.00")),
+    }
+
+
+# ---------- import ----------
+
+def import_purchase_lines(invoice, fileobj, filename, *, dry_run=False, replace=False):
+    """
+    Import lines into a DRAFT PurchaseInvoice. Lines are matched to existing
+    ones by batch_number; replace=True also deletes lines missing from the file.
+    """
+    if invoice.status != "DRAFT":
+        raise ValidationError("Lines can only be imported into a DRAFT purchase invoice.")
+    report = ImportReport(dry_run=dry_run)
+
+    parsed, seen_batches = [], {}
+    for n, rec in iter_rows(fileobj, filename, HEADER_ALIASES):
+        report.rows += 1
+        try:
+            row = _parse(n, rec)
+        except ValueError as e:
+            report.errors.append({"row": n, "errors": [str(e)]})
+            continue
+        if row["batch_number"] in seen_batches:
+            report.errors.append({"row": n, "errors": [
+                f"batch {row['batch_number']} repeated (first on row {seen_batches[row['batch_number']]})"]})
+            continue
+        seen_batches[row["batch_number"]] = n
+        parsed.append(row)
+
+    # one product query: barcode or upper(name)
+    barcodes = {r["barcode"] for r in parsed if r["barcode"]}
+    names = {r["name"].upper() for r in parsed if r["name"]}
+    by_barcode, by_name = {}, {}
+    for pid, bc, uname in (Product.objects.annotate(uname=Upper("name"))
+                           .filter(Q(barcode__in=barcodes) | Q(uname__in=names))
+                           .values_list("id", "barcode", "uname")):
+        by_barcode.setdefault(bc, pid)
+        by_name.setdefault(uname, pid)
+
+    # one batch query: batch numbers are unique across all purchase invoices
+    taken = dict(PurchaseInvoiceItem.objects.filter(batch_number__in=seen_batches)
+                 .exclude(invoice=invoice).values_list("batch_number", "invoice__invoice_no"))
+    existing = {li.batch_number: li for li in invoice.items.all()}
+
+    to_create, to_update = [], []
+    for r in parsed:
+        errs = []
+        pid = by_barcode.get(r["barcode"]) if r["barcode"] else None
+        pid = pid or (by_name.get(r["name"].upper()) if r["name"] else None)
+        if not pid:
+            errs.append(f"product not found ({r['barcode'] or r['name']})")
+        if r["batch_number"] in taken:
+            errs.append(f"batch {r['batch_number']} already used on {taken[r['batch_number']]}")
+        if errs:
+            report.errors.append({"row": r["row"], "errors": errs})
+            continue
+
+        values = {k: r[k] for k in ("expiry_date", "quantity", "bonus", "purchase_price", "sale_price", "discount")}
+        values["product_id"] = pid
+        values["amount"] = (Decimal(r["quantity"]) * r["purchase_price"]).quantize(Q2)
+        line = existing.get(r["batch_number"])
+        if line is None:
+            to_create.append(PurchaseInvoiceItem(invoice=invoice, batch_number=r["batch_number"], **values))
+            report.added.append({"row": r["row"], "batch": r["batch_number"], "quantity": r["quantity"]})
+            continue
+        changes = {f: [str(getattr(line, f)), str(values[f])] for f in COMPARE_FIELDS if getattr(line, f) != values[f]}
+        if changes:
+            for f, v in values.items():
+                setattr(line, f, v)
+            to_update.append(line)
+            report.updated.append({"row": r["row"], "batch": r["batch_number"], "changes": changes})
+        else:
+            report.unchanged += 1
+
+    to_remove = [li for b, li in existing.items() if b not in seen_batches] if replace else []
+    report.removed = [{"id": li.id, "batch": li.batch_number} for li in to_remove]
+
+    kept = [li for b, li in existing.items() if b in seen_batches or not replace]
+    total = sum((li.amount for li in kept + to_create), Decimal("0"))
+    report.totals = {
+        "lines": len(kept) + len(to_create),
+        "totalAmount": str(total.quantize(Q2)),
+        "grandTotal": str((total - Decimal(invoice.discount or 0) + Decimal(invoice.tax or 0)).quantize(Q2)),
+    }
+
+    if dry_run or report.errors:
+        return report
+
+    with transaction.atomic():
+        if to_remove:
+            PurchaseInvoiceItem.objects.filter(pk__in=[li.pk for li in to_remove]).delete()
+        if to_update:
+            PurchaseInvoiceItem.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=1000)
+        PurchaseInvoiceItem.objects.bulk_create(to_create, batch_size=1000)
+        invoice.recalc_totals()
+    return report
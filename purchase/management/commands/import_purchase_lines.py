@@ -0,0 +1,32 @@
+# management/commands/import_purchase_lines.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from purchase.importer import import_purchase_lines
+from purchase.models import PurchaseInvoice
+
+
+class Command(BaseCommand):
+    help = "Import supplier bill lines (.xlsx/.csv) into a DRAFT purchase invoice"
+
+    def add_arguments(self, parser):
+        parser.add_argument("invoice", help="PurchaseInvoice id or invoice_no")
+        parser.add_argument("path", help="Path to the .xlsx or .csv file")
+        parser.add_argument("--dry-run", action="store_true", help="Show the diff without writing")
+        parser.add_argument("--replace", action="store_true", help="Delete invoice lines missing from the file")
+
+    def handle(self, *args, **opts):
+        key = opts["invoice"]
+        inv = PurchaseInvoice.objects.filter(**({"pk": key} if key.isdigit() else {"invoice_no": key})).first()
+        if not inv:
+            raise CommandError(f"Purchase invoice {key} not found")
+        with open(opts["path"], "rb") as fh:
+            report = import_purchase_lines(inv, fh, opts["path"], dry_run=opts["dry_run"], replace=opts["replace"])
+        self.stdout.write(json.dumps(report.as_dict(), indent=2, default=str))
+        if not report.ok:
+            raise CommandError(f"{len(report.errors)} row(s) with errors; nothing written")
+        msg = "Dry run" if opts["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{msg}: {len(report.added)} added, {len(report.updated)} updated, "
+            f"{report.unchanged} unchanged, {len(report.removed)} removed"))
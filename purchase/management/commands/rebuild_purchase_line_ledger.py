@@ -0,0 +1,17 @@
+# management/commands/rebuild_purchase_line_ledger.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from purchase.helpers import rebuild_line_ledger
+
+
+class Command(BaseCommand):
+    help = "Backfill / repair PurchaseInvoiceItem.received_qty and returned_qty from GRNs and purchase returns"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--invoice", type=int, action="append", help="PurchaseInvoice id (repeatable); default all")
+
+    def handle(self, *args, **opts):
+        with transaction.atomic():
+            n = rebuild_line_ledger(opts["invoice"])
+        self.stdout.write(self.style.SUCCESS(f"Purchase line ledger rebuilt for {n} line(s)"))
@@ -13,9 +13,8 @@ from django.db import transaction
 from finance.hordak_posting import post_purchase,post_purchase_return,post_supplier_payment_reverse,reverse_txn_purchase
 from hordak.models import Transaction 
 from django.core.exceptions import ValidationError
-from finance.hordak_posting import post_supplier_payment
-from django.db.models import Sum
-from .helpers import grn_returnable_map
+from finance.models_payments import SupplierPayment
+from .helpers import grn_returnable_map, apply_return_to_invoice_lines, RETURN_COUNT_STATUSES
 
 
 
@@ -49,20 +48,25 @@ class GoodsReceipt(models.Model):
     def post(self):
         if self.status != "DRAFT":
             raise ValidationError("Only DRAFT GRN can be posted.")
-        if not self.items.exists():
+        grn_items = list(self.items.select_related("invoice_item__product"))
+        if not grn_items:
             raise ValidationError("No GRN items to post.")
 
-        # Validate against outstanding per invoice item
-        outstanding = self.invoice.outstanding_receive_map()  # defined below
-        for it in self.items.all():
-            allow = outstanding.get(it.invoice_item_id, 0)
+        # Lock the invoice lines once and validate against their running received_qty
+        lines = {li.pk: li for li in PurchaseInvoiceItem.objects.select_for_update().filter(invoice_id=self.invoice_id)}
+        wanted = {}
+        for it in grn_items:
             if it.quantity <= 0:
                 raise ValidationError(f"Quantity must be > 0 for {it.invoice_item}.")
-            if Decimal(it.quantity) > Decimal(allow):
-                raise ValidationError(f"Qty {it.quantity} exceeds outstanding {allow} for {it.invoice_item}.")
+            wanted[it.invoice_item_id] = wanted.get(it.invoice_item_id, 0) + int(it.quantity)
+        for iid, qty in wanted.items():
+            li = lines[iid]
+            allow = li.outstanding_qty
+            if qty > allow:
+                raise ValidationError(f"Qty {qty} exceeds outstanding {allow} for {li.product}.")
 
         # Stock-in each GRN item
-        for it in self.items.select_related("invoice_item__product"):
+        for it in grn_items:
             stock_in(
                 product=it.invoice_item.product,
                 quantity=it.quantity,
@@ -80,8 +84,12 @@ class GoodsReceipt(models.Model):
             self.grn_no = self._next_sequence()
         self.save(update_fields=["status", "grn_no"])
 
+        for iid, qty in wanted.items():
+            lines[iid].received_qty += qty
+        PurchaseInvoiceItem.objects.bulk_update([lines[iid] for iid in wanted], ["received_qty"])
+
         # Flip invoice status based on remaining outstanding
-        remaining_any = any(qty > 0 for qty in self.invoice.outstanding_receive_map().values())
+        remaining_any = any(li.outstanding_qty > 0 for li in lines.values())
         self.invoice.status = "PARTIAL" if remaining_any else "RECEIVED"
         self.invoice.save(update_fields=["status"])
     @transaction.atomic
@@ -98,7 +106,11 @@ class GoodsReceipt(models.Model):
             return
 
         # 1) Reverse stock moves: stock_out the exact quantities that were stocked_in by this GRN
-        for it in self.items.select_related("invoice_item__product"):
+        grn_items = list(self.items.select_related("invoice_item__product"))
+        lines = {li.pk: li for li in PurchaseInvoiceItem.objects.select_for_update().filter(invoice_id=self.invoice_id)}
+        for it in grn_items:
+            li = lines[it.invoice_item_id]
+            li.received_qty = max(li.received_qty - int(it.quantity or 0), 0)
             stock_out_exact_batch(
                 product=it.invoice_item.product,
                 quantity=it.quantity,
@@ -112,6 +124,10 @@ class GoodsReceipt(models.Model):
         #     reverse_txn(self.posted_txn, memo=f"Reverse GRN {self.grn_no}: {reason}")
         #     self.posted_txn = None  # optional
 
+        PurchaseInvoiceItem.objects.bulk_update(
+            [lines[iid] for iid in {it.invoice_item_id for it in grn_items}], ["received_qty"]
+        )
+
         # 3) Mark cancelled
         self.status = "CANCELLED"
         self.save(update_fields=["status", "posted_txn"])
@@ -209,27 +225,28 @@ class PurchaseInvoice(models.Model):
     def _recalc_payment_status(self):
         if (Decimal(self.paid_amount or 0) ) >= Decimal(self.grand_total or 0):
             self.payment_status = "PAID"
-        elif Decimal(self.credited_amount or 0) > 0:
+        elif Decimal(self.paid_amount or 0) > 0 or Decimal(self.credited_amount or 0) > 0:
             self.payment_status = "PARTIAL"
         else:
             self.payment_status = "UNPAID"
 
     @transaction.atomic
     def simple_pay(self, amount):
-        """Ad-hoc CASH/BANK payment against this PI (kept as-is)."""
+        """Ad-hoc CASH/BANK payment against this PI, recorded as a SupplierPayment."""
         amt = Decimal(amount or 0)
         if amt <= 0:
             return
-        post_supplier_payment(
+        payment = SupplierPayment.objects.create(
             date=self.date,
-            description=f"Payment for {self.invoice_no}",
-            supplier_account=self.supplier.chart_of_account,
-            amount=amt,
+            supplier=self.supplier,
             warehouse=self.warehouse,
+            amount=amt,
+            description=f"Payment for {self.invoice_no}",
         )
-        self.paid_amount = Decimal(self.paid_amount or 0) + amt
-        self._recalc_payment_status()
-        self.save(update_fields=["paid_amount", "payment_status"])
+        payment.post()               # GL: DR A/P, CR Cash/Bank
+        payment.allocate(self, amt)  # paid_amount + payment_status on the locked row
+        self.refresh_from_db(fields=["paid_amount", "payment_status"])
+        return payment
 
     @transaction.atomic
     def apply_credit(self, amount, note: str = ""):
@@ -270,61 +287,17 @@ class PurchaseInvoice(models.Model):
     def returnable_map(self):
         """
         Returns {invoice_item_id: returnable_qty}.
-        returnable = received_qty (or ordered if no GRN) - sum(returned so far).
+        returnable = received_qty (or ordered + bonus if nothing received yet) - returned_qty.
         """
-        # 1) Received qty per invoice item
-        rec_map = {}
-        try:
-            from purchase.models import GoodsReceiptItem  # if you added GRNs
-            rec = (
-                GoodsReceiptItem.objects
-                .filter(invoice_item__invoice=self, grn__status="POSTED")
-                .values("invoice_item_id")
-                .annotate(qty=Sum("quantity"))
-            )
-            rec_map = {r["invoice_item_id"]: int(r["qty"] or 0) for r in rec}
-        except Exception:
-            # Fallback: treat as fully received = ordered + bonus
-            pass
+        return {it.id: it.returnable_qty for it in self.items.all()}
 
-        # 2) Already returned per (product, batch) mapped back to invoice item
-        from purchase.models import PurchaseReturnItem  # adjust import if app label differs
-        ret = (
-            PurchaseReturnItem.objects
-            .filter(return_invoice__invoice=self)
-            .values("product_id", "batch_number")
-            .annotate(qty=Sum("quantity"))
-        )
-        returned_by_key = {(r["product_id"], (r["batch_number"] or "")): int(r["qty"] or 0) for r in ret}
-
-        # 3) Build map
-        result = {}
-        for it in self.items.all():  # PurchaseInvoiceItem
-            ordered_plus_bonus = int((it.quantity or 0) + (getattr(it, "bonus", 0) or 0))
-            received = rec_map.get(it.id, ordered_plus_bonus)  # <-- per-item fallback
-            already_ret = returned_by_key.get(it.id, 0)
-            result[it.id] = max(received - already_ret, 0)
-        return result
     def outstanding_receive_map(self):
         """
         Returns {invoice_item_id: outstanding_qty}
-        Outstanding = (ordered qty + bonus) - sum(received via GRNs)
+        Outstanding = (ordered qty + bonus) - received_qty
         """
-        out = {}
-        items = self.items.all().values("id", "quantity", "bonus")
-        received = (
-            GoodsReceiptItem.objects
-            .filter(invoice_item__invoice=self, grn__status="POSTED")
-            .values("invoice_item_id")
-            .annotate(qty=Sum("quantity"))
-        )
-        rec_map = {r["invoice_item_id"]: r["qty"] or 0 for r in received}
-        for it in items:
-            ordered = int(it["quantity"] or 0) + int(it.get("bonus") or 0)
-            got = int(rec_map.get(it["id"], 0))
-            out[it["id"]] = max(ordered - got, 0)
-        return out
-    
+        return {it.id: it.outstanding_qty for it in self.items.all()}
+
     @transaction.atomic
     def recalc_totals(self, *, save=True):
         items = self.items.all()  # related_name on PurchaseInvoiceItem -> "items"
@@ -345,7 +318,8 @@ class PurchaseInvoice(models.Model):
 
         Steps:
           1) Reverse any POSTED GRNs (stock-out) and mark them CANCELLED.
-          2) Reverse any supplier payments that contributed to paid_amount.
+          2) Release SupplierPayment allocations back to the payments' unallocated
+             amount (no posting); reverse only legacy paid amounts.
           3) Reverse the original purchase accounting (self.hordak_txn).
           4) Zero paid/credit amounts and set status=CANCELLED, payment_status=UNPAID.
 
@@ -365,11 +339,22 @@ class PurchaseInvoice(models.Model):
         for grn in self.grns.select_for_update():
             grn.unpost_cancel(reason=f"PI {self.invoice_no} cancelled")
 
-        # 2) Reverse payments (if any)
+        # 2) Release payments (if any). A posted SupplierPayment keeps its amount and
+        #    its GL entry (the cash did leave); its allocation here is removed and the
+        #    amount becomes unallocated again, i.e. an open credit with the supplier
+        #    that auto_allocate() can use, or that SupplierPayment.cancel() reverses.
         paid = Decimal(self.paid_amount or 0)
+        allocs = list(self.payment_allocations.select_for_update())
+        if allocs:
+            payments = SupplierPayment.objects.select_for_update().in_bulk({a.payment_id for a in allocs})
+            for a in allocs:
+                pay = payments[a.payment_id]
+                pay.unallocated_amount = Decimal(pay.unallocated_amount or 0) + Decimal(a.amount)
+                paid -= Decimal(a.amount)
+            SupplierPayment.objects.bulk_update(payments.values(), ["unallocated_amount"])
+            self.payment_allocations.filter(pk__in=[a.pk for a in allocs]).delete()
         if paid > 0:
-            # If you have a SupplierPayment model linked per PI, iterate & reverse each.
-            # If not, we post a single net reversal (safe if you didn’t need per-payment audit).
+            # payments made before SupplierPayment existed: single net reversal
             post_supplier_payment_reverse(
                 date=self.date,
                 description=f"Reverse payments for {self.invoice_no}",
@@ -377,7 +362,7 @@ class PurchaseInvoice(models.Model):
                 amount=paid,
                 warehouse=self.warehouse,
             )
-            self.paid_amount = Decimal("0.00")
+        self.paid_amount = Decimal("0.00")
 
         # Optionally reset applied credits too (these were non-posting offsets)
         if Decimal(self.credited_amount or 0) > 0:
@@ -406,6 +391,24 @@ class PurchaseInvoiceItem(models.Model):
     discount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     # net_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    # Running ledger, maintained by GRN post/unpost and PR status changes (purchase/helpers.py)
+    received_qty = models.PositiveIntegerField(default=0)
+    returned_qty = models.PositiveIntegerField(default=0)
+
+    @property
+    def ordered_qty(self) -> int:
+        return int(self.quantity or 0) + int(self.bonus or 0)
+
+    @property
+    def outstanding_qty(self) -> int:
+        return max(self.ordered_qty - int(self.received_qty or 0), 0)
+
+    @property
+    def returnable_qty(self) -> int:
+        # nothing received yet -> treat as fully received (ordered + bonus)
+        received = int(self.received_qty or 0) or self.ordered_qty
+        return max(received - int(self.returned_qty or 0), 0)
+
     def _compute_amount(self):
         q = Decimal(self.quantity or 0)
         p = Decimal(self.purchase_price or 0)
@@ -723,6 +726,11 @@ class PurchaseReturn(models.Model):
         if old_status != self.status:
             self._validate_transition(old_status, self.status)
 
+            was_counted = old_status in RETURN_COUNT_STATUSES
+            is_counted = self.status in RETURN_COUNT_STATUSES
+            if was_counted != is_counted and self.invoice_id:
+                apply_return_to_invoice_lines(self, sign=1 if is_counted else -1)
+
             if old_status == "DRAFT" and self.status == "CONFIRMED":
                 self.post_confirm_entry()
 
@@ -1,3 +1,7 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from rest_framework import serializers
 from .models import (
     PurchaseInvoice,
@@ -7,22 +11,65 @@ from .models import (
     InvestorTransaction,
 )
 from finance.serializers import PaymentScheduleSerializer
+from utils.nested import sync_nested_items
 
 
 class PurchaseInvoiceItemSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)  # lets an update address existing lines
+
     class Meta:
         model = PurchaseInvoiceItem
         fields = "__all__"
+        read_only_fields = ("invoice", "amount", "received_qty", "returned_qty")
+        # uniqueness is enforced by the DB; a nested row can't tell "same line" from "taken"
+        extra_kwargs = {"batch_number": {"validators": []}}
 
 
 class PurchaseInvoiceSerializer(serializers.ModelSerializer):
-    items = PurchaseInvoiceItemSerializer(many=True, read_only=True)
+    """
+    `items` is optional on write. On update, sent lines are diffed against the
+    existing ones (by id, else batch_number); lines can only change while DRAFT.
+    """
+    items = PurchaseInvoiceItemSerializer(many=True, required=False)
     payment_schedules = PaymentScheduleSerializer(many=True, read_only=True)
 
     class Meta:
         model = PurchaseInvoice
         fields = "__all__"
 
+    @staticmethod
+    def _with_amount(rows):
+        for row in rows:
+            amount = Decimal(row.get("quantity") or 0) * Decimal(row.get("purchase_price") or 0)
+            row["amount"] = amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return rows
+
+    @transaction.atomic
+    def create(self, validated_data):
+        items = self._with_amount(validated_data.pop("items", []))
+        invoice = super().create(validated_data)
+        if items:
+            PurchaseInvoiceItem.objects.bulk_create([
+                PurchaseInvoiceItem(invoice=invoice, **{k: v for k, v in row.items() if k != "id"})
+                for row in items
+            ])
+            invoice.recalc_totals()
+        return invoice
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        items = validated_data.pop("items", None)
+        if items is not None and instance.status != "DRAFT":
+            raise serializers.ValidationError({"items": ["Lines can only be changed on a DRAFT invoice."]})
+        instance = super().update(instance, validated_data)
+        if items is not None:
+            try:
+                sync_nested_items(instance.items, self._with_amount(items), match_on=("batch_number",))
+            except DjangoValidationError as e:
+                raise serializers.ValidationError({"items": e.messages})
+            instance.recalc_totals()
+        return instance
+
 
 class PurchaseReturnItemSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,98 @@
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase
+
+from finance.test_utils import basic_entities
+
+from .importer import import_purchase_lines
+from .models import PurchaseInvoice, PurchaseInvoiceItem
+
+HEADER = "Barcode,Product Name,Batch No,Expiry,Qty,Bonus,Rate,MRP\n"
+
+
+def csv_file(*rows):
+    return io.BytesIO((HEADER + "".join(r + "\n" for r in rows)).encode())
+
+
+class PurchaseImporterTests(APITestCase):
+    def setUp(self):
+        self.e = basic_entities()
+        self.invoice = PurchaseInvoice.objects.create(invoice_no="PINV-I1", date=date(2024, 7, 1),
+                                                      supplier=self.e["supplier"], warehouse=self.e["warehouse"],
+                                                      total_amount=0)
+        self.kept = PurchaseInvoiceItem.objects.create(
+            invoice=self.invoice, product=self.e["product"], batch_number="B1", expiry_date=date(2030, 1, 1),
+            quantity=5, bonus=0, purchase_price=10, sale_price=12, amount=50,
+        )
+        PurchaseInvoiceItem.objects.create(
+            invoice=self.invoice, product=self.e["product"], batch_number="OLD", expiry_date=date(2030, 1, 1),
+            quantity=1, bonus=0, purchase_price=10, sale_price=12, amount=10,
+        )
+
+    def test_dry_run_reports_the_diff_without_writing(self):
+        report = import_purchase_lines(self.invoice, csv_file(
+            "123,,B1,2030-01-01,5,0,10,12",          # unchanged
+            ",p1,B2,12/2030,3,1,\"1,000.00\",12",     # matched by name, new line
+        ), "bill.csv", dry_run=True, replace=True)
+
+        self.assertTrue(report.ok)
+        self.assertEqual((report.rows, report.unchanged), (2, 1))
+        self.assertEqual(report.added, [{"row": 3, "batch": "B2", "quantity": 3}])
+        self.assertEqual(report.removed[0]["batch"], "OLD")
+        self.assertEqual(report.totals["totalAmount"], "3050.00")
+        self.assertEqual(self.invoice.items.count(), 2)
+
+    def test_write_updates_adds_and_replaces(self):
+        report = import_purchase_lines(self.invoice, csv_file(
+            "123,,B1,2030-01-01,8,0,10,12",
+            "123,,B2,2030-06-01,2,0,7.50,9",
+        ), "bill.csv", replace=True)
+
+        self.assertEqual(report.updated[0]["changes"]["quantity"], ["5", "8"])
+        lines = {li.batch_number: li for li in self.invoice.items.all()}
+        self.assertEqual(set(lines), {"B1", "B2"})
+        self.assertEqual((lines["B1"].quantity, lines["B1"].amount), (8, 80))
+        self.assertEqual((lines["B2"].quantity, lines["B2"].amount), (2, 15))
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.total_amount, 95)
+
+    def test_any_row_error_aborts_the_write(self):
+        other = PurchaseInvoice.objects.create(invoice_no="PINV-I2", date=date(2024, 7, 1),
+                                               supplier=self.e["supplier"], warehouse=self.e["warehouse"],
+                                               total_amount=0)
+        PurchaseInvoiceItem.objects.create(
+            invoice=other, product=self.e["product"], batch_number="TAKEN", expiry_date=date(2030, 1, 1),
+            quantity=1, bonus=0, purchase_price=10, sale_price=12, amount=10,
+        )
+        report = import_purchase_lines(self.invoice, csv_file(
+            "123,,B2,2030-01-01,2,0,10,12",
+            "123,,B2,2030-01-01,2,0,10,12",
+            "999,,B3,2030-01-01,2,0,10,12",
+            "123,,TAKEN,2030-01-01,2,0,10,12",
+            "123,,B4,soon,2,0,10,12",
+        ), "bill.csv")
+
+        self.assertFalse(report.ok)
+        errors = {e["row"]: e["errors"][0] for e in report.errors}
+        self.assertIn("repeated", errors[3])
+        self.assertIn("product not found", errors[4])
+        self.assertIn("already used on PINV-I2", errors[5])
+        self.assertIn("not understood", errors[6])
+        self.assertEqual(self.invoice.items.count(), 2)
+
+    def test_import_lines_endpoint(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email="p@example.com", password="p"))
+        url = f"/purchase/invoices/{self.invoice.pk}/import-lines/"
+        upload = SimpleUploadedFile("bill.csv", csv_file("123,,B2,2030-01-01,2,0,10,12").getvalue())
+        resp = self.client.post(url, {"file": upload, "dry_run": "1"}, format="multipart")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.data["dryRun"])
+
+        PurchaseInvoice.objects.filter(pk=self.invoice.pk).update(status="CONFIRMED")
+        upload = SimpleUploadedFile("bill.csv", csv_file("123,,B2,2030-01-01,2,0,10,12").getvalue())
+        resp = self.client.post(url, {"file": upload}, format="multipart")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.client.post(url, {}, format="multipart").status_code, 400)
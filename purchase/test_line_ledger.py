@@ -0,0 +1,63 @@
+from datetime import date
+
+from django.test import TestCase
+
+from finance.test_utils import basic_entities
+
+from .helpers import rebuild_line_ledger
+from .models import (
+    GoodsReceipt, GoodsReceiptItem, PurchaseInvoice, PurchaseInvoiceItem, PurchaseReturn, PurchaseReturnItem,
+)
+
+
+class PurchaseLineLedgerTests(TestCase):
+    def setUp(self):
+        self.e = basic_entities()
+        self.invoice = PurchaseInvoice.objects.create(invoice_no="PINV-L1", date=date(2024, 7, 1),
+                                                      supplier=self.e["supplier"], warehouse=self.e["warehouse"],
+                                                      total_amount=100)
+        self.line = PurchaseInvoiceItem.objects.create(
+            invoice=self.invoice, product=self.e["product"], batch_number="B-L1", expiry_date=date(2030, 1, 1),
+            quantity=10, bonus=2, purchase_price=10, sale_price=12,
+        )
+        self.invoice.confirm()
+
+    def grn(self, qty, batch_number=""):
+        grn = GoodsReceipt.objects.create(date=date(2024, 7, 2), invoice=self.invoice, warehouse=self.e["warehouse"])
+        item = GoodsReceiptItem.objects.create(grn=grn, invoice_item=self.line, quantity=qty, batch_number=batch_number)
+        grn.post()
+        return grn, item
+
+    def quantities(self):
+        self.line.refresh_from_db()
+        self.invoice.refresh_from_db()
+        return self.line.received_qty, self.line.returned_qty, self.invoice.status
+
+    def test_receipts_and_returns_keep_the_line_counters(self):
+        first, grn_line = self.grn(7)
+        self.assertEqual(self.quantities(), (7, 0, "PARTIAL"))
+        self.grn(5, "B-L1b")  # quantity + bonus, second batch
+        self.assertEqual(self.quantities(), (12, 0, "RECEIVED"))
+
+        pr = PurchaseReturn.objects.create(date=date(2024, 7, 3), invoice=self.invoice, supplier=self.e["supplier"],
+                                           warehouse=self.e["warehouse"], total_amount=30)
+        PurchaseReturnItem.objects.create(return_invoice=pr, grn_item=grn_line, product=self.e["product"],
+                                          quantity=3, purchase_price=10, amount=30)
+        pr.status = "CONFIRMED"
+        pr.save()
+        self.assertEqual(self.quantities()[:2], (12, 3))
+        self.assertEqual(self.line.returnable_qty, 9)
+
+        pr.status = "CANCELLED"
+        pr.save()
+        self.assertEqual(self.quantities()[:2], (12, 0))
+
+        first.unpost_cancel()
+        self.assertEqual(self.quantities()[:2], (5, 0))
+        self.assertEqual(self.line.outstanding_qty, 7)
+
+    def test_rebuild_repairs_drifted_counters(self):
+        self.grn(4)
+        PurchaseInvoiceItem.objects.filter(pk=self.line.pk).update(received_qty=99, returned_qty=7)
+        self.assertEqual(rebuild_line_ledger([self.invoice.pk]), 1)
+        self.assertEqual(self.quantities()[:2], (4, 0))
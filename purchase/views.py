@@ -1,11 +1,14 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 
 from utils.notifications import notify_user_and_party
 
+from .importer import import_purchase_lines
 from .models import PurchaseInvoice, PurchaseReturn, InvestorTransaction
 from .serializers import (
     PurchaseInvoiceSerializer,
@@ -60,6 +63,27 @@ class PurchaseInvoiceViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(invoice)
         return Response(serializer.data)
 
+    @action(detail=True, methods=["post"], url_path="import-lines", parser_classes=[MultiPartParser, FormParser])
+    def import_lines(self, request, pk=None):
+        """
+        Multipart: file=<.xlsx|.csv>, dry_run=1 (diff only), replace=1 (drop lines not in file).
+        Lines are matched by batch number; any row error aborts the write.
+        """
+        upload = request.FILES.get("file")
+        if not upload:
+            return Response({"detail": "file is required."}, status=400)
+
+        def flag(name):
+            return str(request.data.get(name, "")).lower() in {"1", "true", "yes"}
+
+        invoice = self.get_object()
+        try:
+            report = import_purchase_lines(invoice, upload, upload.name,
+                                           dry_run=flag("dry_run"), replace=flag("replace"))
+        except DjangoValidationError as e:
+            return Response({"detail": e.messages}, status=400)
+        return Response(report.as_dict(), status=200 if report.ok else 400)
+
 
 class PurchaseReturnViewSet(viewsets.ModelViewSet):
     queryset = PurchaseReturn.objects.all()
@@ -1,8 +1,14 @@
 from django.contrib import admin
-from .models import ReportLog
+from .models import ReportLog, SalesDailyFact
 
 @admin.register(ReportLog)
 class ReportLogAdmin(admin.ModelAdmin):
     list_display = ['report_name', 'generated_by', 'filters_used']
 
 
+
+@admin.register(SalesDailyFact)
+class SalesDailyFactAdmin(admin.ModelAdmin):
+    list_display = ['date', 'product', 'customer', 'booking_man', 'area', 'quantity', 'bonus', 'net_amount', 'tax']
+    list_filter = ['date']
+    raw_id_fields = ['product', 'company', 'customer', 'booking_man', 'area']
@@ -0,0 +1,26 @@
+# management/commands/rebuild_sales_facts.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from report.rollup import pd, rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SalesDailyFact rollup from invoices and sale returns"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", help="YYYY-MM-DD (inclusive)")
+        parser.add_argument("--to", dest="end", help="YYYY-MM-DD (inclusive)")
+        parser.add_argument("--no-pandas", action="store_true", help="Force the pure-Python aggregation")
+
+    def handle(self, *args, **opts):
+        try:
+            start = date.fromisoformat(opts["start"]) if opts["start"] else None
+            end = date.fromisoformat(opts["end"]) if opts["end"] else None
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+        use_pandas = not opts["no_pandas"] and pd is not None
+        rows = rebuild(start, end, use_pandas=use_pandas)
+        engine = "pandas" if use_pandas else "python"
+        self.stdout.write(self.style.SUCCESS(f"Sales facts rebuilt: {rows} row(s) ({engine})"))
@@ -8,4 +8,42 @@ class ReportLog(models.Model):
     generated_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True)
     filters_used = models.TextField()
     output_format = models.CharField(max_length=10, choices=[('pdf', 'PDF'), ('excel', 'Excel'), ('word', 'Word')])
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class SalesDailyFact(models.Model):
+    """
+    Daily sales rollup (see report/rollup.py). One row per
+    date x product x customer x booking man x area; company is carried from the product.
+    Measures are signed: returns and cancellations post negative deltas.
+    """
+    date = models.DateField()
+    product = models.ForeignKey("inventory.Product", on_delete=models.CASCADE, related_name="+")
+    company = models.ForeignKey("setting.Company", on_delete=models.CASCADE, related_name="+")
+    customer = models.ForeignKey("inventory.Party", on_delete=models.CASCADE, related_name="+")
+    booking_man = models.ForeignKey("hr.Employee", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    area = models.ForeignKey("setting.Area", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    quantity = models.IntegerField(default=0)
+    bonus = models.IntegerField(default=0)
+    net_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tax = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "product", "customer", "booking_man", "area"],
+                name="uniq_sales_daily_fact",
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date"]),
+            models.Index(fields=["product", "date"]),
+            models.Index(fields=["company", "date"]),
+            models.Index(fields=["customer", "date"]),
+            models.Index(fields=["booking_man", "date"]),
+            models.Index(fields=["area", "date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.product_id}/{self.customer_id}: {self.net_amount}"
@@ -0,0 +1,278 @@
+# report/rollup.py
+"""
+Incrementally maintained sales cube (SalesDailyFact).
+
+Hooks:
+  SaleInvoice confirm  -> record_invoice(inv, +1)
+  SaleInvoice cancel   -> record_invoice(inv, -1)   (only if it had been confirmed)
+  Sale return stock-in -> record_return(sr, {item: qty})
+  Sale return cancel   -> record_return(sr, {item: qty}, sign=-1)
+Each hook also feeds hr.SalesAchievement (see hr/achievements.py).
+
+Header discount and tax are spread over lines pro rata to line amount, so
+net_amount / tax per row add up to the invoice figures.
+
+rebuild() recomputes a date range from scratch (vectorised with pandas when
+installed, plain Python otherwise).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+
+from hr import achievements
+
+from .models import SalesDailyFact
+
+try:  # optional
+    import pandas as pd
+except ImportError:  # pragma: no cover
+    pd = None
+
+Q2 = Decimal("0.01")
+KEY_FIELDS = ("date", "product_id", "company_id", "customer_id", "booking_man_id", "area_id")
+MEASURES = ("quantity", "bonus", "net_amount", "tax")
+COUNTED_STATUSES = ("CONFIRMED", "DELIVERED")
+
+
+# ---------- delta builders ----------
+
+def _line_split(total_amount, discount, tax, amount):
+    total = Decimal(total_amount or 0)
+    share = (Decimal(amount or 0) / total) if total else Decimal("0")
+    net = Decimal(amount or 0) - Decimal(discount or 0) * share
+    return net.quantize(Q2), (Decimal(tax or 0) * share).quantize(Q2)
+
+
+def invoice_deltas(invoice, sign=1):
+    deltas = defaultdict(lambda: [0, 0, Decimal("0"), Decimal("0")])
+    area_id = invoice.customer.area_id
+    for li in invoice.items.select_related("product"):
+        net, tax = _line_split(invoice.total_amount, invoice.discount, invoice.tax, li.amount)
+        key = (invoice.date, li.product_id, li.product.company_id, invoice.customer_id,
+               invoice.booking_man_id_id, area_id)
+        d = deltas[key]
+        d[0] += sign * int(li.quantity or 0)
+        d[1] += sign * int(li.bonus or 0)
+        d[2] += sign * net
+        d[3] += sign * tax
+    return deltas
+
+
+def return_deltas(sale_return, quantities, sign=1):
+    """quantities = {SaleReturnItem: qty returned now}; returns reduce the cube."""
+    deltas = defaultdict(lambda: [0, 0, Decimal("0"), Decimal("0")])
+    inv = sale_return.invoice
+    booking_man_id = inv.booking_man_id_id if inv else None
+    area_id = sale_return.customer.area_id
+    for item, qty in quantities.items():
+        qty = int(qty or 0)
+        if qty <= 0:
+            continue
+        key = (sale_return.date, item.product_id, item.product.company_id, sale_return.customer_id,
+               booking_man_id, area_id)
+        d = deltas[key]
+        d[0] -= sign * qty
+        d[2] -= sign * (Decimal(qty) * Decimal(item.rate or 0)).quantize(Q2)
+    return deltas
+
+
+# ---------- apply ----------
+
+def apply_deltas(deltas):
+    """Add deltas into the fact table (UPDATE ... SET col = col + delta, INSERT if missing)."""
+    for key, (qty, bonus, net, tax) in deltas.items():
+        if not (qty or bonus or net or tax):
+            continue
+        lookup = dict(zip(KEY_FIELDS, key))
+        lookup.pop("company_id")
+        incr = dict(quantity=F("quantity") + qty, bonus=F("bonus") + bonus,
+                    net_amount=F("net_amount") + net, tax=F("tax") + tax)
+        if SalesDailyFact.objects.filter(**lookup).update(**incr):
+            continue
+        try:
+            with transaction.atomic():
+                SalesDailyFact.objects.create(**dict(zip(KEY_FIELDS, key)), quantity=qty, bonus=bonus,
+                                              net_amount=net, tax=tax)
+        except IntegrityError:
+            # inserted concurrently by another transaction
+            SalesDailyFact.objects.filter(**lookup).update(**incr)
+
+
+def _achievement_deltas(deltas, date, invoice_count=0):
+    """Collapse cube deltas to hr.SalesAchievement deltas (booking man x month)."""
+    acc = defaultdict(lambda: [Decimal("0"), invoice_count])
+    for key, (_, _, net, _) in deltas.items():
+        acc[(key[4], achievements.month_start(date))][0] += net
+    return {k: tuple(v) for k, v in acc.items()}
+
+
+def record_invoice(invoice, sign=1):
+    deltas = invoice_deltas(invoice, sign)
+    apply_deltas(deltas)
+    achievements.apply_deltas(_achievement_deltas(deltas, invoice.date, invoice_count=sign))
+
+
+def record_return(sale_return, quantities, sign=1):
+    deltas = return_deltas(sale_return, quantities, sign)
+    apply_deltas(deltas)
+    achievements.apply_deltas(_achievement_deltas(deltas, sale_return.date))
+
+
+# ---------- full rebuild ----------
+
+def _invoice_line_rows(start, end):
+    from sale.models import SaleInvoiceItem
+
+    qs = SaleInvoiceItem.objects.filter(invoice__status__in=COUNTED_STATUSES)
+    if start:
+        qs = qs.filter(invoice__date__gte=start)
+    if end:
+        qs = qs.filter(invoice__date__lte=end)
+    return qs.values_list(
+        "invoice__date", "product_id", "product__company_id", "invoice__customer_id",
+        "invoice__booking_man_id", "invoice__customer__area_id",
+        "quantity", "bonus", "amount",
+        "invoice__total_amount", "invoice__discount", "invoice__tax",
+    ).iterator(chunk_size=5000)
+
+
+def _return_line_rows(start, end):
+    from sale.models import SaleReturnItem
+
+    qs = SaleReturnItem.objects.filter(returned_qty__gt=0).exclude(return_invoice__status="CANCELLED")
+    if start:
+        qs = qs.filter(return_invoice__date__gte=start)
+    if end:
+        qs = qs.filter(return_invoice__date__lte=end)
+    return qs.values_list(
+        "return_invoice__date", "product_id", "product__company_id", "return_invoice__customer_id",
+        "return_invoice__invoice__booking_man_id", "return_invoice__customer__area_id",
+        "returned_qty", "rate",
+    ).iterator(chunk_size=5000)
+
+
+def _aggregate_python(inv_rows, ret_rows):
+    acc = defaultdict(lambda: [0, 0, Decimal("0"), Decimal("0")])
+    for *key, qty, bonus, amount, total, discount, tax in inv_rows:
+        net, t = _line_split(total, discount, tax, amount)
+        d = acc[tuple(key)]
+        d[0] += int(qty or 0)
+        d[1] += int(bonus or 0)
+        d[2] += net
+        d[3] += t
+    for *key, qty, rate in ret_rows:
+        d = acc[tuple(key)]
+        d[0] -= int(qty or 0)
+        d[2] -= (Decimal(qty or 0) * Decimal(rate or 0)).quantize(Q2)
+    return acc
+
+
+def _aggregate_pandas(inv_rows, ret_rows):
+    keys = list(KEY_FIELDS)
+    inv = pd.DataFrame.from_records(
+        list(inv_rows), columns=keys + ["quantity", "bonus", "amount", "total", "discount", "htax"],
+        coerce_float=True,
+    )
+    frames = []
+    if not inv.empty:
+        total = inv["total"].astype(float)
+        share = (inv["amount"].astype(float) / total.where(total != 0)).fillna(0.0)
+        inv["net_amount"] = inv["amount"].astype(float) - inv["discount"].astype(float) * share
+        inv["tax"] = inv["htax"].astype(float) * share
+        frames.append(inv[keys + list(MEASURES)])
+    ret = pd.DataFrame.from_records(list(ret_rows), columns=keys + ["quantity", "rate"], coerce_float=True)
+    if not ret.empty:
+        ret["quantity"] = -ret["quantity"].astype(int)
+        ret["net_amount"] = ret["quantity"] * ret["rate"].astype(float)
+        ret["bonus"] = 0
+        ret["tax"] = 0.0
+        frames.append(ret[keys + list(MEASURES)])
+    if not frames:
+        return {}
+    df = pd.concat(frames, ignore_index=True)
+    grouped = df.groupby(keys, dropna=False, sort=False)[list(MEASURES)].sum().reset_index()
+
+    def _none(v):
+        return None if pd.isna(v) else v
+
+    acc = {}
+    for row in grouped.itertuples(index=False):
+        key = (row.date, row.product_id, row.company_id, row.customer_id,
+               _none(row.booking_man_id), _none(row.area_id))
+        key = (key[0],) + tuple(None if k is None else int(k) for k in key[1:])  # numpy -> int
+        acc[key] = [int(row.quantity), int(row.bonus),
+                    Decimal(str(row.net_amount)).quantize(Q2), Decimal(str(row.tax)).quantize(Q2)]
+    return acc
+
+
+@transaction.atomic
+def rebuild(start=None, end=None, *, use_pandas=None, batch_size=2000):
+    """Recompute SalesDailyFact for [start, end] (whole history when both are None)."""
+    use_pandas = (pd is not None) if use_pandas is None else (use_pandas and pd is not None)
+    inv_rows, ret_rows = _invoice_line_rows(start, end), _return_line_rows(start, end)
+    acc = _aggregate_pandas(inv_rows, ret_rows) if use_pandas else _aggregate_python(inv_rows, ret_rows)
+
+    stale = SalesDailyFact.objects.all()
+    if start:
+        stale = stale.filter(date__gte=start)
+    if end:
+        stale = stale.filter(date__lte=end)
+    stale.delete()
+
+    objs = [
+        SalesDailyFact(**dict(zip(KEY_FIELDS, key)), quantity=m[0], bonus=m[1], net_amount=m[2], tax=m[3])
+        for key, m in acc.items()
+        if any(m)
+    ]
+    SalesDailyFact.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+# ---------- pivot ----------
+
+DIMENSIONS = {
+    "date": ("date", None),
+    "month": ("month", None),
+    "product": ("product_id", "product__name"),
+    "company": ("company_id", "company__name"),
+    "customer": ("customer_id", "customer__name"),
+    "booking_man": ("booking_man_id", "booking_man__name"),
+    "area": ("area_id", "area__name"),
+}
+FILTERS = {"product": "product_id", "company": "company_id", "customer": "customer_id",
+           "booking_man": "booking_man_id", "area": "area_id"}
+
+
+def pivot(rows, *, start=None, end=None, filters=None, metrics=MEASURES, order_by=None, limit=None):
+    """
+    GROUP BY the requested dimensions over the fact table.
+    rows: subset of DIMENSIONS; filters: {dimension: [ids]}.
+    """
+    unknown = [r for r in rows if r not in DIMENSIONS] + [m for m in metrics if m not in MEASURES]
+    if unknown:
+        raise ValueError(f"Unknown dimension/metric: {', '.join(unknown)}")
+
+    qs = SalesDailyFact.objects.all()
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    for dim, ids in (filters or {}).items():
+        if ids:
+            qs = qs.filter(**{f"{FILTERS[dim]}__in": ids})
+    if "month" in rows:
+        qs = qs.annotate(month=TruncMonth("date"))
+
+    fields = []
+    for r in rows:
+        fields += [f for f in DIMENSIONS[r] if f]
+    qs = qs.values(*fields).annotate(**{m: Sum(m) for m in metrics})
+    qs = qs.order_by(*(order_by or ([f"-{metrics[0]}"] if metrics else fields)))
+    if limit:
+        qs = qs[:limit]
+    data = list(qs)
+    totals = {m: sum((r[m] or 0) for r in data) for m in metrics}
+    return data, totals
@@ -0,0 +1,75 @@
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.test import TestCase
+
+from finance.test_utils import basic_entities
+from hr.models import Employee
+from inventory.models import Product
+from sale.models import SaleInvoice, SaleInvoiceItem
+
+from . import rollup
+from .models import SalesDailyFact
+
+D = date(2024, 6, 3)
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.e = basic_entities()
+        p1 = self.e["product"]
+        self.p2 = Product.objects.create(
+            name="P2", barcode="456", company=p1.company, group=p1.group, distributor=p1.distributor,
+            trade_price=5, retail_price=6, sales_tax_ratio=0, fed_tax_ratio=0, disable_sale_purchase=False,
+        )
+        self.booker = Employee.objects.create(name="Booker", phone="1")
+
+    def invoice(self, no, lines, discount=0):
+        inv = SaleInvoice.objects.create(invoice_no=no, date=D, customer=self.e["customer"],
+                                         warehouse=self.e["warehouse"], discount=discount,
+                                         booking_man_id=self.booker)
+        for product, qty, rate in lines:
+            SaleInvoiceItem.objects.create(invoice=inv, product=product, quantity=qty, rate=rate, amount=qty * rate)
+        inv.confirm()
+        return inv
+
+    def facts(self):
+        return {
+            f.product_id: (f.quantity, f.net_amount, f.tax)
+            for f in SalesDailyFact.objects.filter(date=D)
+            if f.quantity or f.net_amount or f.tax
+        }
+
+    def test_confirm_spreads_discount_and_cancel_takes_it_back(self):
+        p1 = self.e["product"]
+        self.invoice("SINV-F1", [(p1, 6, 10), (self.p2, 8, 5)], discount=10)   # lines 60 / 40
+        second = self.invoice("SINV-F2", [(p1, 1, 10)])
+        self.assertEqual(self.facts(), {
+            p1.pk: (7, Decimal("64.00"), Decimal("0.00")),
+            self.p2.pk: (8, Decimal("36.00"), Decimal("0.00")),
+        })
+
+        second.cancel()
+        self.assertEqual(self.facts()[p1.pk], (6, Decimal("54.00"), Decimal("0.00")))
+
+    def test_header_tax_is_spread_pro_rata(self):
+        self.assertEqual(rollup._line_split(100, 10, 5, 60), (Decimal("54.00"), Decimal("3.00")))
+        self.assertEqual(rollup._line_split(100, 10, 5, 40), (Decimal("36.00"), Decimal("2.00")))
+
+    def test_rebuild_matches_the_incremental_table(self):
+        p1 = self.e["product"]
+        self.invoice("SINV-F1", [(p1, 6, 10), (self.p2, 8, 5)], discount=10)
+        self.invoice("SINV-F2", [(p1, 1, 10)]).cancel()
+        incremental = self.facts()
+
+        self.assertEqual(rollup.rebuild(use_pandas=False), 2)
+        self.assertEqual(self.facts(), incremental)
+
+    @skipUnless(rollup.pd is not None, "pandas not installed")
+    def test_pandas_rebuild_matches_python(self):
+        self.invoice("SINV-F1", [(self.e["product"], 6, 10), (self.p2, 8, 5)], discount=10)
+        rollup.rebuild(use_pandas=False)
+        python = self.facts()
+        rollup.rebuild(use_pandas=True)
+        self.assertEqual(self.facts(), python)
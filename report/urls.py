@@ -8,5 +8,6 @@ urlpatterns = [
 
  
     path("financial-statement/", views.financial_statement, name="financial_statement"),
+    path("sales-pivot/", views.sales_pivot, name="sales_pivot"),
 
 ]
@@ -9,6 +9,7 @@ from rest_framework.response import Response
 # from .ratios import current_ratio, gross_profit_margin
 
 from .financial_statements import account_type_balances
+from .rollup import DIMENSIONS, FILTERS, MEASURES, pivot
 
 
 @require_http_methods(["GET"])
@@ -57,3 +58,34 @@ def financial_statement(request):
     data = {k: str(v) for k, v in totals.items()}
     return JsonResponse(data)
 
+
+@api_view(["GET"])
+def sales_pivot(request):
+    """Pivot over the sales rollup.
+
+    ``rows`` (comma separated) picks the GROUP BY dimensions
+    (date, month, product, company, customer, booking_man, area), ``metrics``
+    the measures (quantity, bonus, net_amount, tax). ``start``/``end`` bound
+    the period and ``product``/``company``/``customer``/``booking_man``/``area``
+    accept comma separated ids to filter on.
+    """
+
+    def _csv(name):
+        return [v.strip() for v in (request.GET.get(name) or "").split(",") if v.strip()]
+
+    rows = _csv("rows") or ["month"]
+    metrics = _csv("metrics") or list(MEASURES)
+    try:
+        start = date.fromisoformat(request.GET["start"]) if request.GET.get("start") else None
+        end = date.fromisoformat(request.GET["end"]) if request.GET.get("end") else None
+        filters = {dim: [int(v) for v in _csv(dim)] for dim in FILTERS}
+        limit = int(request.GET.get("limit") or 1000)
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=400)
+
+    try:
+        data, totals = pivot(rows, start=start, end=end, filters=filters, metrics=metrics,
+                             limit=min(max(limit, 1), 10000))
+    except ValueError as e:
+        return Response({"detail": str(e), "dimensions": list(DIMENSIONS), "metrics": list(MEASURES)}, status=400)
+    return Response({"rows": rows, "metrics": metrics, "count": len(data), "totals": totals, "results": data})
@@ -1,8 +1,6 @@
 from django.contrib import admin,messages
 from django.utils.html import format_html
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from xhtml2pdf import pisa
+from utils.invoice_pdf import render_invoice_pdf, render_invoices_batch, pdf_response
 from inventory.models import Batch, StockMovement
 from .models import (
     SaleInvoice,
@@ -26,26 +24,21 @@ from decimal import Decimal
 from django.utils.dateformat import format as date_format
 from finance.hordak_posting import reverse_txn_generic,post_sale_return_refund_cash,post_sale_return_credit_note,_cash_or_bank
 from utils.stock import stock_in, stock_out,stock_return
+from report.rollup import record_return
 # --- Inlines ---
 
 #--- PDF generation ---
 def generate_pdf_invoice(invoice):
-    context = {
-        'invoice': invoice,
-        'items': invoice.items.all() if hasattr(invoice, 'items') else [],
-        'invoice_type': invoice.__class__.__name__,
-    }
-    html = render_to_string("invoices/pdf_invoice.html", context)
-    response = HttpResponse(content_type='application/pdf')
-    pisa.CreatePDF(html, dest=response)
-    return response
+    return pdf_response(render_invoice_pdf(invoice), filename=f"{invoice.invoice_no or invoice.pk}.pdf")
 
 # --- Admin Actions ---
 
 def print_invoice_pdf(modeladmin, request, queryset):
+    """One invoice -> full HTML layout; several -> fast layout merged into one PDF."""
     if queryset.count() == 1:
         return generate_pdf_invoice(queryset.first())
-    return HttpResponse("Please select only one invoice to print.")
+    qs = queryset.select_related("customer", "warehouse").prefetch_related("items__product", "items__batch").order_by("id")
+    return pdf_response(render_invoices_batch(qs, renderer="fast"), filename="invoices.pdf")
 
 print_invoice_pdf.short_description = "Print Invoice PDF"
 class SaleInvoiceItemInline(admin.TabularInline):
@@ -118,7 +111,7 @@ class SaleInvoiceAdmin(admin.ModelAdmin):
         if updated:
             self.message_user(request, f"Delivered (all remaining) for {updated} invoice(s).", messages.SUCCESS)
 
-    actions = [action_confirm, action_deliver_all]
+    actions = [action_confirm, action_deliver_all, print_invoice_pdf]
 
     # Object-level endpoints (buttons in change page)
     def get_urls(self):
@@ -270,7 +263,8 @@ class SaleReturnAdmin(admin.ModelAdmin):
             if form.is_valid():
                 try:
                     with transaction.atomic():
-                        for it in sr.items.select_for_update():
+                        returned_now = {}
+                        for it in sr.items.select_for_update().select_related("product"):
                             qty = int(form.cleaned_data.get(f"qty_{it.pk}") or 0)
                             if qty <= 0:
                                 continue
@@ -284,6 +278,8 @@ class SaleReturnAdmin(admin.ModelAdmin):
                             )
                             it.returned_qty = (it.returned_qty or 0) + qty
                             it.save(update_fields=["returned_qty"])
+                            returned_now[it] = qty
+                        record_return(sr, returned_now)
                         # refresh parent returned value
                         sr.recompute_returned_value()
                         if sr.returned_value > 0 and sr.status == "DRAFT":
@@ -390,9 +386,11 @@ class SaleReturnAdmin(admin.ModelAdmin):
         try:
             with transaction.atomic():
                 # reverse stock-in (only returned_qty)
-                for it in sr.items.select_for_update():
+                reversed_now = {}
+                for it in sr.items.select_for_update().select_related("product"):
                     q = int(it.returned_qty or 0)
                     if q > 0:
+                        reversed_now[it] = q
                         stock_out(
                             product=it.product,
                             quantity=q,
@@ -402,6 +400,7 @@ class SaleReturnAdmin(admin.ModelAdmin):
                         )
                         it.returned_qty = 0
                         it.save(update_fields=["returned_qty"])
+                record_return(sr, reversed_now, sign=-1)
 
                 # reverse accounting
                 if sr.refund_txn_id:
@@ -1,16 +1,24 @@
 # sale/api/serializers.py
 from decimal import Decimal
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Sum
 from rest_framework import serializers
 from sale.models import SaleInvoice, SaleInvoiceItem
 from inventory.models import Product, Batch
+from utils.nested import sync_nested_items
+from pricing.resolver import resolve_prices
 
 class SaleInvoiceItemWriteSerializer(serializers.ModelSerializer):
+    id      = serializers.IntegerField(required=False)  # lets an update address existing lines
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
     batch   = serializers.PrimaryKeyRelatedField(queryset=Batch.objects.all(), allow_null=True, required=False)
+    rate    = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)  # default: customer price
+    amount  = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
 
     class Meta:
         model  = SaleInvoiceItem
-        fields = ("id", "product", "batch", "quantity", "rate", "amount", "bonus", "packing", "discount1", "discount2")
+        fields = ("id", "product", "batch", "quantity", "rate", "amount", "bonus", "discount1")
 
 class SaleInvoiceItemReadSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.name", read_only=True)
@@ -23,7 +31,7 @@ class SaleInvoiceItemReadSerializer(serializers.ModelSerializer):
         fields = (
             "id", "product", "product_name", "batch", "batch_number", "expiry_date",
             "quantity", "delivered_qty", "remaining_to_deliver", "rate", "amount",
-            "bonus", "packing", "discount1", "discount2"
+            "bonus", "discount1",
         )
 
 class SaleInvoiceWriteSerializer(serializers.ModelSerializer):
@@ -32,13 +40,21 @@ class SaleInvoiceWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model  = SaleInvoice
         fields = (
-            "id", "invoice_no", "date", "customer", "warehouse",
+            "id", "invoice_no", "client_ref", "date", "customer", "warehouse",
             "total_amount", "discount", "tax", "grand_total",
             "paid_amount", "status", "payment_status", "items",
         )
         read_only_fields = ("status", "payment_status", "grand_total")
 
     def validate(self, data):
+        # missing rates come from the customer's price list (else the product rate)
+        need = [it for it in data.get("items", []) if it.get("rate") is None]
+        if need:
+            customer = data.get("customer") or getattr(self.instance, "customer", None)
+            prices = resolve_prices(customer, {it["product"].pk for it in need})
+            for it in need:
+                it["rate"] = prices.get(it["product"].pk, Decimal("0"))
+
         # compute totals if not provided correctly
         total = Decimal("0")
         for it in data.get("items", []):
@@ -55,16 +71,37 @@ class SaleInvoiceWriteSerializer(serializers.ModelSerializer):
         data["grand_total"] = (total - discount + tax)
         return data
 
+    @staticmethod
+    def _recalc_totals(inv):
+        # Recalc one more time from actual DB (one aggregate)
+        inv.total_amount = inv.items.aggregate(t=Sum("amount"))["t"] or Decimal("0")
+        inv.grand_total  = (inv.total_amount - Decimal(inv.discount or 0) + Decimal(inv.tax or 0))
+        inv.save(update_fields=["total_amount", "grand_total"])
+
+    @transaction.atomic
     def create(self, validated):
         items = validated.pop("items", [])
         inv = SaleInvoice.objects.create(**validated)   # keep provided invoice_no as-is
         SaleInvoiceItem.objects.bulk_create([
-            SaleInvoiceItem(invoice=inv, **row) for row in items
+            SaleInvoiceItem(invoice=inv, **{k: v for k, v in row.items() if k != "id"}) for row in items
         ])
-        # Recalc one more time from actual DB
-        inv.total_amount = sum((it.amount for it in inv.items.all()), Decimal("0"))
-        inv.grand_total  = (inv.total_amount - Decimal(inv.discount or 0) + Decimal(inv.tax or 0))
-        inv.save(update_fields=["total_amount", "grand_total"])
+        self._recalc_totals(inv)
+        return inv
+
+    @transaction.atomic
+    def update(self, inv, validated):
+        if inv.status != "DRAFT":
+            raise serializers.ValidationError({"detail": "Only DRAFT invoices can be edited."})
+        items = validated.pop("items", None)
+        for attr, val in validated.items():
+            setattr(inv, attr, val)
+        inv.save()
+        if items is not None:
+            try:
+                sync_nested_items(inv.items, items)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError({"items": e.messages})
+        self._recalc_totals(inv)
         return inv
 
 class SaleInvoiceReadSerializer(serializers.ModelSerializer):
@@ -99,3 +136,26 @@ class PaymentSerializer(serializers.Serializer):
     date        = serializers.DateField()
     amount      = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal("0.01"))
     description = serializers.CharField(allow_blank=True, required=False)
+
+
+# --- Bulk sync payloads (ids are resolved in bulk by sale.bulk) ---
+
+class BulkSaleInvoiceItemSerializer(serializers.Serializer):
+    product   = serializers.IntegerField()
+    batch     = serializers.IntegerField(required=False, allow_null=True)
+    quantity  = serializers.IntegerField(min_value=1)
+    bonus     = serializers.IntegerField(min_value=0, required=False, default=0)
+    rate      = serializers.DecimalField(max_digits=10, decimal_places=2)
+    discount1 = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, default=Decimal("0"))
+    amount    = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, allow_null=True)
+
+class BulkSaleInvoiceSerializer(serializers.Serializer):
+    client_ref = serializers.CharField(max_length=64)
+    invoice_no = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    date       = serializers.DateField()
+    customer   = serializers.IntegerField()
+    warehouse  = serializers.IntegerField()
+    booking_man_id = serializers.IntegerField(required=False, allow_null=True)
+    discount   = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, default=Decimal("0"))
+    tax        = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, default=Decimal("0"))
+    items      = BulkSaleInvoiceItemSerializer(many=True, allow_empty=False)
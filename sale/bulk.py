@@ -0,0 +1,223 @@
+# sale/bulk.py
+"""
+Batch creation of DRAFT sale invoices for field-sales sync.
+
+One request carries a whole day of orders. Instead of N round-trips through
+SaleInvoiceWriteSerializer we:
+  - validate every row shape with BulkSaleInvoiceSerializer (no DB hits),
+  - resolve customers / warehouses / products / batches with one in_bulk each,
+  - skip rows whose client_ref already exists (idempotent re-sync),
+  - reject device-supplied invoice numbers that exist or repeat in the batch,
+  - reserve invoice numbers as one block (InvoiceSequence row lock),
+  - bulk_create headers, then bulk_create all lines.
+If a concurrent sync wins a client_ref / invoice_no between the checks and
+the INSERT, the headers are retried one by one in savepoints and the losers
+are reported as duplicate / error instead of failing the whole batch.
+
+Results are returned per row so the app can retry only what failed.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+
+from inventory.models import Party, Product, Batch
+from setting.models import Warehouse
+from sale.api.serializers import BulkSaleInvoiceSerializer
+from .models import SaleInvoice, SaleInvoiceItem
+
+Q2 = Decimal("0.01")
+
+
+def _line_amount(row):
+    amt = row.get("amount")
+    if amt is None:
+        amt = Decimal(row["quantity"]) * Decimal(row["rate"])
+    return Decimal(amt).quantize(Q2)
+
+
+def _ids(rows, key):
+    return {r[key] for r in rows if r.get(key)}
+
+
+@transaction.atomic
+def bulk_create_invoices(payload):
+    """
+    payload = [ {client_ref, date, customer, warehouse, items: [...]}, ... ]
+    Returns a list (same order as payload) of
+      {"index", "client_ref", "status": created|duplicate|error, "id", "invoice_no", "errors"}
+    """
+    results = [None] * len(payload)
+
+    # 1) shape validation (per row, no queries)
+    valid = []  # (index, data)
+    for idx, raw in enumerate(payload):
+        ser = BulkSaleInvoiceSerializer(data=raw)
+        if ser.is_valid():
+            valid.append((idx, ser.validated_data))
+        else:
+            results[idx] = {
+                "index": idx,
+                "client_ref": (raw or {}).get("client_ref") if isinstance(raw, dict) else None,
+                "status": "error",
+                "errors": ser.errors,
+            }
+
+    # 2) idempotency: one query for already-synced refs
+    refs = [d["client_ref"] for _, d in valid]
+    existing = dict(
+        SaleInvoice.objects.filter(client_ref__in=refs).values_list("client_ref", "id")
+    )
+    existing_no = dict(
+        SaleInvoice.objects.filter(id__in=existing.values()).values_list("id", "invoice_no")
+    ) if existing else {}
+
+    # 3) resolve FKs in bulk
+    data_rows = [d for _, d in valid]
+    item_rows = [it for d in data_rows for it in d["items"]]
+    customers  = Party.objects.in_bulk(_ids(data_rows, "customer"))
+    warehouses = Warehouse.objects.in_bulk(_ids(data_rows, "warehouse"))
+    products   = Product.objects.in_bulk(_ids(item_rows, "product"))
+    batches    = Batch.objects.in_bulk(_ids(item_rows, "batch"))
+
+    seen_refs = set()
+    to_create = []  # (index, data, lines, total)
+    for idx, d in valid:
+        ref = d["client_ref"]
+        if ref in existing:
+            pk = existing[ref]
+            results[idx] = {"index": idx, "client_ref": ref, "status": "duplicate",
+                            "id": pk, "invoice_no": existing_no.get(pk)}
+            continue
+        if ref in seen_refs:
+            results[idx] = {"index": idx, "client_ref": ref, "status": "error",
+                            "errors": {"client_ref": ["Duplicated within this batch."]}}
+            continue
+        seen_refs.add(ref)
+
+        errors = {}
+        customer = customers.get(d["customer"])
+        if not customer or customer.party_type != "customer":
+            errors["customer"] = [f"Unknown customer {d['customer']}."]
+        if d["warehouse"] not in warehouses:
+            errors["warehouse"] = [f"Unknown warehouse {d['warehouse']}."]
+
+        lines, line_errors, total = [], {}, Decimal("0")
+        for n, it in enumerate(d["items"]):
+            product = products.get(it["product"])
+            if not product:
+                line_errors[n] = f"Unknown product {it['product']}."
+                continue
+            if product.disable_sale_purchase:
+                line_errors[n] = f"Product {product.name} is disabled for sale."
+                continue
+            batch = None
+            if it.get("batch"):
+                batch = batches.get(it["batch"])
+                if not batch or batch.product_id != product.id:
+                    line_errors[n] = f"Batch {it['batch']} does not belong to product {product.id}."
+                    continue
+                if batch.warehouse_id != d["warehouse"]:
+                    line_errors[n] = f"Batch {it['batch']} is not in warehouse {d['warehouse']}."
+                    continue
+            amount = _line_amount(it)
+            total += amount
+            lines.append(dict(
+                product_id=product.id,
+                batch_id=batch.id if batch else None,
+                quantity=it["quantity"],
+                bonus=it.get("bonus") or 0,
+                rate=it["rate"],
+                discount1=it.get("discount1") or 0,
+                amount=amount,
+            ))
+        if line_errors:
+            errors["items"] = line_errors
+
+        if errors:
+            results[idx] = {"index": idx, "client_ref": ref, "status": "error", "errors": errors}
+            continue
+        to_create.append((idx, d, lines, total))
+
+    if not to_create:
+        return results
+
+    # 4) device-supplied numbers: one query, plus repeats inside the payload
+    given = [d["invoice_no"] for _, d, _, _ in to_create if d.get("invoice_no")]
+    taken = set(SaleInvoice.objects.filter(invoice_no__in=given).values_list("invoice_no", flat=True))
+    seen_nos, kept = set(), []
+    for t in to_create:
+        idx, d = t[0], t[1]
+        no = d.get("invoice_no")
+        if no and (no in taken or no in seen_nos):
+            detail = "Invoice number already exists." if no in taken else "Duplicated within this batch."
+            results[idx] = {"index": idx, "client_ref": d["client_ref"], "status": "error",
+                            "errors": {"invoice_no": [detail]}}
+            continue
+        if no:
+            seen_nos.add(no)
+        kept.append(t)
+    to_create = kept
+    if not to_create:
+        return results
+
+    # 5) numbers in one block, reserved under the sequence row lock
+    needing = [t for t in to_create if not t[1].get("invoice_no")]
+    numbers = iter(SaleInvoice._next_sequence_block(len(needing)))
+
+    headers = []
+    for idx, d, lines, total in to_create:
+        discount = Decimal(d.get("discount") or 0)
+        tax = Decimal(d.get("tax") or 0)
+        headers.append(SaleInvoice(
+            invoice_no=d.get("invoice_no") or next(numbers),
+            client_ref=d["client_ref"],
+            date=d["date"],
+            customer_id=d["customer"],
+            warehouse_id=d["warehouse"],
+            booking_man_id_id=d.get("booking_man_id"),
+            total_amount=total,
+            discount=discount,
+            tax=tax,
+            grand_total=total - discount + tax,
+        ))
+
+    # bulk_create skips save(); numbers were assigned above
+    try:
+        with transaction.atomic():
+            SaleInvoice.objects.bulk_create(headers)
+        inserted = list(zip(headers, to_create))
+    except IntegrityError:
+        inserted = _insert_one_by_one(headers, to_create, results)
+
+    SaleInvoiceItem.objects.bulk_create([
+        SaleInvoiceItem(invoice=inv, **line)
+        for inv, (_, _, lines, _) in inserted
+        for line in lines
+    ])
+
+    for inv, (idx, d, _, _) in inserted:
+        results[idx] = {"index": idx, "client_ref": d["client_ref"], "status": "created",
+                        "id": inv.pk, "invoice_no": inv.invoice_no}
+    return results
+
+
+def _insert_one_by_one(headers, to_create, results):
+    """Slow path after a unique conflict: each header in its own savepoint."""
+    inserted = []
+    for inv, t in zip(headers, to_create):
+        idx, d = t[0], t[1]
+        try:
+            with transaction.atomic():
+                SaleInvoice.objects.bulk_create([inv])
+        except IntegrityError:
+            inv.pk = None
+            winner = SaleInvoice.objects.filter(client_ref=d["client_ref"]).values_list("id", "invoice_no").first()
+            if winner:
+                results[idx] = {"index": idx, "client_ref": d["client_ref"], "status": "duplicate",
+                                "id": winner[0], "invoice_no": winner[1]}
+            else:
+                results[idx] = {"index": idx, "client_ref": d["client_ref"], "status": "error",
+                                "errors": {"invoice_no": [f"Invoice number {inv.invoice_no} already exists."]}}
+            continue
+        inserted.append((inv, t))
+    return inserted
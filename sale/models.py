@@ -15,6 +15,7 @@ from datetime import timedelta
 from setting.constants import TAX_PAYABLE_ACCOUNT_CODE
 from decimal import Decimal
 from django.db import transaction
+from django.utils import timezone
 
 
 from finance.models_receipts import CustomerReceipt
@@ -23,6 +24,7 @@ from finance.hordak_posting import post_sale, post_customer_receipt,post_custome
 from django.core.exceptions import ValidationError
 from django.db.models import Sum
 from finance.models_receipts import CustomerReceiptAllocation
+from report.rollup import record_invoice, COUNTED_STATUSES
 logger = logging.getLogger(__name__)
 # Reuse your helper for selecting the warehouse cash/bank account
 def _cash_or_bank_for(warehouse):
@@ -30,6 +32,18 @@ def _cash_or_bank_for(warehouse):
 
 # Your Hordak posting helpers — align names/imports to your projectt # <- implement/align if needed
 Q2 = Decimal("0.01")
+class InvoiceSequence(models.Model):
+    """
+    Last number handed out per invoice prefix. Reservations lock this row
+    (select_for_update), so concurrent saves / bulk syncs never get the same block.
+    """
+    prefix = models.CharField(max_length=20, unique=True)
+    last = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix}{self.last}"
+
+
 class SaleInvoice(models.Model):
     STATUS = (
         ("DRAFT", "Draft (SO)"),
@@ -41,6 +55,8 @@ class SaleInvoice(models.Model):
 
     # Number frozen after first save
     invoice_no = models.CharField(max_length=50, unique=True, blank=True)
+    # Idempotency key supplied by field apps when syncing offline orders
+    client_ref = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
 
     date = models.DateField()
@@ -74,22 +90,45 @@ class SaleInvoice(models.Model):
     booking_man_id  = models.ForeignKey("hr.Employee", on_delete=models.SET_NULL, null=True, blank=True, related_name="bookings")
     delivery_man_id = models.ForeignKey("hr.Employee", on_delete=models.SET_NULL, null=True, blank=True, related_name="deliveries")
 
+    class Meta:
+        indexes = [
+            # recovery worklist: open invoices per customer (customer -> area via Party index)
+            models.Index(fields=["payment_status", "status", "customer"]),
+        ]
+
     # ---------- numbering ----------
     @staticmethod
     def _next_sequence(prefix="SINV-"):
+        return SaleInvoice._next_sequence_block(1, prefix)[0]
+
+    @staticmethod
+    def _last_number(prefix):
         last = (
             SaleInvoice.objects.filter(invoice_no__startswith=prefix)
             .order_by("-id")
             .values_list("invoice_no", flat=True)
             .first()
         )
-        if not last:
-            return f"{prefix}1"
         try:
-            n = int(str(last).split("-")[-1])
+            return int(str(last).split("-")[-1]) if last else 0
         except Exception:
-            n = 0
-        return f"{prefix}{n + 1}"
+            return 0
+
+    @staticmethod
+    @transaction.atomic
+    def _next_sequence_block(count, prefix="SINV-"):
+        """
+        Reserve `count` consecutive numbers. The InvoiceSequence row is locked
+        until the caller's transaction ends. The newest invoice number is also
+        consulted, so a number typed in by hand or by a device is not reissued.
+        """
+        if count <= 0:
+            return []
+        seq, _ = InvoiceSequence.objects.select_for_update().get_or_create(prefix=prefix)
+        n = max(seq.last, SaleInvoice._last_number(prefix))
+        seq.last = n + count
+        seq.save(update_fields=["last"])
+        return [f"{prefix}{n + i}" for i in range(1, count + 1)]
 
     def _ensure_number(self):
         if not self.invoice_no:
@@ -149,6 +188,7 @@ class SaleInvoice(models.Model):
             "invoice_no","total_amount","grand_total",
             "status","payment_status","hordak_txn"
         ])
+        record_invoice(self)
 
     @transaction.atomic
     def receive_payment(self, amount: Decimal):
@@ -177,6 +217,43 @@ class SaleInvoice(models.Model):
         self._recalc_payment_status()
         self.save(update_fields=["paid_amount","payment_status"])
 
+    @transaction.atomic
+    def collect_recovery(self, amount: Decimal, *, employee=None, notes: str = "", on_date=None):
+        """
+        Field recovery against this invoice:
+          lock invoice -> CustomerReceipt (post + allocate) -> RecoveryLog.
+        Ledger, Party.current_balance and payment_status stay consistent.
+        """
+        amt = Decimal(amount or 0)
+        if amt <= 0:
+            raise ValidationError("Amount must be > 0.")
+        inv = SaleInvoice.objects.select_for_update().select_related("customer", "warehouse").get(pk=self.pk)
+        if inv.status not in {"CONFIRMED", "DELIVERED"}:
+            raise ValidationError("Recovery allowed only for CONFIRMED/DELIVERED invoices.")
+        if amt > inv.outstanding:
+            raise ValidationError(f"Amount {amt} exceeds outstanding {inv.outstanding}.")
+        if not _cash_or_bank_for(inv.warehouse):
+            raise ValidationError("No Cash/Bank account configured for this warehouse.")
+
+        on_date = on_date or timezone.localdate()
+        rcpt = CustomerReceipt.objects.create(
+            date=on_date,
+            customer=inv.customer,
+            warehouse=inv.warehouse,
+            amount=amt,
+            description=f"Recovery for {inv.invoice_no}",
+        )
+        rcpt.post()
+        rcpt.allocate(inv, amt)   # updates paid_amount / payment_status on the locked row
+        RecoveryLog.objects.create(
+            invoice=inv,
+            employee=employee,
+            date=on_date,
+            notes=notes or f"Payment received: {amt} ({rcpt.number})",
+        )
+        self.refresh_from_db(fields=["paid_amount", "payment_status"])
+        return rcpt
+
     # ---------- stock out (partial-aware) ----------
     @transaction.atomic
     def deliver_partial(self, quantities: dict[int, int]):
@@ -247,6 +324,7 @@ class SaleInvoice(models.Model):
         """
         if self.status == "CANCELLED":
             return
+        was_counted = self.status in COUNTED_STATUSES
 
         # ---------- 1) reverse delivered stock ----------
         delivered_lines = list(self.items.all())
@@ -337,6 +415,8 @@ class SaleInvoice(models.Model):
         self.payment_status = "UNPAID"
         self.status = "CANCELLED"
         self.save(update_fields=["paid_amount", "payment_status", "status"])
+        if was_counted:
+            record_invoice(self, sign=-1)
     # Keep same invoice number from first save
     def save(self, *args, **kwargs):
         if self.pk is None and not self.invoice_no:
@@ -470,6 +550,9 @@ class RecoveryLog(models.Model):
     date = models.DateField()
     notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["invoice", "date"])]
+
     def __str__(self):
         return f"{self.invoice.invoice_no} - {self.date}"
 
@@ -0,0 +1,89 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from finance.test_utils import basic_entities
+
+from .models import SaleInvoice
+
+User = get_user_model()
+
+
+class SaleInvoiceBulkCreateTests(APITestCase):
+    url = "/sales/sale-invoices/bulk/"
+
+    def setUp(self):
+        data = basic_entities()
+        self.warehouse = data["warehouse"]
+        self.product = data["product"]
+        self.customer = data["customer"]
+        self.user = User.objects.create_user("bulk@example.com", "pass")
+        self.client.force_authenticate(self.user)
+
+    def _row(self, ref, product=None, **extra):
+        return {
+            "client_ref": ref,
+            "date": str(date.today()),
+            "customer": self.customer.id,
+            "warehouse": self.warehouse.id,
+            "items": [{"product": product or self.product.id, "quantity": 2, "rate": "10.00"}],
+            **extra,
+        }
+
+    def _invoice(self, **kw):
+        return SaleInvoice.objects.create(date=date.today(), customer=self.customer, warehouse=self.warehouse, **kw)
+
+    def test_partial_failure_and_idempotency(self):
+        payload = {"invoices": [self._row("dev-1"), self._row("dev-2", product=999999)]}
+        resp = self.client.post(self.url, payload, format="json")
+        self.assertEqual(resp.status_code, 200)
+        statuses = [r["status"] for r in resp.data["results"]]
+        self.assertEqual(statuses, ["created", "error"])
+        inv = SaleInvoice.objects.get(client_ref="dev-1")
+        self.assertEqual(inv.total_amount, Decimal("20.00"))
+        self.assertEqual(inv.items.count(), 1)
+
+        resp = self.client.post(self.url, {"invoices": [self._row("dev-1")]}, format="json")
+        self.assertEqual(resp.data["results"][0]["status"], "duplicate")
+        self.assertEqual(resp.data["results"][0]["id"], inv.id)
+        self.assertEqual(SaleInvoice.objects.filter(client_ref="dev-1").count(), 1)
+
+    def test_device_invoice_numbers_are_checked(self):
+        self._invoice(invoice_no="SINV-7")
+        rows = [
+            self._row("dev-1", invoice_no="SINV-7"),    # exists
+            self._row("dev-2", invoice_no="DEV-1"),
+            self._row("dev-3", invoice_no="DEV-1"),     # repeats in payload
+            self._row("dev-4"),
+        ]
+        resp = self.client.post(self.url, {"invoices": rows}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        results = resp.data["results"]
+        self.assertEqual([r["status"] for r in results], ["error", "created", "error", "created"])
+        self.assertIn("invoice_no", results[0]["errors"])
+        self.assertIn("invoice_no", results[2]["errors"])
+        self.assertEqual(results[3]["invoice_no"], "SINV-8")  # sequence continues after the typed number
+
+    def test_concurrent_client_ref_is_reported_as_duplicate(self):
+        real = SaleInvoice._next_sequence_block
+
+        def racing(count, prefix="SINV-"):
+            # another sync commits dev-2 after our idempotency check
+            self._invoice(invoice_no="OTHER-1", client_ref="dev-2")
+            return real(count, prefix)
+
+        with mock.patch.object(SaleInvoice, "_next_sequence_block", side_effect=racing):
+            resp = self.client.post(self.url, {"invoices": [self._row("dev-1"), self._row("dev-2")]}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        results = resp.data["results"]
+        self.assertEqual([r["status"] for r in results], ["created", "duplicate"])
+        self.assertEqual(results[1]["invoice_no"], "OTHER-1")
+        self.assertEqual(SaleInvoice.objects.get(client_ref="dev-1").items.count(), 1)
+
+    def test_sequence_blocks_do_not_overlap(self):
+        first = SaleInvoice._next_sequence_block(3)
+        second = SaleInvoice._next_sequence_block(2)
+        self.assertEqual(first + second, [f"SINV-{n}" for n in range(1, 6)])
@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from notification.dispatch import dispatch_all, unread_count
+
+from .views import SaleInvoiceViewSet
+
+
+class SaleInvoiceNotificationTests(TestCase):
+    def test_create_notifies_through_the_counted_pipeline(self):
+        user = get_user_model().objects.create_user("n@example.com", "pass")
+        self.assertEqual(unread_count(user), 0)  # the user now has a counter
+
+        view = SaleInvoiceViewSet()
+        view.request = SimpleNamespace(user=user)
+        view.perform_create(SimpleNamespace(save=lambda: SimpleNamespace(invoice_no="SINV-N1", customer=None)))
+        dispatch_all()
+
+        self.assertEqual(unread_count(user), 1)
+        self.assertEqual(user.notifications.get().message, "Sale invoice SINV-N1 created.")
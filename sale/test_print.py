@@ -0,0 +1,56 @@
+import io
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from pypdf import PdfReader
+from rest_framework.test import APITestCase
+
+from finance.test_utils import basic_entities
+from utils import invoice_pdf
+
+from .models import SaleInvoice, SaleInvoiceItem
+
+
+class InvoicePrintTests(APITestCase):
+    url = "/sales/sale-invoices/print/"
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(get_user_model().objects.create_user("u@example.com", "p"))
+        e = basic_entities()
+        self.invoices = []
+        for n in range(2):
+            inv = SaleInvoice.objects.create(invoice_no=f"SINV-P{n}", date=date(2024, 5, 1),
+                                             customer=e["customer"], warehouse=e["warehouse"])
+            SaleInvoiceItem.objects.create(invoice=inv, product=e["product"], quantity=n + 1, rate=10,
+                                           amount=(n + 1) * 10)
+            self.invoices.append(inv)
+
+    def test_render_is_cached_per_invoice_version(self):
+        inv = self.invoices[0]
+        with mock.patch.object(invoice_pdf, "_pdf_fast", wraps=invoice_pdf._pdf_fast) as fast:
+            first = invoice_pdf.render_invoice_pdf(inv, renderer="fast")
+            self.assertEqual(invoice_pdf.render_invoice_pdf(inv, renderer="fast"), first)
+            self.assertEqual(fast.call_count, 1)
+
+            inv.items.update(quantity=5, amount=50)  # an edit is a new version
+            invoice_pdf.render_invoice_pdf(SaleInvoice.objects.get(pk=inv.pk), renderer="fast")
+            self.assertEqual(fast.call_count, 2)
+
+    def test_batch_print_merges_in_the_given_order(self):
+        ids = [self.invoices[1].pk, self.invoices[0].pk]
+        resp = self.client.post(self.url, {"ids": ids}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+        pages = PdfReader(io.BytesIO(resp.content)).pages
+        self.assertEqual(len(pages), 2)
+        self.assertIn("SINV-P1", pages[0].extract_text())
+
+    def test_bad_ids_are_rejected(self):
+        for ids, detail in (([self.invoices[0].pk, "x"], "ids must"), ([None], "ids must"),
+                            ([999999], "Unknown invoice ids")):
+            resp = self.client.post(self.url, {"ids": ids}, format="json")
+            self.assertEqual(resp.status_code, 400, ids)
+            self.assertIn(detail, resp.data["detail"])
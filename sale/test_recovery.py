@@ -0,0 +1,52 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from finance.models_receipts import CustomerReceipt
+from finance.test_utils import assert_ledger_entries, basic_entities
+from setting.models import Area, City
+
+from .models import RecoveryLog, SaleInvoice, SaleInvoiceItem
+
+
+class RecoveryPaymentTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user("u@example.com", "p"))
+        self.e = basic_entities()
+        self.area = Area.objects.create(name="Saddar", city=City.objects.create(name="Karachi"))
+        self.customer = self.e["customer"]
+        self.customer.area = self.area
+        self.customer.save(update_fields=["area"])
+        self.invoice = SaleInvoice.objects.create(invoice_no="SINV-R1", date=date.today(),
+                                                  customer=self.customer, warehouse=self.e["warehouse"])
+        SaleInvoiceItem.objects.create(invoice=self.invoice, product=self.e["product"], quantity=10, rate=10,
+                                       amount=100)
+        self.invoice.confirm()
+
+    def test_payment_posts_a_receipt_and_shows_on_the_worklist(self):
+        resp = self.client.post(f"/sales/recovery/{self.invoice.pk}/payment/", {"amount": "40"}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["payment_status"], "PARTIAL")
+        self.invoice.refresh_from_db()
+        self.assertEqual((self.invoice.paid_amount, self.invoice.payment_status), (Decimal("40"), "PARTIAL"))
+        rcpt = CustomerReceipt.objects.get()
+        assert_ledger_entries(self, rcpt.hordak_txn,
+                              [(self.e["chart"]["cash"], 40, 0), (self.customer.chart_of_account, 0, 40)])
+        self.assertEqual(rcpt.allocations.get().invoice_id, self.invoice.pk)
+        self.assertTrue(RecoveryLog.objects.filter(invoice=self.invoice, date=date.today()).exists())
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.current_balance, 60)
+
+        work = self.client.get("/sales/recovery/worklist/", {"area": self.area.pk}).data
+        self.assertEqual(work["count"], 1)
+        self.assertEqual((work["results"][0]["outstanding"], work["results"][0]["lastRecoveryDate"]),
+                         (Decimal("60"), date.today()))
+        self.assertEqual(work["totalOutstanding"], Decimal("60"))
+
+    def test_overpayment_is_refused_without_posting(self):
+        resp = self.client.post(f"/sales/recovery/{self.invoice.pk}/payment/", {"amount": "150"}, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(CustomerReceipt.objects.exists())
+        self.assertEqual(self.client.get("/sales/recovery/worklist/").status_code, 400)  # no route given
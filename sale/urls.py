@@ -12,6 +12,7 @@ from .views import (
     RecoveryLogViewSet,
     add_recovery_payment,
     add_recovery_note,
+    recovery_worklist,
     SaleInvoiceViewSetLatest
 )
 
@@ -21,7 +22,11 @@ router.register(r'returns', SaleReturnViewSet)
 router.register(r'return-items', SaleReturnItemViewSet)
 router.register(r'recovery-logs', RecoveryLogViewSet)
 router.register(r"sale-invoices", SaleInvoiceViewSetLatest, basename="sale-invoice")
-urlpatterns = router.urls 
+urlpatterns = router.urls + [
+    path('recovery/worklist/', recovery_worklist, name='recovery_worklist'),
+    path('recovery/<int:order_id>/payment/', add_recovery_payment, name='recovery_payment'),
+    path('recovery/<int:order_id>/note/', add_recovery_note, name='recovery_note'),
+]
 # + [
 #     path('', sale_invoice_list, name='sale_list'),
 #     path('create/', sale_invoice_create, name='sale_create'),
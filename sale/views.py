@@ -7,7 +7,7 @@ from rest_framework import viewsets,status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 
-from django.db.models import Q,Sum,F
+from django.db.models import Sum,F,Max
 
 from rest_framework.response import Response
 from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, extend_schema
@@ -15,8 +15,11 @@ from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, extend_schema
 from datetime import date
 from decimal import Decimal, InvalidOperation
 from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
 from finance.models_receipts import CustomerReceipt
-from utils.notifications import notify_user_and_party
+from utils.notifications import notify, notify_user_and_party
+from search.engine import filter_queryset
+from report.rollup import record_invoice
 
 
 from .models import (
@@ -39,6 +42,8 @@ from sale.api.serializers import (
 )
 from utils.stock import stock_out  # your existing helper
 from finance.hordak_posting import post_sale, post_customer_receipt
+from .bulk import bulk_create_invoices
+from utils.invoice_pdf import render_invoices_batch, pdf_response, RENDERERS
 
 @require_http_methods(["GET"])
 def sale_invoice_list(request):
@@ -65,11 +70,7 @@ def sale_invoice_create(request):
             sale = form.save()
             formset.instance = sale
             formset.save()
-            Notification.objects.create(
-                user=request.user,
-                title="Sale Invoice Created",
-                message=f"Sale invoice {sale.invoice_no} was created."
-            )
+            notify([request.user], "Sale Invoice Created", f"Sale invoice {sale.invoice_no} was created.")
             messages.success(request, "Sale invoice created.")
             return redirect(reverse('sale_detail', args=[sale.pk]))
     else:
@@ -116,14 +117,6 @@ class SaleInvoiceViewSet(viewsets.ModelViewSet):
     queryset = SaleInvoice.objects.all().prefetch_related('items', 'recovery_logs')
     serializer_class = SaleInvoiceSerializer
 
-    def perform_create(self, serializer):
-        invoice = serializer.save()
-        Notification.objects.create(
-            user=self.request.user,
-            title="Sale Invoice Created",
-            message=f"Sale invoice {invoice.invoice_no} was created."
-        )
-
     def get_queryset(self):
         qs = super().get_queryset()
         status_param = self.request.query_params.get("status")
@@ -140,10 +133,7 @@ class SaleInvoiceViewSet(viewsets.ModelViewSet):
 
         search = self.request.query_params.get("searchTerm")
         if search:
-            qs = qs.filter(
-                Q(invoice_no__icontains=search) |
-                Q(customer__name__icontains=search)
-            )
+            qs = filter_queryset(qs, "invoice", search)
 
         return qs
 
@@ -250,7 +240,7 @@ class RecoveryLogViewSet(viewsets.ModelViewSet):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def add_recovery_payment(request, order_id):
-    """Append a payment to the recovery log and update the invoice's paid amount."""
+    """Record a recovery: locked invoice -> CustomerReceipt (posted + allocated) -> RecoveryLog."""
     invoice = get_object_or_404(SaleInvoice, pk=order_id)
 
     amount = request.data.get("amount")
@@ -264,19 +254,12 @@ def add_recovery_payment(request, order_id):
     if hasattr(employee, "first"):
         employee = employee.first()
 
-    RecoveryLog.objects.create(
-        invoice=invoice,
-        employee=employee,
-        date=date.today(),
-        notes=notes or f"Payment received: {amount}",
-    )
-
-    invoice.paid_amount = (invoice.paid_amount or Decimal("0")) + amount
-    if invoice.paid_amount >= invoice.grand_total:
-        invoice.status = "Paid"
-    invoice.save(update_fields=["paid_amount", "status"])
+    try:
+        invoice.collect_recovery(amount, employee=employee, notes=notes)
+    except DjangoValidationError as e:
+        return Response({"detail": e.messages}, status=400)
 
-    serializer = SaleInvoiceSerializer(invoice)
+    serializer = SaleInvoiceReadSerializer(invoice)  # the legacy SaleInvoiceSerializer lists a removed field
     return Response(serializer.data)
 
 
@@ -298,10 +281,98 @@ def add_recovery_note(request, order_id):
         notes=notes,
     )
 
-    serializer = SaleInvoiceSerializer(invoice)
+    serializer = SaleInvoiceReadSerializer(invoice)
     return Response(serializer.data)
 
 
+@extend_schema(
+    parameters=[
+        OpenApiParameter("employee", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                         description="Recovery officer id (defaults to the requesting user's employee)"),
+        OpenApiParameter("area", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Comma separated area ids"),
+        OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    ],
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def recovery_worklist(request):
+    """
+    "What do I collect today": open (UNPAID/PARTIAL) confirmed invoices on the
+    officer's route, with outstanding, age and last recovery date, from one
+    joined query. Route = ?area=... or the officer's recovery_areas.
+    """
+    from hr.models import Employee
+
+    area_ids = [a for a in (request.GET.get("area") or "").split(",") if a.strip().isdigit()]
+    employee_id = request.GET.get("employee")
+    if not area_ids:
+        if employee_id:
+            employee = Employee.objects.filter(pk=employee_id).first()
+        else:
+            employee = getattr(request.user, "employee", None)
+            if hasattr(employee, "first"):
+                employee = employee.first()
+        if employee is not None:
+            area_ids = list(employee.recovery_areas.values_list("id", flat=True))
+        if not area_ids:
+            return Response({"detail": "No route: pass ?area= or assign recovery areas to the officer."}, status=400)
+
+    try:
+        limit = min(max(int(request.GET.get("limit") or 200), 1), 1000)
+    except ValueError:
+        limit = 200
+
+    today = date.today()
+    rows = (
+        SaleInvoice.objects
+        .filter(
+            payment_status__in=["UNPAID", "PARTIAL"],
+            status__in=["CONFIRMED", "DELIVERED"],
+            customer__area_id__in=area_ids,
+        )
+        .annotate(outstanding_amount=F("grand_total") - F("paid_amount"), last_recovery=Max("recovery_logs__date"))
+        .order_by("customer__area__name", "customer__name", "date", "id")
+        .values(
+            "id", "invoice_no", "date", "grand_total", "paid_amount", "payment_status",
+            "outstanding_amount", "last_recovery",
+            "customer_id", "customer__name", "customer__phone", "customer__address",
+            "customer__area_id", "customer__area__name",
+        )[:limit]
+    )
+
+    results, by_area = [], {}
+    for r in rows:
+        results.append({
+            "invoiceId": r["id"],
+            "invoiceNo": r["invoice_no"],
+            "date": r["date"],
+            "ageDays": (today - r["date"]).days,
+            "grandTotal": r["grand_total"],
+            "paidAmount": r["paid_amount"],
+            "outstanding": r["outstanding_amount"],
+            "paymentStatus": r["payment_status"],
+            "lastRecoveryDate": r["last_recovery"],
+            "customerId": r["customer_id"],
+            "customerName": r["customer__name"],
+            "customerPhone": r["customer__phone"],
+            "customerAddress": r["customer__address"],
+            "areaId": r["customer__area_id"],
+            "areaName": r["customer__area__name"],
+        })
+        area = by_area.setdefault(r["customer__area_id"], {
+            "areaId": r["customer__area_id"], "areaName": r["customer__area__name"],
+            "invoices": 0, "outstanding": Decimal("0"),
+        })
+        area["invoices"] += 1
+        area["outstanding"] += r["outstanding_amount"] or Decimal("0")
+
+    return Response({
+        "date": today,
+        "count": len(results),
+        "totalOutstanding": sum((a["outstanding"] for a in by_area.values()), Decimal("0")),
+        "areas": list(by_area.values()),
+        "results": results,
+    })
 
 
 COUNT_SR_STATUSES = {"CONFIRMED", "RETURNED", "REFUNDED", "CREDITED"}
@@ -322,6 +393,47 @@ class SaleInvoiceViewSetLatest(viewsets.ModelViewSet):
             return SaleInvoiceWriteSerializer
         return SaleInvoiceReadSerializer
 
+    # ---------- Bulk create (field sync) ----------
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Body: {"invoices": [ {client_ref, date, customer, warehouse, items: [...]}, ... ]}
+        Creates DRAFT invoices; each row reports created/duplicate/error independently.
+        """
+        rows = request.data.get("invoices")
+        if not isinstance(rows, list) or not rows:
+            return Response({"detail": "invoices must be a non-empty list."}, status=400)
+        results = bulk_create_invoices(rows)
+        summary = {
+            key: sum(1 for r in results if r["status"] == key)
+            for key in ("created", "duplicate", "error")
+        }
+        return Response({"summary": summary, "results": results}, status=200)
+
+    # ---------- Print many (route sheets) ----------
+    @action(detail=False, methods=["post"], url_path="print")
+    def print_batch(self, request):
+        """
+        Body: {"ids": [..], "renderer": "fast"|"html"}
+        Returns one merged PDF in the order given; cached per invoice version.
+        """
+        ids = request.data.get("ids") or []
+        renderer = request.data.get("renderer") or "fast"
+        if not isinstance(ids, list) or not ids:
+            return Response({"detail": "ids must be a non-empty list."}, status=400)
+        if renderer not in RENDERERS:
+            return Response({"detail": f"renderer must be one of {', '.join(RENDERERS)}."}, status=400)
+        try:
+            ids = [int(i) for i in ids]
+        except (TypeError, ValueError):
+            return Response({"detail": "ids must be a list of invoice ids."}, status=400)
+        found = self.get_queryset().in_bulk(ids)
+        missing = [i for i in ids if i not in found]
+        if missing:
+            return Response({"detail": f"Unknown invoice ids: {missing}"}, status=400)
+        pdf = render_invoices_batch([found[i] for i in ids], renderer=renderer)
+        return pdf_response(pdf, filename="invoices.pdf")
+
     # ---------- Confirm ----------
     @action(detail=True, methods=["post"])
     @transaction.atomic
@@ -351,6 +463,7 @@ class SaleInvoiceViewSetLatest(viewsets.ModelViewSet):
         else:
             inv.payment_status = "UNPAID"
         inv.save(update_fields=["status", "payment_status"])
+        record_invoice(inv)
 
         return Response(SaleInvoiceReadSerializer(inv).data)
 
@@ -0,0 +1,163 @@
+# search/engine.py
+"""
+Indexed search across invoices, orders, parties and products.
+
+PostgreSQL: rows are matched with icontains / istartswith and, on text
+fields, the `<%` word-similarity operator (trigram_word_similar lookup), all
+against UPPER(col::text), the expression the pg_trgm GIN indexes are built on
+(see `manage.py build_search_indexes`), so every arm is an index scan. The
+typo threshold is pg_trgm.word_similarity_threshold (default 0.6). Matches
+are ranked prefix first, then by trigram word similarity.
+
+Other backends (SQLite in tests): same filters, ranked by exact > prefix > contains.
+
+Code-like terms (no spaces, contain a digit: "SINV-120", "8964000", "0300...")
+take a prefix-only fast path first and only fall back to a full scan when the
+prefix finds nothing.
+"""
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Case, FloatField, Q, TextField, Value, When
+from django.db.models.functions import Cast, Greatest, Upper
+
+
+@dataclass(frozen=True)
+class Entity:
+    model: str                      # "app_label.Model"
+    code_fields: tuple              # prefix fast path
+    text_fields: tuple              # contains / trigram
+    label_field: str
+    subtitle_field: str = ""
+    select_related: tuple = ()
+    base_filter: dict = field(default_factory=dict)
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+    @property
+    def all_fields(self):
+        return self.code_fields + self.text_fields
+
+
+ENTITIES = {
+    "invoice": Entity(
+        model="sale.SaleInvoice",
+        code_fields=("invoice_no",),
+        text_fields=("customer__name",),
+        label_field="invoice_no",
+        subtitle_field="customer__name",
+        select_related=("customer",),
+    ),
+    "order": Entity(
+        model="ecommerce.Order",
+        code_fields=("order_no",),
+        text_fields=("customer__name",),
+        label_field="order_no",
+        subtitle_field="customer__name",
+        select_related=("customer",),
+    ),
+    "party": Entity(
+        model="inventory.Party",
+        code_fields=("phone",),
+        text_fields=("name", "proprietor"),
+        label_field="name",
+        subtitle_field="phone",
+    ),
+    "product": Entity(
+        model="inventory.Product",
+        code_fields=("barcode",),
+        text_fields=("name",),
+        label_field="name",
+        subtitle_field="barcode",
+        base_filter={"disable_sale_purchase": False},
+    ),
+}
+
+
+def is_postgres() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def looks_like_code(term: str) -> bool:
+    return bool(term) and not any(ch.isspace() for ch in term) and any(ch.isdigit() for ch in term)
+
+
+def _any(fields, lookup, term):
+    q = Q()
+    for f in fields:
+        q |= Q(**{f"{f}__{lookup}": term})
+    return q
+
+
+def _rank_expression(fields, term):
+    if is_postgres():
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        sims = [TrigramWordSimilarity(term, f) for f in fields]
+        best = sims[0] if len(sims) == 1 else Greatest(*sims)
+        # a field that starts with the term outranks a word match further in
+        prefix = Case(When(_any(fields, "istartswith", term), then=Value(1.0)), default=Value(0.0),
+                      output_field=FloatField())
+        return best + prefix
+
+    whens = []
+    for score, lookup in ((1.0, "iexact"), (0.8, "istartswith")):
+        whens += [When(**{f"{f}__{lookup}": term, "then": Value(score)}) for f in fields]
+    return Case(*whens, default=Value(0.5), output_field=FloatField())
+
+
+def filter_queryset(qs, entity_name: str, term: str):
+    """
+    Apply the indexed search for `entity_name` to an existing queryset and
+    order it by relevance (annotated as `search_rank`). Used by list views.
+    """
+    term = (term or "").strip()
+    if not term:
+        return qs
+    entity = ENTITIES[entity_name]
+
+    if looks_like_code(term):
+        prefixed = qs.filter(_any(entity.code_fields, "istartswith", term))
+        if prefixed.exists():
+            return prefixed.annotate(
+                search_rank=_rank_expression(entity.code_fields, term)
+            ).order_by("-search_rank", "-pk")
+
+    cond = _any(entity.all_fields, "icontains", term)
+    rank = _rank_expression(entity.all_fields, term)
+    if is_postgres():
+        # typo tolerance on text fields (e.g. "panadool" -> "Panadol"); same
+        # expression as icontains compiles to, so one GIN index serves both
+        keys = {f"search_key_{f.replace('__', '_')}": Upper(Cast(f, TextField())) for f in entity.text_fields}
+        qs = qs.alias(**keys)
+        for key in keys:
+            cond |= Q(**{f"{key}__trigram_word_similar": term})
+    return qs.filter(cond).annotate(search_rank=rank).order_by("-search_rank", "-pk")
+
+
+def search(term: str, types=None, limit: int = 10):
+    """Typed hits across entities: [{type, id, label, subtitle, score}, ...] best first."""
+    term = (term or "").strip()
+    if not term:
+        return []
+    hits = []
+    for name in (types or ENTITIES.keys()):
+        entity = ENTITIES.get(name)
+        if entity is None:
+            continue
+        qs = entity.get_model().objects.filter(**entity.base_filter)
+        if entity.select_related:
+            qs = qs.select_related(*entity.select_related)
+        fields = ["pk", entity.label_field, "search_rank"] + ([entity.subtitle_field] if entity.subtitle_field else [])
+        for row in filter_queryset(qs, name, term).values(*fields)[:limit]:
+            hits.append({
+                "type": name,
+                "id": row["pk"],
+                "label": row[entity.label_field],
+                "subtitle": row.get(entity.subtitle_field) if entity.subtitle_field else None,
+                "score": round(float(row["search_rank"] or 0), 4),
+            })
+    hits.sort(key=lambda h: h["score"], reverse=True)
+    return hits
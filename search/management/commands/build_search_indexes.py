@@ -0,0 +1,55 @@
+# management/commands/build_search_indexes.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+# Django's icontains / istartswith on Postgres compile to UPPER(col::text) LIKE UPPER(%s),
+# and search.engine runs its typo match as UPPER(col::text) %> term, so the
+# indexes are built on that exact expression.
+TRIGRAM = {
+    "inventory_party": ["name", "phone", "proprietor"],
+    "inventory_product": ["name", "barcode"],
+    "sale_saleinvoice": ["invoice_no"],
+    "ecommerce_order": ["order_no"],
+}
+PREFIX = {
+    "inventory_party": ["phone"],
+    "inventory_product": ["barcode"],
+    "sale_saleinvoice": ["invoice_no"],
+    "ecommerce_order": ["order_no"],
+}
+
+
+def statements():
+    yield "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+    for table, cols in TRIGRAM.items():
+        for col in cols:
+            yield (
+                f'CREATE INDEX IF NOT EXISTS "{table}_{col}_trgm" ON "{table}" '
+                f'USING gin ((UPPER("{col}"::text)) gin_trgm_ops)'
+            )
+    for table, cols in PREFIX.items():
+        for col in cols:
+            yield (
+                f'CREATE INDEX IF NOT EXISTS "{table}_{col}_prefix" ON "{table}" '
+                f'((UPPER("{col}"::text)) text_pattern_ops)'
+            )
+
+
+class Command(BaseCommand):
+    help = "Create pg_trgm GIN and prefix indexes used by the /search endpoint and list filters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Print the SQL without running it")
+
+    def handle(self, *args, **opts):
+        sql = list(statements())
+        if opts["dry_run"]:
+            for stmt in sql:
+                self.stdout.write(stmt + ";")
+            return
+        if connection.vendor != "postgresql":
+            raise CommandError("Search indexes require PostgreSQL")
+        with connection.cursor() as cur:
+            for stmt in sql:
+                cur.execute(stmt)
+        self.stdout.write(self.style.SUCCESS(f"{len(sql)} search index statement(s) applied"))
@@ -0,0 +1,59 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from finance.test_utils import hordak_chart
+from inventory.models import Party
+
+from .engine import filter_queryset, looks_like_code
+
+
+class LooksLikeCodeTests(SimpleTestCase):
+    def test_codes(self):
+        self.assertTrue(looks_like_code("SINV-120"))
+        self.assertTrue(looks_like_code("03001234567"))
+        self.assertFalse(looks_like_code("ali medical"))
+        self.assertFalse(looks_like_code("panadol"))
+        self.assertFalse(looks_like_code(""))
+
+
+class SearchEndpointTests(APITestCase):
+    def setUp(self):
+        hordak_chart()  # Party signals attach customers under A/R
+        self.user = get_user_model().objects.create_user(email="u@example.com", password="p")
+        self.client.force_authenticate(self.user)
+        self.ali = Party.objects.create(name="Ali Medical Store", address="x", phone="03001234567", party_type="customer")
+        self.bilal = Party.objects.create(name="Bilal Pharmacy", address="y", phone="03219876543", party_type="customer",
+                                          proprietor="Raza Ali")
+
+    def test_filter_queryset_ranks_prefix_first(self):
+        names = list(filter_queryset(Party.objects.all(), "party", "ali").values_list("name", flat=True))
+        self.assertEqual(names, ["Ali Medical Store", "Bilal Pharmacy"])
+
+    def test_typo_match_uses_trigram_index(self):
+        self.assertEqual(list(filter_queryset(Party.objects.all(), "party", "bilall")), [self.bilal])
+        with connection.cursor() as cur:
+            cur.execute("SET CONSTRAINTS ALL IMMEDIATE")  # no pending trigger events before CREATE INDEX
+            call_command("build_search_indexes", stdout=io.StringIO())
+            cur.execute("SET LOCAL enable_seqscan = off")
+        plan = filter_queryset(Party.objects.all(), "party", "bilall").explain()
+        self.assertIn("inventory_party_name_trgm", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+    def test_code_prefix_fast_path(self):
+        qs = filter_queryset(Party.objects.all(), "party", "0300")
+        self.assertEqual(list(qs.values_list("pk", flat=True)), [self.ali.pk])
+
+    def test_typed_hits(self):
+        resp = self.client.get("/search/", {"q": "bilal", "types": "party"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["results"][0]["type"], "party")
+        self.assertEqual(resp.data["results"][0]["id"], self.bilal.pk)
+
+    def test_unknown_type(self):
+        resp = self.client.get("/search/", {"q": "x", "types": "nope"})
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,33 @@
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, extend_schema
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .engine import ENTITIES, search
+
+MAX_LIMIT = 50
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter("q", OpenApiTypes.STR, OpenApiParameter.QUERY, required=True),
+        OpenApiParameter("types", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                         description="Comma separated subset of: " + ", ".join(ENTITIES)),
+        OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Hits per type (max 50)"),
+    ],
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def global_search(request):
+    """Typed hits across invoices, orders, parties and products, best match first."""
+    q = (request.GET.get("q") or "").strip()
+    types = [t.strip() for t in (request.GET.get("types") or "").split(",") if t.strip()] or None
+    unknown = [t for t in (types or []) if t not in ENTITIES]
+    if unknown:
+        return Response({"detail": f"Unknown type(s): {', '.join(unknown)}"}, status=400)
+    try:
+        limit = min(max(int(request.GET.get("limit") or 10), 1), MAX_LIMIT)
+    except ValueError:
+        limit = 10
+    hits = search(q, types=types, limit=limit) if q else []
+    return Response({"query": q, "count": len(hits), "results": hits})
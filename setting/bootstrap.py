@@ -0,0 +1,112 @@
+# setting/bootstrap.py
+"""
+Streaming master-data bootstrap for the offline apps (management_all).
+
+The body is the same JSON object management_all always returned,
+{"syncToken": N, "companies": [...], ..., "price_list_items": [...]},
+but it is produced table by table from a server-side cursor
+(queryset.values().iterator(chunk_size=CHUNK)) and yielded in ~64 KB pieces,
+so memory stays flat however large the party / batch tables get.
+
+Snapshots: build_snapshot() writes the same stream gzip-compressed to
+default_storage as bootstrap/bootstrap-<syncToken>.json.gz (the sync token
+is the data version). A snapshot stays servable until its token falls out of
+the change log: the client simply replays /sync/changes/ from it. Building is
+a no-op when the newest snapshot already has the current token
+(`build_bootstrap_snapshot`, run from cron).
+"""
+import gzip
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from rest_framework.utils.encoders import JSONEncoder
+
+from syncqueue.changes import TRACKED, head_token, oldest_token
+
+CHUNK = 2000
+FLUSH_BYTES = 64 * 1024
+SNAPSHOT_DIR = "bootstrap"
+KEEP = 3
+
+_encoder = JSONEncoder(separators=(",", ":"))
+
+
+def iter_json(token=None):
+    """Yield the bootstrap JSON as bytes pieces. `token` defaults to the current head."""
+    token = head_token() if token is None else token
+    buf = [f'{{"syncToken":{token}']
+    size = 0
+    for key, model in TRACKED.items():
+        buf.append(f',"{key}":[')
+        first = True
+        for row in model.objects.order_by("pk").values().iterator(chunk_size=CHUNK):
+            piece = _encoder.encode(row)
+            buf.append(piece if first else "," + piece)
+            first = False
+            size += len(piece)
+            if size >= FLUSH_BYTES:
+                yield "".join(buf).encode()
+                buf, size = [], 0
+        buf.append("]")
+    buf.append("}")
+    yield "".join(buf).encode()
+
+
+def _snapshot_name(token):
+    return f"{SNAPSHOT_DIR}/bootstrap-{token}.json.gz"
+
+
+def _snapshot_tokens():
+    try:
+        _, files = default_storage.listdir(SNAPSHOT_DIR)
+    except FileNotFoundError:
+        return []
+    tokens = []
+    for name in files:
+        if name.startswith("bootstrap-") and name.endswith(".json.gz"):
+            stem = name[len("bootstrap-"):-len(".json.gz")]
+            if stem.isdigit():
+                tokens.append(int(stem))
+    return sorted(tokens, reverse=True)
+
+
+def latest_snapshot():
+    """(token, storage name) of the newest snapshot the change log can still replay from, or None."""
+    tokens = _snapshot_tokens()
+    if not tokens:
+        return None
+    oldest = oldest_token()
+    if oldest is not None and tokens[0] < oldest - 1:
+        return None
+    return tokens[0], _snapshot_name(tokens[0])
+
+
+def build_snapshot(force=False):
+    """Write a gzip snapshot for the current sync token. Returns (token, name, created)."""
+    token = head_token()
+    name = _snapshot_name(token)
+    if not force and default_storage.exists(name):
+        return token, name, False
+    with tempfile.TemporaryFile() as tmp:
+        with gzip.GzipFile(fileobj=tmp, mode="wb", compresslevel=6) as gz:
+            for piece in iter_json(token):
+                gz.write(piece)
+        tmp.seek(0)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, File(tmp))
+    for old in _snapshot_tokens()[KEEP:]:
+        default_storage.delete(_snapshot_name(old))
+    return token, name, True
+
+
+def iter_snapshot(name, *, decompress=False, chunk=FLUSH_BYTES):
+    """Yield a stored snapshot as-is (gzip) or decompressed."""
+    with default_storage.open(name, "rb") as fh:
+        src = gzip.GzipFile(fileobj=fh) if decompress else fh
+        while True:
+            piece = src.read(chunk)
+            if not piece:
+                break
+            yield piece
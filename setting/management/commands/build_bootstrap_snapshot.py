@@ -0,0 +1,16 @@
+# management/commands/build_bootstrap_snapshot.py
+from django.core.management.base import BaseCommand
+
+from setting import bootstrap
+
+
+class Command(BaseCommand):
+    help = "Write the gzip master-data bootstrap snapshot for the current sync token (no-op if it exists)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="rebuild even if the snapshot exists")
+
+    def handle(self, *args, **opts):
+        token, name, created = bootstrap.build_snapshot(force=opts["force"])
+        verb = "Built" if created else "Up to date:"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {name} (syncToken {token})"))
@@ -1,3 +1,37 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from syncqueue.changes import prune
+from syncqueue.models import ChangeLog
+
+from . import bootstrap
+from .models import City
+
+
+class BootstrapStreamTest(TestCase):
+    def test_stream_is_one_json_document(self):
+        City.objects.bulk_create([City(name=f"City {i}") for i in range(50)])
+        with mock.patch.object(bootstrap, "FLUSH_BYTES", 100):  # force many pieces
+            pieces = list(bootstrap.iter_json(token=7))
+        self.assertGreater(len(pieces), 1)
+        body = json.loads(b"".join(pieces))
+        self.assertEqual(body["syncToken"], 7)
+        self.assertEqual(len(body["cities"]), 50)
+        self.assertEqual(body["products"], [])
 
-# Create your tests here.
+    def test_snapshot_older_than_a_pruned_log_is_not_served(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.create(name="Quetta")
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.create(name="Sukkur")
+        first = ChangeLog.objects.order_by("id").first().id
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(days=60))
+        prune(30)
+        with mock.patch.object(bootstrap, "_snapshot_tokens", return_value=[first - 1]):
+            self.assertIsNone(bootstrap.latest_snapshot())
+        with mock.patch.object(bootstrap, "_snapshot_tokens", return_value=[first]):
+            self.assertEqual(bootstrap.latest_snapshot()[0], first)
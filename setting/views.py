@@ -1,3 +1,5 @@
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.gzip import gzip_page
 from rest_framework import permissions, viewsets
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -12,8 +14,7 @@ from .serializers import (
     BranchSerializer,
     WarehouseSerializer,
 )
-from inventory.models import Party, Product, Batch, PriceList, PriceListItem
-from expense.models import ExpenseCategory
+from . import bootstrap
 # from voucher.models import ChartOfAccount
 from rest_framework.decorators import action
 
@@ -74,21 +75,33 @@ class WarehouseViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 
+@gzip_page
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticated])
 def management_all(request):
-    data = {
-        "companies": list(Company.objects.values()),
-        "groups": list(Group.objects.values()),
-        "distributors": list(Distributor.objects.values()),
-        "cities": list(City.objects.values()),
-        "areas": list(Area.objects.values()),
-        "parties": list(Party.objects.values()),
-        "products": list(Product.objects.values()),
-        "batches": list(Batch.objects.values()),
-        "expense_categories": list(ExpenseCategory.objects.values()),
-        "price_lists": list(PriceList.objects.values()),
-        "price_list_items": list(PriceListItem.objects.values()),
-        # "chart_of_accounts": list(),
-    }
-    return Response(data)
+    """
+    Master-data bootstrap for the offline apps, streamed table by table.
+    Served from the newest prebuilt snapshot when one is still replayable
+    (build_bootstrap_snapshot), else generated live; ?live=1 forces live.
+    Continue with /sync/changes/?since=<syncToken>.
+    """
+    accepts_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+    snap = None if request.query_params.get("live") else bootstrap.latest_snapshot()
+    if snap is None:
+        resp = StreamingHttpResponse(bootstrap.iter_json(), content_type="application/json")
+        resp["Cache-Control"] = "private, no-store"
+        return resp
+
+    token, name = snap
+    etag = f'"bootstrap-{token}"'
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        resp = HttpResponse(status=304)
+    else:
+        resp = StreamingHttpResponse(bootstrap.iter_snapshot(name, decompress=not accepts_gzip),
+                                     content_type="application/json")
+        if accepts_gzip:
+            resp["Content-Encoding"] = "gzip"
+    resp["ETag"] = etag
+    resp["X-Sync-Token"] = str(token)
+    resp["Cache-Control"] = "private, no-cache"
+    return resp
@@ -1,4 +1,10 @@
 from django.contrib import admin
 from .models import QueuedOperation
 
-admin.site.register(QueuedOperation)
+
+@admin.register(QueuedOperation)
+class QueuedOperationAdmin(admin.ModelAdmin):
+    list_display = ("id", "model_name", "operation", "user", "client_op_id", "status", "attempts", "created_at", "processed_at")
+    list_filter = ("status", "operation", "model_name", "processed")
+    search_fields = ("client_op_id", "model_name")
+    readonly_fields = ("result", "error", "processed_at", "attempts")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SyncqueueConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'syncqueue'
+
+    def ready(self):
+        # connects the master-data change-log signals
+        from . import changes  # noqa
@@ -0,0 +1,142 @@
+# syncqueue/changes.py
+"""
+Change tracking for the offline apps' master data ("changes since token").
+
+Writes: post_save / post_delete of a tracked model record (key, pk) in a
+per-thread buffer; an on_commit hook flushes the buffer with ONE bulk_create
+into ChangeLog. Logging after commit keeps ids close to commit order, and the
+reader only serves rows older than SETTLE so a transaction that committed
+late can't be skipped. Code that writes with queryset.update() calls record().
+
+Reads: changes_since(token) takes the next `limit` log rows, collapses them
+per object, and loads the current rows with one values() query per model.
+Ids that no longer exist come back as tombstones, so the log doesn't store
+what happened, only what changed; a rolled-back write at worst re-sends a row.
+
+Tokens older than the oldest kept row get {"reset": true}: the client
+re-bootstraps from /management/all/, which carries a fresh token.
+prune_sync_changes never empties the log, so that floor survives pruning.
+"""
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from expense.models import ExpenseCategory
+from inventory.models import Batch, Party, PriceList, PriceListItem, Product
+from setting.models import Area, City, Company, Distributor, Group
+
+from .models import ChangeLog
+
+# same keys as management_all
+TRACKED = {
+    "companies": Company,
+    "groups": Group,
+    "distributors": Distributor,
+    "cities": City,
+    "areas": Area,
+    "parties": Party,
+    "products": Product,
+    "batches": Batch,
+    "expense_categories": ExpenseCategory,
+    "price_lists": PriceList,
+    "price_list_items": PriceListItem,
+}
+KEYS = {model: key for key, model in TRACKED.items()}
+SETTLE = timedelta(seconds=5)
+PAGE = 1000
+
+_local = threading.local()
+
+
+def record(model, ids):
+    """Log changes to `ids` of `model` once the current transaction commits."""
+    key = KEYS.get(model)
+    if key is None:
+        return
+    pending = getattr(_local, "pending", None)
+    if pending is None or not transaction.get_connection().run_on_commit:
+        # no flush queued: whatever is buffered belongs to a transaction that rolled back
+        pending = _local.pending = set()
+    pending.update((key, pk) for pk in ids)
+    # every call registers a flush; the first one to run empties the buffer
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    pending = getattr(_local, "pending", None)
+    if not pending:
+        return
+    _local.pending = None
+    ChangeLog.objects.bulk_create([ChangeLog(model=key, object_id=pk) for key, pk in pending], batch_size=1000)
+
+
+def _on_change(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    record(sender, [instance.pk])
+
+
+for _model in TRACKED.values():
+    post_save.connect(_on_change, sender=_model, dispatch_uid=f"sync-changes-save-{_model._meta.label}")
+    post_delete.connect(_on_change, sender=_model, dispatch_uid=f"sync-changes-delete-{_model._meta.label}")
+
+
+def _settled():
+    return ChangeLog.objects.filter(created_at__lte=timezone.now() - SETTLE)
+
+
+def head_token():
+    """Token to hand out with a full snapshot: replaying from here can't miss a change."""
+    return _settled().order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def oldest_token():
+    """Smallest kept log id (None only before anything was logged); older tokens must reset."""
+    return ChangeLog.objects.order_by("id").values_list("id", flat=True).first()
+
+
+def changes_since(since, *, limit=PAGE):
+    """
+    {"token", "more", "reset", "changes": {key: {"upserts": [rows], "deleted": [ids]}}}.
+    Follow with since=<token> while "more" is true.
+    """
+    oldest = oldest_token()
+    if oldest is not None and since < oldest - 1:
+        return {"token": head_token(), "more": False, "reset": True, "changes": {}}
+
+    logs = list(_settled().filter(id__gt=since).order_by("id").values_list("id", "model", "object_id")[:limit + 1])
+    more = len(logs) > limit
+    logs = logs[:limit]
+    touched = defaultdict(set)
+    for _, key, pk in logs:
+        touched[key].add(pk)
+
+    changes = {}
+    for key, ids in touched.items():
+        model = TRACKED.get(key)
+        if model is None:
+            continue
+        rows = list(model.objects.filter(pk__in=ids).values())
+        found = {row["id"] for row in rows}
+        changes[key] = {"upserts": rows, "deleted": sorted(ids - found)}
+    return {
+        "token": logs[-1][0] if logs else since,
+        "more": more,
+        "reset": False,
+        "changes": changes,
+    }
+
+
+def prune(days=30):
+    """
+    Drop log rows older than `days`; clients holding older tokens get a reset.
+    The newest row is always kept: it is the floor oldest_token() checks
+    tokens against, and an empty log would accept any stale token.
+    """
+    newest = ChangeLog.objects.order_by("-id").values_list("id", flat=True).first()
+    return (ChangeLog.objects.filter(created_at__lt=timezone.now() - timedelta(days=days))
+            .exclude(id=newest).delete()[0])
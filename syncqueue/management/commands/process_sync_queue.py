@@ -0,0 +1,27 @@
+# management/commands/process_sync_queue.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from syncqueue import worker
+
+
+class Command(BaseCommand):
+    help = "Apply queued offline operations in chunks (safe to run several workers in parallel)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=worker.CHUNK)
+        parser.add_argument("--max-chunks", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="keep polling after the queue is drained")
+        parser.add_argument("--sleep", type=float, default=5.0, help="seconds between polls with --loop")
+
+    def handle(self, *args, **opts):
+        while True:
+            stats = worker.run(chunk=opts["chunk"], max_chunks=opts["max_chunks"])
+            if stats["claimed"] or not opts["loop"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Claimed {stats['claimed']}: {stats['applied']} applied, "
+                    f"{stats['failed']} failed, {stats['retry']} to retry"))
+            if not opts["loop"]:
+                return
+            time.sleep(opts["sleep"])
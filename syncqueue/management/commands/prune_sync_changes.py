@@ -0,0 +1,15 @@
+# management/commands/prune_sync_changes.py
+from django.core.management.base import BaseCommand
+
+from syncqueue.changes import prune
+
+
+class Command(BaseCommand):
+    help = "Delete master-data change-log rows older than --days (clients with older tokens re-bootstrap)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+
+    def handle(self, *args, **opts):
+        n = prune(opts["days"])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {n} change-log rows older than {opts['days']} days"))
@@ -8,12 +8,56 @@ class QueuedOperation(models.Model):
         ('UPDATE', 'Update'),
         ('DELETE', 'Delete'),
     ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('APPLIED', 'Applied'),
+        ('FAILED', 'Failed'),
+    ]
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    # client-generated id (e.g. a UUID) so a re-sent operation is stored and applied once
+    client_op_id = models.CharField(max_length=64, null=True, blank=True)
     model_name = models.CharField(max_length=100)
     operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
     data = models.JSONField()
     processed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # filled by the worker (syncqueue/worker.py)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.JSONField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'client_op_id'],
+                condition=models.Q(client_op_id__isnull=False),
+                name='syncqueue_unique_client_op',
+            ),
+        ]
+        indexes = [
+            # the worker's claim query: WHERE processed = false ORDER BY id
+            models.Index(fields=['id'], condition=models.Q(processed=False), name='syncqueue_pending_idx'),
+            models.Index(fields=['processed', 'model_name']),
+        ]
+
     def __str__(self):
         return f"{self.model_name} - {self.operation}"
+
+
+class ChangeLog(models.Model):
+    """
+    One row per saved/deleted master-data object, written after commit by
+    syncqueue/changes.py. The id is the client's sync token.
+    """
+    model = models.CharField(max_length=40)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['model', 'object_id'])]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id} @{self.id}"
@@ -0,0 +1,42 @@
+# syncqueue/registry.py
+"""
+Models an offline client may write through the sync queue, keyed by the
+QueuedOperation.model_name the app sends. Anything not listed is rejected.
+Paths are resolved lazily so importing the worker doesn't import every app.
+
+Ledger documents (posted to Hordak on save) are CREATE only: a generic partial
+save or DELETE would leave their journal entries behind, so edits and
+cancellations go through the document's own endpoints (cancel(), returns,
+Expense.post_to_ledger()).
+"""
+from django.utils.module_loading import import_string
+
+REGISTRY = {
+    "Order": ("ecommerce.models.Order", "ecommerce.serializers.OrderSerializer"),
+    "SaleInvoice": ("sale.models.SaleInvoice", "sale.api.serializers.SaleInvoiceWriteSerializer"),
+    "CustomerReceipt": ("finance.models_receipts.CustomerReceipt", "finance.api.serializers.CustomerReceiptWriteSerializer"),
+    "RecoveryLog": ("sale.models.RecoveryLog", "sale.serializers.RecoveryLogSerializer"),
+    "Expense": ("expense.models.Expense", "expense.serializers.ExpenseSerializer"),
+    "Attendance": ("hr.models.Attendance", "hr.serializers.AttendanceSerializer"),
+    "Lead": ("crm.models.Lead", "crm.serializers.LeadSerializer"),
+    "Interaction": ("crm.models.Interaction", "crm.serializers.InteractionSerializer"),
+}
+
+CREATE_ONLY = {"SaleInvoice", "CustomerReceipt", "Expense"}
+
+_resolved = {}
+
+
+def allows(model_name, operation):
+    """False when `operation` may not be synced for `model_name`."""
+    return operation == "CREATE" or model_name not in CREATE_ONLY
+
+
+def resolve(model_name):
+    """(model, serializer_class) for `model_name`, or None if it isn't syncable."""
+    if model_name not in REGISTRY:
+        return None
+    if model_name not in _resolved:
+        model_path, serializer_path = REGISTRY[model_name]
+        _resolved[model_name] = (import_string(model_path), import_string(serializer_path))
+    return _resolved[model_name]
@@ -6,3 +6,9 @@ class QueuedOperationSerializer(serializers.ModelSerializer):
     class Meta:
         model = QueuedOperation
         fields = '__all__'
+        read_only_fields = ['user', 'processed', 'status', 'attempts', 'result', 'error', 'processed_at']
+        validators = []  # (user, client_op_id) duplicates are answered with the stored op, see the viewset
+
+
+class QueuedOperationBulkSerializer(serializers.Serializer):
+    operations = QueuedOperationSerializer(many=True, allow_empty=False)
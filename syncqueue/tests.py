@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from crm.models import Lead
+from crm.serializers import LeadSerializer
+from setting.models import City
+
+from . import changes
+from .models import ChangeLog, QueuedOperation
+from .worker import process_chunk
+
+
+class SyncWorkerTest(TestCase):
+    def op(self, operation, data, model_name="Lead"):
+        return QueuedOperation.objects.create(model_name=model_name, operation=operation, data=data)
+
+    def test_applies_creates_updates_and_deletes_in_order(self):
+        a = self.op("CREATE", {"title": "A"})
+        b = self.op("CREATE", {"title": "B"})
+        bad = self.op("CREATE", {"description": "no title"})
+        process_chunk()
+        a.refresh_from_db()
+        b.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual((a.status, b.status, bad.status), ("APPLIED", "APPLIED", "FAILED"))
+        self.assertIn("title", bad.error)
+
+        upd = self.op("UPDATE", {"id": a.result["id"], "status": "WON"})
+        rm = self.op("DELETE", {"id": b.result["id"]})
+        other = self.op("CREATE", {}, model_name="User")
+        stats = process_chunk()
+        self.assertEqual(stats["applied"], 2)
+        self.assertEqual(Lead.objects.get(pk=a.result["id"]).status, "WON")
+        self.assertFalse(Lead.objects.filter(pk=b.result["id"]).exists())
+        for op in (upd, rm, other):
+            op.refresh_from_db()
+        self.assertEqual((upd.status, rm.status, other.status), ("APPLIED", "APPLIED", "FAILED"))
+
+    def test_update_of_missing_row_is_retried(self):
+        op = self.op("UPDATE", {"id": 999999, "status": "WON"})
+        self.assertEqual(process_chunk()["retry"], 1)
+        op.refresh_from_db()
+        self.assertFalse(op.processed)
+        self.assertEqual(op.attempts, 1)
+        self.assertEqual(process_chunk()["claimed"], 0)  # waits RETRY_DELAY before the next try
+
+    def test_unexpected_save_error_fails_only_that_op(self):
+        create = LeadSerializer.create
+
+        def flaky(ser, validated_data):
+            if validated_data["title"] == "boom":
+                raise RuntimeError("posting failed")
+            return create(ser, validated_data)
+
+        bad = self.op("CREATE", {"title": "boom"})
+        good = self.op("CREATE", {"title": "fine"})
+        with mock.patch.object(LeadSerializer, "create", flaky):
+            stats = process_chunk()
+        self.assertEqual((stats["applied"], stats["failed"]), (1, 1))
+        bad.refresh_from_db()
+        good.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts, bad.error), ("FAILED", 1, {"detail": ["posting failed"]}))
+        self.assertEqual(good.status, "APPLIED")
+        self.assertTrue(Lead.objects.filter(pk=good.result["id"]).exists())
+
+    def test_ledger_documents_are_create_only(self):
+        upd = self.op("UPDATE", {"id": 1, "paid_amount": "0"}, model_name="SaleInvoice")
+        rm = self.op("DELETE", {"id": 1}, model_name="CustomerReceipt")
+        expense = self.op("UPDATE", {"id": 1, "status": "POSTED"}, model_name="Expense")
+        self.assertEqual(process_chunk()["failed"], 3)
+        for op in (upd, rm, expense):
+            op.refresh_from_db()
+            self.assertEqual(op.status, "FAILED")
+            self.assertIn("operation", op.error)
+
+
+class ChangesSinceTest(TestCase):
+    def test_upserts_tombstones_and_reset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            keep = City.objects.create(name="Lahore")
+            gone = City.objects.create(name="Multan")
+        token = ChangeLog.objects.order_by("id").first().id - 1
+        gone_id = gone.id  # delete() clears the instance pk
+        with self.captureOnCommitCallbacks(execute=True):
+            gone.delete()
+
+        with mock.patch.object(changes, "SETTLE", timedelta(0)):
+            page = changes.changes_since(token)
+        self.assertFalse(page["reset"])
+        self.assertEqual([r["id"] for r in page["changes"]["cities"]["upserts"]], [keep.id])
+        self.assertEqual(page["changes"]["cities"]["deleted"], [gone_id])
+        self.assertTrue(changes.changes_since(-5)["reset"])
+
+    def test_prune_keeps_a_floor_for_stale_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.create(name="Quetta")
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.create(name="Sukkur")
+        stale = ChangeLog.objects.order_by("id").first().id - 1
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(days=60))
+
+        self.assertEqual(changes.prune(30), 1)
+        self.assertEqual(ChangeLog.objects.count(), 1)
+        self.assertTrue(changes.changes_since(stale)["reset"])
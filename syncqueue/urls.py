@@ -1,7 +1,10 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import QueuedOperationViewSet
+from .views import QueuedOperationViewSet, changes
 
 router = DefaultRouter()
 router.register(r'queued-operations', QueuedOperationViewSet)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('changes/', changes),
+] + router.urls
@@ -1,8 +1,78 @@
-from rest_framework import viewsets
+from django.views.decorators.gzip import gzip_page
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.response import Response
+
+from . import changes as change_log
 from .models import QueuedOperation
-from .serializers import QueuedOperationSerializer
+from .serializers import QueuedOperationBulkSerializer, QueuedOperationSerializer
 
 
 class QueuedOperationViewSet(viewsets.ModelViewSet):
     queryset = QueuedOperation.objects.all()
     serializer_class = QueuedOperationSerializer
+
+    def get_queryset(self):
+        qs = super().get_queryset().order_by("id")
+        user = self.request.user
+        if not user.is_staff:
+            qs = qs.filter(user=user)
+        params = self.request.query_params
+        if params.get("status"):
+            qs = qs.filter(status=params["status"].upper())
+        if params.get("client_op_ids"):
+            qs = qs.filter(client_op_id__in=params["client_op_ids"].split(","))
+        return qs
+
+    def create(self, request, *args, **kwargs):
+        """Idempotent on client_op_id: a re-sent operation returns the stored one (200)."""
+        client_op_id = request.data.get("client_op_id")
+        if client_op_id:
+            existing = QueuedOperation.objects.filter(user=request.user, client_op_id=client_op_id).first()
+            if existing is not None:
+                return Response(self.get_serializer(existing).data, status=status.HTTP_200_OK)
+        return super().create(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Enqueue many operations in one INSERT: {"operations": [{client_op_id, model_name, operation, data}, ...]}.
+        Ops whose client_op_id is already stored are skipped; the stored rows are returned.
+        """
+        ser = QueuedOperationBulkSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        rows = ser.validated_data["operations"]
+        QueuedOperation.objects.bulk_create(
+            [QueuedOperation(user=request.user, **row) for row in rows], ignore_conflicts=True, batch_size=500,
+        )
+        client_ids = [row["client_op_id"] for row in rows if row.get("client_op_id")]
+        stored = QueuedOperation.objects.filter(user=request.user, client_op_id__in=client_ids).order_by("id")
+        return Response({
+            "received": len(rows),
+            "operations": QueuedOperationSerializer(stored, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
+
+@gzip_page
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def changes(request):
+    """
+    Master-data changes since a sync token (gzip if accepted).
+      GET /sync/changes/?since=<token>&limit=1000
+    Returns upserted rows and deleted ids per model; repeat with the returned
+    token while "more" is true. No/expired token -> {"reset": true}: bootstrap
+    from /management/all/ and continue with its syncToken.
+    """
+    since = request.query_params.get("since")
+    try:
+        limit = min(max(int(request.query_params.get("limit", change_log.PAGE)), 1), 5000)
+        since = int(since) if since not in (None, "") else None
+    except ValueError:
+        return Response({"detail": ["since and limit must be integers."]}, status=status.HTTP_400_BAD_REQUEST)
+    if since is None:
+        return Response({"token": change_log.head_token(), "more": False, "reset": True, "changes": {}})
+    return Response(change_log.changes_since(since, limit=limit))
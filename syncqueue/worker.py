@@ -0,0 +1,227 @@
+# syncqueue/worker.py
+"""
+Applies queued offline operations.
+
+Each worker loops over:
+  1) claim: SELECT ... FROM queued ops WHERE processed = false ORDER BY id
+     LIMIT chunk FOR UPDATE SKIP LOCKED (inside one transaction), so several
+     `process_sync_queue` processes take disjoint chunks without waiting on
+     each other;
+  2) group the chunk by model_name and, inside a group, into runs of the same
+     operation (id order is kept, so a CREATE followed by an UPDATE of the same
+     row still works);
+  3) apply each run:
+       CREATE  validate every payload; one bulk_create when the model/serializer
+               pair is "plain" (ModelSerializer.create, no save() override, no
+               save signals, no nested/m2m fields), else serializer.save() per op;
+       UPDATE  one in_bulk for the targets, then a partial serializer save per op;
+       DELETE  one in_bulk + one DELETE ... WHERE id IN (...);
+     every write runs in a savepoint, so one bad op doesn't sink the chunk
+     (a failed bulk write falls back to per-op writes to find the culprit);
+  4) one bulk_update of the ops' status / result / error.
+
+An UPDATE whose target doesn't exist yet (its CREATE may still be queued in a
+chunk another worker holds) stays pending and is retried after RETRY_DELAY,
+up to MAX_ATTEMPTS. A DELETE of a missing row counts as applied. UPDATE and
+DELETE of ledger documents are rejected (see registry.CREATE_ONLY).
+Clients send a client_op_id; (user, client_op_id) is unique, so a re-sent
+operation is stored, and therefore applied, once.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, models, transaction
+from django.db.models import Q
+from django.db.models.deletion import ProtectedError, RestrictedError
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import QueuedOperation
+from .registry import allows, resolve
+
+CHUNK = 200
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(seconds=30)
+STATUS_FIELDS = ["processed", "status", "attempts", "result", "error", "processed_at"]
+
+
+def _bulk_safe(model, serializer_class):
+    """True when ModelSerializer.create would do nothing bulk_create doesn't."""
+    if serializer_class.create is not serializers.ModelSerializer.create:
+        return False
+    if model.save is not models.Model.save:
+        return False
+    if pre_save.has_listeners(model) or post_save.has_listeners(model):
+        return False
+    return not any(isinstance(f, (serializers.BaseSerializer, serializers.ManyRelatedField))
+                   for f in serializer_class().fields.values())
+
+
+def _error(exc):
+    if isinstance(exc, serializers.ValidationError):
+        return exc.detail
+    if isinstance(exc, ValidationError):
+        return {"detail": exc.messages}
+    return {"detail": [str(exc)]}
+
+
+class _Applier:
+    def __init__(self):
+        self.now = timezone.now()
+        self.stats = Counter()
+
+    def done(self, op, result):
+        op.processed, op.status, op.result, op.error = True, "APPLIED", result, None
+        op.attempts += 1
+        op.processed_at = self.now
+        self.stats["applied"] += 1
+
+    def fail(self, op, error):
+        op.processed, op.status, op.error = True, "FAILED", error
+        op.attempts += 1
+        op.processed_at = self.now
+        self.stats["failed"] += 1
+
+    def retry(self, op, error):
+        op.attempts += 1
+        op.processed_at = self.now
+        op.error = error
+        if op.attempts >= MAX_ATTEMPTS:
+            op.processed, op.status = True, "FAILED"
+            self.stats["failed"] += 1
+        else:
+            self.stats["retry"] += 1
+
+    def save_one(self, op, ser):
+        try:
+            with transaction.atomic():
+                obj = ser.save()
+        except Exception as e:  # e.g. a posting error in save(); the savepoint keeps the chunk usable
+            self.fail(op, _error(e))
+        else:
+            self.done(op, {"id": obj.pk})
+
+    # --- per operation --------------------------------------------------
+    def create(self, model, serializer_class, ops):
+        valid = []
+        for op in ops:
+            ser = serializer_class(data=op.data, context={"user": op.user})
+            if ser.is_valid():
+                valid.append((op, ser))
+            else:
+                self.fail(op, ser.errors)
+        if not valid:
+            return
+        if len(valid) > 1 and _bulk_safe(model, serializer_class):
+            objs = [model(**ser.validated_data) for _, ser in valid]
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(objs)
+            except DatabaseError:
+                pass  # find the offending op(s) below
+            else:
+                for (op, _), obj in zip(valid, objs):
+                    self.done(op, {"id": obj.pk})
+                return
+        for op, ser in valid:
+            self.save_one(op, ser)
+
+    def update(self, model, serializer_class, ops):
+        targets = model.objects.in_bulk({op.data.get("id") for op in ops} - {None})
+        for op in ops:
+            obj = targets.get(op.data.get("id"))
+            if obj is None:
+                self.retry(op, {"detail": [f"{op.model_name} {op.data.get('id')} not found."]})
+                continue
+            ser = serializer_class(obj, data=op.data, partial=True, context={"user": op.user})
+            if ser.is_valid():
+                self.save_one(op, ser)
+            else:
+                self.fail(op, ser.errors)
+
+    def delete(self, model, serializer_class, ops):
+        ids = {op.data.get("id") for op in ops} - {None}
+        existing = set(model.objects.in_bulk(ids))
+        try:
+            with transaction.atomic():
+                model.objects.filter(pk__in=existing).delete()
+        except (ProtectedError, RestrictedError, DatabaseError):
+            for op in ops:
+                self.delete_one(model, op, existing)
+            return
+        for op in ops:
+            if op.data.get("id") is None:
+                self.fail(op, {"id": ["This field is required."]})
+            else:
+                self.done(op, {"id": op.data["id"], "deleted": op.data["id"] in existing})
+
+    def delete_one(self, model, op, existing):
+        pk = op.data.get("id")
+        if pk is None:
+            return self.fail(op, {"id": ["This field is required."]})
+        try:
+            with transaction.atomic():
+                model.objects.filter(pk=pk).delete()
+        except (ProtectedError, RestrictedError, DatabaseError) as e:
+            self.fail(op, _error(e))
+        else:
+            self.done(op, {"id": pk, "deleted": pk in existing})
+
+    def apply(self, ops):
+        groups = defaultdict(list)
+        for op in ops:
+            groups[op.model_name].append(op)
+        for model_name, group in groups.items():
+            target = resolve(model_name)
+            if target is None:
+                for op in group:
+                    self.fail(op, {"model_name": [f"'{model_name}' cannot be synced."]})
+                continue
+            model, serializer_class = target
+            for operation, run in groupby(group, key=lambda op: op.operation):
+                handler = {"CREATE": self.create, "UPDATE": self.update, "DELETE": self.delete}.get(operation)
+                run = list(run)
+                if handler is None:
+                    for op in run:
+                        self.fail(op, {"operation": [f"Unknown operation '{operation}'."]})
+                elif not allows(model_name, operation):
+                    for op in run:
+                        self.fail(op, {"operation": [f"{model_name} can only be created through sync."]})
+                else:
+                    handler(model, serializer_class, run)
+
+
+def process_chunk(chunk=CHUNK):
+    """Claim and apply one chunk. Returns Counter(claimed=, applied=, failed=, retry=)."""
+    now = timezone.now()
+    with transaction.atomic():
+        ops = list(
+            QueuedOperation.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(processed=False)
+            .filter(Q(attempts=0) | Q(processed_at__lte=now - RETRY_DELAY))
+            .select_related("user")
+            .order_by("id")[:chunk]
+        )
+        if not ops:
+            return Counter(claimed=0)
+        applier = _Applier()
+        applier.apply(ops)
+        QueuedOperation.objects.bulk_update(ops, STATUS_FIELDS)
+    applier.stats["claimed"] = len(ops)
+    return applier.stats
+
+
+def run(chunk=CHUNK, max_chunks=None):
+    """Process chunks until the queue is drained (or max_chunks). Returns the summed Counter."""
+    total = Counter()
+    n = 0
+    while max_chunks is None or n < max_chunks:
+        stats = process_chunk(chunk)
+        if not stats["claimed"]:
+            break
+        total.update(stats)
+        n += 1
+    return total
@@ -0,0 +1,220 @@
+# utils/invoice_pdf.py
+"""
+Invoice PDF rendering service shared by the sale / purchase / hr admins.
+
+- Every rendered PDF is cached under (model, pk, version). The version is a hash
+  of the header totals/status and the line values, so any edit produces a new
+  key and stale PDFs are never served.
+- Two renderers:
+    "html" -> existing invoices/pdf_invoice.html through xhtml2pdf (full layout)
+    "fast" -> direct reportlab canvas drawing of the standard layout (much faster)
+- Batches: DB reads and template rendering happen in the parent process; only
+  plain data (dict / html string) is sent to a process pool for the CPU-bound
+  PDF step, then the pages are merged into one document with pypdf.
+"""
+import hashlib
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "invoice-pdf"
+CACHE_TIMEOUT = 60 * 60 * 24 * 7  # a week; keys change with the invoice anyway
+POOL_THRESHOLD = 8                # below this, rendering inline beats pool start-up
+RENDERERS = ("html", "fast")
+
+
+# ---------- data snapshot (parent process only) ----------
+
+def _items_of(invoice):
+    return list(invoice.items.all()) if hasattr(invoice, "items") else []
+
+
+def _line_snapshot(item):
+    product = getattr(item, "product", None)
+    batch = getattr(item, "batch", None) if getattr(item, "batch_id", None) else None
+    return {
+        "description": str(product) if product is not None else (getattr(item, "description", "") or ""),
+        "batch": getattr(batch, "batch_number", None) or getattr(item, "batch_number", "") or "",
+        "quantity": int(getattr(item, "quantity", 0) or 0),
+        "bonus": int(getattr(item, "bonus", 0) or 0),
+        "rate": str(getattr(item, "rate", None) or getattr(item, "purchase_price", None) or "0"),
+        "amount": str(getattr(item, "amount", None) or "0"),
+    }
+
+
+def invoice_snapshot(invoice, items=None):
+    """Plain, picklable view of an invoice used for versioning and the fast renderer."""
+    items = _items_of(invoice) if items is None else items
+    party = getattr(invoice, "customer", None) or getattr(invoice, "supplier", None) \
+        or getattr(invoice, "employee", None)
+    return {
+        "type": invoice.__class__.__name__,
+        "number": str(getattr(invoice, "invoice_no", None) or getattr(invoice, "return_no", None) or invoice.pk),
+        "date": str(getattr(invoice, "date", None) or getattr(invoice, "month", "") or ""),
+        "party": str(getattr(party, "name", "") or ""),
+        "status": str(getattr(invoice, "status", "") or ""),
+        "total_amount": str(getattr(invoice, "total_amount", None) or getattr(invoice, "net_salary", None) or "0"),
+        "discount": str(getattr(invoice, "discount", None) or "0"),
+        "tax": str(getattr(invoice, "tax", None) or "0"),
+        "grand_total": str(getattr(invoice, "grand_total", None) or "0"),
+        "paid_amount": str(getattr(invoice, "paid_amount", None) or "0"),
+        "lines": [_line_snapshot(li) for li in items],
+    }
+
+
+def invoice_version(snapshot) -> str:
+    raw = repr(sorted((k, v) for k, v in snapshot.items() if k != "lines")) + repr(snapshot["lines"])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_key(invoice, version, renderer):
+    return f"{CACHE_PREFIX}:{invoice._meta.label_lower}:{invoice.pk}:{renderer}:{version}"
+
+
+# ---------- renderers (pure; safe to run in a worker process) ----------
+
+def _pdf_from_html(html: str) -> bytes:
+    from xhtml2pdf import pisa
+
+    buf = io.BytesIO()
+    pisa.CreatePDF(html, dest=buf)
+    return buf.getvalue()
+
+
+def _pdf_fast(snap: dict) -> bytes:
+    """Standard layout drawn straight onto a reportlab canvas."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    width, height = A4
+    left, right = 15 * mm, width - 15 * mm
+    cols = (left, left + 95 * mm, left + 115 * mm, left + 135 * mm, right)  # desc | qty | bonus | rate | amount
+
+    def header():
+        c.setFont("Helvetica-Bold", 14)
+        c.drawCentredString(width / 2, height - 20 * mm, snap["type"])
+        c.setFont("Helvetica", 9)
+        c.drawString(left, height - 30 * mm, f"Number: {snap['number']}")
+        c.drawString(left, height - 35 * mm, f"Date: {snap['date']}")
+        c.drawRightString(right, height - 30 * mm, snap["party"][:60])
+        y = height - 45 * mm
+        c.setFont("Helvetica-Bold", 9)
+        c.drawString(cols[0], y, "Description")
+        c.drawRightString(cols[2] - 2 * mm, y, "Qty")
+        c.drawRightString(cols[3] - 2 * mm, y, "Bonus")
+        c.drawRightString(cols[4] - 25 * mm, y, "Rate")
+        c.drawRightString(cols[4], y, "Amount")
+        c.line(left, y - 2 * mm, right, y - 2 * mm)
+        c.setFont("Helvetica", 9)
+        return y - 7 * mm
+
+    y = header()
+    for ln in snap["lines"]:
+        if y < 30 * mm:
+            c.showPage()
+            y = header()
+        desc = ln["description"] + (f" [{ln['batch']}]" if ln["batch"] else "")
+        c.drawString(cols[0], y, desc[:60])
+        c.drawRightString(cols[2] - 2 * mm, y, str(ln["quantity"]))
+        c.drawRightString(cols[3] - 2 * mm, y, str(ln["bonus"] or ""))
+        c.drawRightString(cols[4] - 25 * mm, y, ln["rate"])
+        c.drawRightString(cols[4], y, ln["amount"])
+        y -= 5 * mm
+
+    y -= 3 * mm
+    c.line(left, y + 3 * mm, right, y + 3 * mm)
+    for label, key in (("Total", "total_amount"), ("Discount", "discount"), ("Tax", "tax"),
+                       ("Grand Total", "grand_total"), ("Paid", "paid_amount")):
+        if Decimal(snap[key] or 0) or key in {"total_amount", "grand_total"}:
+            c.drawRightString(cols[4] - 25 * mm, y, label)
+            c.drawRightString(cols[4], y, snap[key])
+            y -= 5 * mm
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _render_job(job) -> bytes:
+    renderer, payload = job
+    return _pdf_fast(payload) if renderer == "fast" else _pdf_from_html(payload)
+
+
+def _html_payload(invoice, items):
+    return render_to_string("invoices/pdf_invoice.html", {
+        "invoice": invoice,
+        "items": items,
+        "invoice_type": invoice.__class__.__name__,
+    })
+
+
+# ---------- public API ----------
+
+def render_invoice_pdf(invoice, *, renderer="html", items=None) -> bytes:
+    """Render (or fetch from cache) a single invoice PDF."""
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown renderer {renderer!r}")
+    items = _items_of(invoice) if items is None else items
+    snap = invoice_snapshot(invoice, items)
+    key = _cache_key(invoice, invoice_version(snap), renderer)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = _render_job((renderer, snap if renderer == "fast" else _html_payload(invoice, items)))
+        cache.set(key, pdf, CACHE_TIMEOUT)
+    return pdf
+
+
+def render_invoices_batch(invoices, *, renderer="fast", max_workers=None) -> bytes:
+    """
+    Render many invoices into ONE merged PDF.
+    Cache hits are reused; misses are rendered in a process pool when the
+    batch is large enough to amortise worker start-up.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown renderer {renderer!r}")
+    invoices = list(invoices)
+    prepared = []  # (key, job or None)
+    for inv in invoices:
+        items = _items_of(inv)
+        snap = invoice_snapshot(inv, items)
+        key = _cache_key(inv, invoice_version(snap), renderer)
+        prepared.append((key, snap, inv, items))
+
+    cached = cache.get_many([p[0] for p in prepared])
+    missing = [(key, (renderer, snap if renderer == "fast" else _html_payload(inv, items)))
+               for key, snap, inv, items in prepared if key not in cached]
+
+    if missing:
+        jobs = [job for _, job in missing]
+        if len(jobs) >= POOL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                rendered = list(pool.map(_render_job, jobs, chunksize=4))
+        else:
+            rendered = [_render_job(job) for job in jobs]
+        fresh = {key: pdf for (key, _), pdf in zip(missing, rendered)}
+        cache.set_many(fresh, CACHE_TIMEOUT)
+        cached.update(fresh)
+
+    writer = PdfWriter()
+    for key, *_ in prepared:
+        writer.append(PdfReader(io.BytesIO(cached[key])))
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def pdf_response(pdf: bytes, filename="invoice.pdf") -> HttpResponse:
+    response = HttpResponse(pdf, content_type="application/pdf")
+    response["Content-Disposition"] = f'inline; filename="{filename}"'
+    return response
@@ -0,0 +1,78 @@
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+
+@dataclass
+class NestedDiff:
+    created: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)  # pks
+    unchanged: int = 0
+
+
+def _value(model, name, value):
+    """Compare on the column value: FK instances -> pk."""
+    f = model._meta.get_field(name)
+    if f.is_relation and f.many_to_one:
+        return f.attname, getattr(value, "pk", value)
+    return f.attname, value
+
+
+@transaction.atomic
+def sync_nested_items(manager, rows, *, match_on=("product",), delete_missing=True):
+    """
+    Diff validated child rows against the existing children of a reverse-FK
+    manager (e.g. order.items) and write only what changed:
+      - a row with an "id" of an existing child updates that child,
+      - otherwise it takes the first unclaimed child with the same `match_on` values,
+      - otherwise it is created;
+      - children nobody claimed are removed with ONE delete (if delete_missing).
+    One read, then bulk_create / bulk_update (changed columns only) / delete.
+    Row ids that don't belong to the parent raise ValidationError.
+    """
+    model = manager.model
+    fk_name = manager.field.name
+    parent = manager.instance
+    existing = list(manager.all())
+    by_id = {obj.pk: obj for obj in existing}
+    by_key = {}
+    for obj in existing:
+        by_key.setdefault(tuple(getattr(obj, _value(model, k, None)[0]) for k in match_on), []).append(obj)
+
+    diff = NestedDiff()
+    claimed, changed_cols = set(), set()
+    for row in rows:
+        row = dict(row)
+        row_id = row.pop("id", None)
+        values = dict(_value(model, k, v) for k, v in row.items())
+        if row_id is not None:
+            obj = by_id.get(row_id)
+            if obj is None or row_id in claimed:
+                raise ValidationError(f"Line id {row_id} does not belong to this {parent._meta.verbose_name}.")
+        else:
+            key = tuple(values.get(_value(model, k, None)[0]) for k in match_on)
+            obj = next((o for o in by_key.get(key, ()) if o.pk not in claimed), None)
+        if obj is None:
+            diff.created.append(model(**{fk_name: parent}, **row))
+            continue
+        claimed.add(obj.pk)
+        dirty = [col for col, v in values.items() if getattr(obj, col) != v]
+        if not dirty:
+            diff.unchanged += 1
+            continue
+        for col in dirty:
+            setattr(obj, col, values[col])
+        changed_cols.update(name for name in row if _value(model, name, None)[0] in dirty)
+        diff.updated.append(obj)
+
+    if delete_missing:
+        diff.deleted = [pk for pk in by_id if pk not in claimed]
+        if diff.deleted:
+            model.objects.filter(pk__in=diff.deleted).delete()
+    if diff.updated:
+        model.objects.bulk_update(diff.updated, sorted(changed_cols))
+    if diff.created:
+        model.objects.bulk_create(diff.created)
+    return diff
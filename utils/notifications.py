@@ -1,13 +1,17 @@
-from django.contrib.auth import get_user_model
-from notification.models import Notification
+from notification.models import NotificationEvent
+
+
+def notify(user_ids, title, message):
+    """
+    Queue one notification for `user_ids` (ids or users). The rows are written
+    by `dispatch_notifications`, so request handlers only pay for one INSERT.
+    """
+    recipients = sorted({getattr(u, "pk", u) for u in user_ids if u} - {None})
+    if not recipients:
+        return None
+    return NotificationEvent.objects.create(title=title, message=message, recipients=recipients)
 
-User = get_user_model()
 
 def notify_user_and_party(user, party, title, message):
-    """Create notifications for a user and optionally a party's associated user."""
-    if user:
-        Notification.objects.create(user=user, title=title, message=message)
-    if party and getattr(party, "email", None):
-        party_user = User.objects.filter(email=party.email).first()
-        if party_user:
-            Notification.objects.create(user=party_user, title=title, message=message)
+    """Notify a user and, if it has a login, the party's linked user."""
+    return notify([user, getattr(party, "user_id", None)], title, message)
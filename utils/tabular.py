@@ -0,0 +1,56 @@
+# utils/tabular.py
+"""
+Streaming .xlsx / .csv reader shared by the file importers
+(purchase lines, attendance exports, bank statements).
+
+Each importer passes an alias map {canonical: {accepted header spellings}};
+headers are compared lower-cased with everything but letters and digits
+stripped, and columns with an unknown header are dropped. Rows come back as
+(row_number, {canonical: raw_value}) without loading the sheet into memory;
+blank rows are skipped.
+"""
+import csv
+import io
+
+
+def norm_header(h, aliases):
+    """Canonical name for header `h` under `aliases`, or None."""
+    key = "".join(ch for ch in str(h or "").lower() if ch.isalnum())
+    for canonical, spellings in aliases.items():
+        if key in spellings:
+            return canonical
+    return None
+
+
+def iter_rows(fileobj, filename, aliases, *, check_header=None):
+    """
+    Yield (row_number, {canonical: raw_value}). `check_header`, if given, is
+    called with the set of canonical columns found before any row is read
+    (raise from it to reject the file).
+    """
+    if str(filename).lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(fileobj, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [norm_header(h, aliases) for h in next(rows, ())]
+            if check_header:
+                check_header(set(header) - {None})
+            for n, values in enumerate(rows, start=2):
+                rec = {k: v for k, v in zip(header, values) if k}
+                if any(v not in (None, "") for v in rec.values()):
+                    yield n, rec
+        finally:
+            wb.close()
+        return
+
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="") if isinstance(fileobj.read(0), bytes) else fileobj
+    reader = csv.reader(text)
+    header = [norm_header(h, aliases) for h in next(reader, [])]
+    if check_header:
+        check_header(set(header) - {None})
+    for n, values in enumerate(reader, start=2):
+        rec = {k: v.strip() for k, v in zip(header, values) if k}
+        if any(rec.values()):
+            yield n, rec